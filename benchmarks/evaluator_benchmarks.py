@@ -0,0 +1,196 @@
+"""
+Throughput micro-benchmarks of the evaluation hot paths.
+
+Measures per-call latency and calls per second of:
+- evaluate_fitness (hillclimbers), evaluate_energy (SA), evaluate_particle_fitness (PSO, one particle and a swarm)
+- perturbate (SA) and Particle.update_velocity (PSO)
+- IncrementalScorer.delta / flip (hillclimbers and delta SA)
+- evaluate_flips (bit-sliced scoring of FLIP_BATCH random 2-flip neighbours of one assignment)
+
+on uf20, uf100 and uf250 plus synthetic uniform random 3-SAT instances of 1000 and 10000 variables.
+
+Usage (from the repository root):
+    python -m benchmarks.evaluator_benchmarks --output benchmarks/results.json
+    python -m benchmarks.evaluator_benchmarks --compare benchmarks/baseline.json --tolerance 0.15
+
+--compare flags every benchmark whose per-call latency is more than `tolerance` slower than the baseline
+and exits with status 1 when there is at least one regression.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) ## repository root, for `src`
+
+from src.hillclimbers.utils import evaluate_fitness, evaluate_flips
+from src.incremental_scorer import IncrementalScorer
+from src.instance import instance_from_clauses
+from src.pso.particle import Particle
+from src.pso.utils import evaluate_particle_fitness
+from src.sa.simulated_annealing import perturbate
+from src.sa.utils import evaluate_energy
+from src.utils import read_cnf
+
+CNF_FILES = {
+    "uf20": "cnf_files/uf20-01.cnf",
+    "uf100": "cnf_files/uf100-01.cnf",
+    "uf250": "cnf_files/uf250-01.cnf",
+}
+SYNTHETIC_SIZES = [1000, 10000] ## variables of the synthetic instances (clause/variable ratio 4.26)
+SWARM_SIZE = 350
+FLIP_BATCH = 256
+TARGET_SECONDS = 0.2 ## time spent on each repetition
+REPEATS = 5
+
+
+def synthetic_instance(num_vars, ratio=4.26, k=3, seed=0):
+    """Uniform random k-SAT instance (distinct variables per clause), as an Instance."""
+    rng = np.random.default_rng(seed)
+    num_clauses = int(round(ratio * num_vars))
+    variables = np.array([rng.choice(num_vars, k, replace=False) + 1 for _ in range(num_clauses)])
+    signs = rng.choice([-1, 1], size=(num_clauses, k))
+    return instance_from_clauses((variables * signs).tolist(), num_vars)
+
+
+def measure(function):
+    """:return: (seconds per call, calls per second), best of REPEATS repetitions of about TARGET_SECONDS each"""
+    calls = 1
+    while True: ## calibrate the number of calls per repetition
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= TARGET_SECONDS / 10:
+            break
+        calls *= 10
+    calls = max(1, int(calls * TARGET_SECONDS / elapsed))
+
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        for _ in range(calls):
+            function()
+        best = min(best, (time.perf_counter() - start) / calls)
+    return best, 1 / best
+
+
+def hot_paths(instance):
+    """:return: dict benchmark name -> zero argument function, all working on `instance`"""
+    num_vars = instance.num_vars
+    rng = np.random.default_rng(1)
+    combination = rng.integers(0, 2, num_vars).tolist()
+    state = np.array(combination)
+    position = rng.random(num_vars)
+    positions = rng.random((SWARM_SIZE, num_vars))
+
+    np.random.seed(1)
+    particle = Particle(num_vars)
+    particle.best_position = particle.position.copy()
+    global_best_position = rng.random(num_vars)
+
+    scorer = IncrementalScorer(instance, num_vars, list(combination))
+    variables = rng.integers(0, num_vars, 4096).tolist()
+    flips = [tuple(pair) for pair in rng.integers(0, num_vars, (FLIP_BATCH, 2)).tolist()]
+    counter = [0]
+
+    def scorer_flip():
+        counter[0] = (counter[0] + 1) & 4095
+        scorer.flip(variables[counter[0]])
+
+    def scorer_delta():
+        counter[0] = (counter[0] + 1) & 4095
+        scorer.delta(variables[counter[0]])
+
+    return {
+        "evaluate_fitness": lambda: evaluate_fitness(instance, combination),
+        "evaluate_energy": lambda: evaluate_energy(instance, state),
+        "evaluate_particle_fitness": lambda: evaluate_particle_fitness(instance, position),
+        f"evaluate_particle_fitness_swarm{SWARM_SIZE}": lambda: evaluate_particle_fitness(instance, positions),
+        "perturbate": lambda: perturbate(state, 1),
+        "particle_update_velocity": lambda: particle.update_velocity(global_best_position),
+        "scorer_delta": scorer_delta,
+        "scorer_flip": scorer_flip,
+        f"evaluate_flips{FLIP_BATCH}": lambda: evaluate_flips(instance, combination, flips),
+    }
+
+
+def run_benchmarks(quick=False):
+    instances = {name: read_cnf(path, as_instance=True)[0] for name, path in CNF_FILES.items()}
+    for num_vars in SYNTHETIC_SIZES[:1] if quick else SYNTHETIC_SIZES:
+        instances[f"synthetic{num_vars}"] = synthetic_instance(num_vars)
+
+    results = {}
+    for instance_name, instance in instances.items():
+        for bench_name, function in hot_paths(instance).items():
+            seconds, per_second = measure(function)
+            key = f"{bench_name}/{instance_name}"
+            results[key] = {"per_call_us": seconds * 1e6, "calls_per_second": per_second}
+            print(f"{key:<55} {seconds * 1e6:>12.2f} us/call {per_second:>14,.0f} calls/s")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """
+    :return: (list of (benchmark, baseline us, current us, slowdown) slower than baseline * (1 + tolerance),
+    list of benchmarks without a baseline entry, which can't be checked until the baseline is regenerated)
+    """
+    regressions = []
+    missing = []
+    for key, current in results.items():
+        if key not in baseline:
+            missing.append(key)
+            continue
+        before = baseline[key]["per_call_us"]
+        slowdown = current["per_call_us"] / before - 1
+        if slowdown > tolerance:
+            regressions.append((key, before, current["per_call_us"], slowdown))
+    return regressions, missing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="allowed slowdown before flagging (default 0.10 = 10%%)")
+    parser.add_argument("--quick", action="store_true", help="skip the largest synthetic instance")
+    args = parser.parse_args()
+
+    results = run_benchmarks(args.quick)
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.platform(),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nSaved results to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions, missing = compare(results, baseline, args.tolerance)
+        for key in missing:
+            print(f"NO BASELINE {key}: not checked, regenerate {args.compare} with --output")
+        for key, before, after, slowdown in regressions:
+            print(f"REGRESSION {key}: {before:.2f} us -> {after:.2f} us (+{slowdown:.0%})")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions against {args.compare} (tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
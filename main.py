@@ -1,84 +1,47 @@
 import pandas as pd
-from scipy.stats import kruskal, mannwhitneyu
 
-file = "Results/results.xlsx"
+from src.analysis import load_grouped, kruskal_wallis, pairwise_mann_whitney
 
-## 1) Ler todos os sheets
-all_sheets = pd.read_excel(file, sheet_name=None)
+## qualquer fonte de resultados: workbook .xlsx, store .jsonl, catálogo .sqlite, .csv ou .parquet
+## (as instâncias, algoritmos e seeds vêm das colunas instance_id/cnf_file e algorithm, não da posição das linhas)
+SOURCE = "Results/results.xlsx"
+CACHE_DIR = "Results/__analysiscache__"  ## arrays agrupados em cache, None desativa
+METRICS = ["best_fitness_satisfied", "evaluations_used"]
+CORRECTION = "holm"  ## correção de comparações múltiplas por instância: holm, bonferroni ou fdr_bh
+ALPHA = 0.05
 
-## 2) Ficar só com os algoritmos (ignorar TESTS)
-algo_sheets = {name: df for name, df in all_sheets.items() if name != "TESTS"}
+targets = ["PSO", "SA"]  ## algoritmos comparados com os outros (None mostra todos os pares)
 
-fitness_data = {}  # algoritmo -> lista de fitness (90 valores)
-eval_data = {}     # algoritmo -> lista de evaluations (90 valores)
-
-for name, df in algo_sheets.items():
-    fitness_data[name] = df["best_fitness_satisfied"].tolist()
-    eval_data[name] = df["evaluations_used"].tolist()
-
-## 3) Dividir em blocos de 30 por instância
-
-instances = ["uf20", "uf100", "uf250"]
-runs_per_instance = 30
-
-## dicionários: instância -> (algoritmo -> lista de valores)
-fitness_by_instance = {inst: {} for inst in instances}
-eval_by_instance = {inst: {} for inst in instances}
-
-for algo_name, fitness_list in fitness_data.items():
-    eval_list = eval_data[algo_name]
-
-    for i, inst in enumerate(instances):
-        start = i * runs_per_instance
-        end = (i + 1) * runs_per_instance
-
-        fitness_by_instance[inst][algo_name] = fitness_list[start:end]
-        eval_by_instance[inst][algo_name] = eval_list[start:end]
-
-## 4) Kruskal–Wallis por instância (fitness e evals)
-for inst in instances:
-    print(f"Instância: {inst}")
-
-    ## FITNESS
-    fitness_lists = list(fitness_by_instance[inst].values())
-    stat_f, p_f = kruskal(*fitness_lists)
-    print("Kruskal – FITNESS")
-    print("stat:", stat_f, " p:", p_f)
-
-    ## EVALUATIONS
-    eval_lists = list(eval_by_instance[inst].values())
-    stat_e, p_e = kruskal(*eval_lists)
-    print("Kruskal – EVALUATIONS")
-    print("stat:", stat_e, " p:", p_e)
+grouped = load_grouped(SOURCE, METRICS, cache_dir=CACHE_DIR)
 
+## 1) Kruskal–Wallis por instância, para cada métrica
+kruskal_results = pd.concat([kruskal_wallis(grouped, metric) for metric in METRICS], ignore_index=True)
+for instance in grouped.instances:
+    print(f"Instância: {instance}")
+    for _, test in kruskal_results[kruskal_results["instance"] == instance].iterrows():
+        print(f"Kruskal – {test['metric']}")
+        print("stat:", test["statistic"], " p:", test["p_value"])
     print("\n")
 
-targets = ["PSO", "SA"]
-
-for inst in instances:
-    print(f"Instância: {inst}")
-
-    algos = list(fitness_by_instance[inst].keys())
-
-    for target in targets:
-        print(f"\n--- {target} vs outros ---")
-
-        for other in algos:
-            if other == target:
-                continue
-
-            ## FITNESS
-            x = fitness_by_instance[inst][target]
-            y = fitness_by_instance[inst][other]
-
-            stat_f, p_f = mannwhitneyu(x, y, alternative="two-sided")
-
-            ## EVALUATIONS
-            ex = eval_by_instance[inst][target]
-            ey = eval_by_instance[inst][other]
-
-            stat_e, p_e = mannwhitneyu(ex, ey, alternative="two-sided")
-
-            print(f"\n{target} vs {other}")
-            print(f"Fitness: U={stat_f:.1f}, p={p_f:.3e}")
-            print(f"Eval:    U={stat_e:.1f}, p={p_e:.3e}")
+## 2) Mann–Whitney de todos os pares, p-values ajustados por instância
+pairs = pd.concat([pairwise_mann_whitney(grouped, metric, CORRECTION, ALPHA) for metric in METRICS], ignore_index=True)
+
+for instance in grouped.instances:
+    print(f"Instância: {instance}")
+    instance_pairs = pairs[pairs["instance"] == instance]
+
+    for target in targets if targets is not None else [None]:
+        if target is not None:
+            print(f"\n--- {target} vs outros ---")
+            selected = instance_pairs[(instance_pairs["algorithm_a"] == target) | (instance_pairs["algorithm_b"] == target)]
+        else:
+            selected = instance_pairs
+
+        for (first, second), tests in selected.groupby(["algorithm_a", "algorithm_b"], sort=False):
+            if target is not None and second == target: ## mostra sempre o alvo primeiro, U passa a ser o do alvo
+                first, second = second, first
+                tests = tests.assign(U=tests["n_a"] * tests["n_b"] - tests["U"])
+            print(f"\n{first} vs {second}")
+            for _, test in tests.iterrows():
+                significant = "*" if test["reject"] else ""
+                print(f"{test['metric']}: U={test['U']:.1f}, p={test['p_value']:.3e}, p_{CORRECTION}={test['p_adjusted']:.3e}{significant}")
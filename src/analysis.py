@@ -0,0 +1,259 @@
+"""
+Statistics pipeline over experiment results, for any number of instances, algorithms and seeds.
+
+1. read_results loads only the needed columns from a results source:
+   - an Excel workbook (one sheet per algorithm, sheets without an algorithm column use the sheet name,
+     sheets without result columns like TESTS are skipped)
+   - a JSON lines store (results_store.py), a SQLite catalog (results_catalog.py), a .csv or a .parquet file
+2. GroupedResults groups the runs by (instance, algorithm) from the columns themselves, never by row position.
+   load_grouped caches the grouped arrays on disk (cache_dir), keyed on the source path, size and mtime.
+3. kruskal_wallis and pairwise_mann_whitney test every instance at once from one count tensor per metric:
+   counts[i, a, v] = number of runs of algorithm a on instance i whose metric equals the v-th distinct value.
+   Rank sums, Mann-Whitney U statistics and tie corrections are tensor contractions over that tensor, so all
+   pairs of all instances are tested in one vectorized pass. p-values use the normal approximation with tie and
+   continuity corrections (scipy's method="asymptotic"), and are adjusted for multiple comparisons per
+   (instance, metric) family with adjust_p_values (holm, bonferroni or fdr_bh).
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.stats import chi2, norm
+
+from src.results_catalog import ResultsCatalog, instance_name
+
+METRICS = ("best_fitness_satisfied", "evaluations_used")
+CORRECTIONS = ("holm", "bonferroni", "fdr_bh")
+_KEY_COLUMNS = ("algorithm", "instance_id", "cnf_file")
+_CATALOG_RUN_COLUMNS = ("best_fitness_satisfied", "evaluations_used") ## metrics stored in the catalog's runs table
+
+
+def read_results(source, metrics=METRICS):
+    """
+    :param source: path of a .xlsx workbook, .jsonl store, .sqlite catalog, .csv or .parquet file
+    :param metrics: metric columns to read
+    :return: DataFrame with an `instance` label (name of the cnf file, or instance_id), `algorithm` and the metrics
+    """
+    metrics = list(metrics)
+    wanted = set(_KEY_COLUMNS) | set(metrics)
+    extension = os.path.splitext(source)[1].lower()
+
+    if extension in (".xlsx", ".xls"):
+        frames = []
+        for sheet, df in pd.read_excel(source, sheet_name=None, usecols=lambda column: column in wanted).items():
+            if not set(metrics) <= set(df.columns): ## e.g. the TESTS sheet
+                continue
+            if "algorithm" not in df.columns:
+                df = df.assign(algorithm=sheet)
+            frames.append(df)
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=sorted(wanted))
+    elif extension == ".jsonl":
+        with open(source, "r", encoding="utf-8") as f:
+            records = [{name: value for name, value in json.loads(line).items() if name in wanted} for line in f if line.strip()]
+        df = pd.DataFrame.from_records(records)
+    elif extension in (".sqlite", ".db"):
+        ## runs-table columns directly, any other metric from run_metrics, one correlated subquery each
+        selected = [f"r.{metric}" if metric in _CATALOG_RUN_COLUMNS else
+                    f"(SELECT value FROM run_metrics m WHERE m.run_id = r.id AND m.name = ?) AS {metric}" for metric in metrics]
+        parameters = [metric for metric in metrics if metric not in _CATALOG_RUN_COLUMNS]
+        catalog = ResultsCatalog(source)
+        try:
+            return catalog.query(f"SELECT i.name AS instance, r.algorithm, {', '.join(selected)} "
+                                 "FROM runs r JOIN instances i ON i.id = r.instance_id ORDER BY r.id", parameters)
+        finally:
+            catalog.close()
+    elif extension == ".parquet":
+        import pyarrow.parquet ## pandas needs it to read parquet anyway, only the wanted columns are read
+        present = pyarrow.parquet.read_schema(source).names
+        df = pd.read_parquet(source, columns=[column for column in present if column in wanted])
+    elif extension == ".csv":
+        df = pd.read_csv(source, usecols=lambda column: column in wanted)
+    else:
+        raise ValueError(f"Unknown results source {source!r}, expected .xlsx, .jsonl, .sqlite, .csv or .parquet")
+
+    if "cnf_file" in df.columns:
+        labels = [instance_name(path) if isinstance(path, str) else str(instance_id)
+                  for path, instance_id in zip(df["cnf_file"], df.get("instance_id", df["cnf_file"]))]
+    else:
+        labels = df["instance_id"].astype(str)
+    return df.assign(instance=labels)[["instance", "algorithm", *metrics]]
+
+
+class GroupedResults:
+    def __init__(self, instances, algorithms, groups, values):
+        """
+        :param instances: instance labels, in order of first appearance
+        :param algorithms: algorithm names, in order of first appearance
+        :param groups: (runs,) int array, group of each run = instance index * len(algorithms) + algorithm index
+        :param values: dict metric -> (runs,) float array
+        """
+        self.instances = list(instances)
+        self.algorithms = list(algorithms)
+        self.groups = groups
+        self.values = values
+        self._counts = {}
+
+    @classmethod
+    def from_dataframe(cls, df, metrics=METRICS):
+        instances = list(pd.unique(df["instance"].astype(str)))
+        algorithms = list(pd.unique(df["algorithm"].astype(str)))
+        instance_index = pd.Index(instances).get_indexer(df["instance"].astype(str))
+        algorithm_index = pd.Index(algorithms).get_indexer(df["algorithm"].astype(str))
+        groups = instance_index * len(algorithms) + algorithm_index
+        values = {metric: pd.to_numeric(df[metric], errors="coerce").to_numpy(dtype=float) for metric in metrics}
+        keep = np.all([~np.isnan(array) for array in values.values()], axis=0) if values else np.ones(len(groups), dtype=bool)
+        return cls(instances, algorithms, groups[keep], {metric: array[keep] for metric, array in values.items()})
+
+    def sample(self, metric, instance, algorithm):
+        """:return: values of one metric for one (instance, algorithm) group"""
+        group = self.instances.index(instance) * len(self.algorithms) + self.algorithms.index(algorithm)
+        return self.values[metric][self.groups == group]
+
+    def counts(self, metric):
+        """
+        :return: (distinct values (V,), counts (instances, algorithms, V)), computed once per metric
+        """
+        if metric not in self._counts:
+            distinct, inverse = np.unique(self.values[metric], return_inverse=True)
+            size = len(self.instances) * len(self.algorithms)
+            counts = np.bincount(self.groups * len(distinct) + inverse, minlength=size * len(distinct))
+            self._counts[metric] = distinct, counts.reshape(len(self.instances), len(self.algorithms), len(distinct)).astype(float)
+        return self._counts[metric]
+
+    def save(self, path):
+        arrays = {f"metric_{metric}": array for metric, array in self.values.items()}
+        np.savez(path, instances=np.array(self.instances, dtype=str), algorithms=np.array(self.algorithms, dtype=str),
+                 groups=self.groups, **arrays)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            values = {name[len("metric_"):]: data[name] for name in data.files if name.startswith("metric_")}
+            return cls(data["instances"].tolist(), data["algorithms"].tolist(), data["groups"], values)
+
+
+def load_grouped(source, metrics=METRICS, cache_dir=None):
+    """
+    read_results + GroupedResults.from_dataframe, cached in cache_dir (None disables the cache).
+    The cache file changes whenever the source file (size or mtime) or the metrics change.
+    """
+    if cache_dir is None:
+        return GroupedResults.from_dataframe(read_results(source, metrics), metrics)
+
+    stat = os.stat(source)
+    key = json.dumps([os.path.abspath(source), stat.st_size, stat.st_mtime_ns, list(metrics)])
+    path = os.path.join(cache_dir, f"{hashlib.sha1(key.encode()).hexdigest()[:16]}.npz")
+    if os.path.exists(path):
+        return GroupedResults.load(path)
+
+    grouped = GroupedResults.from_dataframe(read_results(source, metrics), metrics)
+    os.makedirs(cache_dir, exist_ok=True)
+    temporary = f"{path}.{os.getpid()}.tmp.npz"
+    grouped.save(temporary)
+    os.replace(temporary, path)
+    return grouped
+
+
+def _tie_sums(counts):
+    """sum over distinct values of t^3 - t, t = tied runs, along the last axis"""
+    return (counts ** 3 - counts).sum(axis=-1)
+
+
+def kruskal_wallis(grouped, metric):
+    """
+    Kruskal-Wallis H test of every instance (algorithms without runs on an instance are left out).
+    :return: DataFrame instance, metric, groups, statistic, p_value
+    """
+    _, counts = grouped.counts(metric)
+    sizes = counts.sum(axis=-1)                          ## (instances, algorithms)
+    totals = counts.sum(axis=1)                          ## (instances, V) runs of every algorithm per value
+    below = np.cumsum(totals, axis=-1) - totals
+    midranks = below + (totals + 1) / 2                  ## rank of each value, ties get the mean rank
+    rank_sums = np.einsum("iav,iv->ia", counts, midranks)
+
+    n = sizes.sum(axis=1)
+    present = sizes > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_term = np.where(present, rank_sums ** 2 / np.where(present, sizes, 1), 0).sum(axis=1)
+        statistic = 12 / (n * (n + 1)) * mean_term - 3 * (n + 1)
+        statistic /= 1 - _tie_sums(totals) / (n ** 3 - n)
+    groups = present.sum(axis=1)
+    p_value = np.where(groups > 1, chi2.sf(statistic, np.maximum(groups - 1, 1)), np.nan)
+    return pd.DataFrame({"instance": grouped.instances, "metric": metric, "groups": groups,
+                         "statistic": statistic, "p_value": p_value})
+
+
+def adjust_p_values(p_values, method="holm"):
+    """
+    Multiple-comparison correction of every row of p_values (one family per row, NaN entries are not tests).
+    :param method: "holm" (step-down family-wise), "bonferroni" or "fdr_bh" (Benjamini-Hochberg false discovery rate)
+    :return: adjusted p-values, same shape
+    """
+    if method not in CORRECTIONS:
+        raise ValueError(f"Unknown correction {method!r}, expected one of {CORRECTIONS}")
+    p_values = np.atleast_2d(np.asarray(p_values, dtype=float))
+    tests = (~np.isnan(p_values)).sum(axis=1, keepdims=True)
+    if method == "bonferroni":
+        return np.minimum(p_values * tests, 1)
+
+    order = np.argsort(p_values, axis=1) ## NaN sort last
+    ordered = np.take_along_axis(p_values, order, axis=1)
+    position = np.arange(p_values.shape[1])[None, :]
+    if method == "holm":
+        adjusted = np.fmax.accumulate(np.minimum((tests - position) * ordered, 1), axis=1)
+    else:
+        scaled = np.where(np.isnan(ordered), 1, tests / (position + 1) * ordered)
+        adjusted = np.minimum(np.minimum.accumulate(scaled[:, ::-1], axis=1)[:, ::-1], 1)
+    adjusted = np.where(np.isnan(ordered), np.nan, adjusted)
+    result = np.empty_like(adjusted)
+    np.put_along_axis(result, order, adjusted, axis=1)
+    return result
+
+
+def pairwise_mann_whitney(grouped, metric, correction="holm", alpha=0.05):
+    """
+    Two-sided Mann-Whitney U test of every pair of algorithms on every instance, in one pass.
+    :return: DataFrame instance, metric, algorithm_a, algorithm_b, n_a, n_b, U (of algorithm_a, like scipy),
+    p_value, p_adjusted (per instance), reject (p_adjusted < alpha)
+    """
+    _, counts = grouped.counts(metric)
+    sizes = counts.sum(axis=-1)
+    below = np.cumsum(counts, axis=-1) - counts
+    ## U[i, a, b] = pairs (x of a, y of b) with x > y, plus half the ties
+    u_statistic = np.einsum("iav,ibv->iab", counts, below + counts / 2)
+
+    n_a, n_b = sizes[:, :, None], sizes[:, None, :]
+    n = n_a + n_b
+    ## sum of t^3 - t over the values of each merged pair of samples, expanded to avoid an (i, a, b, v) tensor
+    squares, cubes = counts ** 2, counts ** 3
+    ties = (cubes.sum(-1)[:, :, None] + cubes.sum(-1)[:, None, :]
+            + 3 * np.einsum("iav,ibv->iab", squares, counts) + 3 * np.einsum("iav,ibv->iab", counts, squares) - n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma = np.sqrt(n_a * n_b / 12 * ((n + 1) - ties / (n * (n - 1))))
+        mean = n_a * n_b / 2
+        z = (np.maximum(u_statistic, n_a * n_b - u_statistic) - mean - 0.5) / sigma
+        p_value = np.clip(2 * norm.sf(z), 0, 1)
+    p_value = np.where(sigma > 0, p_value, 1.0) ## every run of both algorithms has the same value
+
+    first, second = np.triu_indices(len(grouped.algorithms), k=1)
+    valid = (sizes[:, first] > 0) & (sizes[:, second] > 0)
+    pair_p = np.where(valid, p_value[:, first, second], np.nan)
+    adjusted = adjust_p_values(pair_p, correction)
+
+    instance_index, pair_index = np.nonzero(valid)
+    a, b = first[pair_index], second[pair_index]
+    return pd.DataFrame({
+        "instance": np.array(grouped.instances, dtype=object)[instance_index],
+        "metric": metric,
+        "algorithm_a": np.array(grouped.algorithms, dtype=object)[a],
+        "algorithm_b": np.array(grouped.algorithms, dtype=object)[b],
+        "n_a": sizes[instance_index, a].astype(int),
+        "n_b": sizes[instance_index, b].astype(int),
+        "U": u_statistic[instance_index, a, b],
+        "p_value": pair_p[instance_index, pair_index],
+        "p_adjusted": adjusted[instance_index, pair_index],
+        "reject": adjusted[instance_index, pair_index] < alpha,
+    })
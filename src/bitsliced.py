@@ -0,0 +1,105 @@
+"""
+Bit-sliced evaluation of many assignments at once.
+
+A batch of B assignments is stored transposed and packed: planes[v] is a row of W = ceil(B / 64) uint64
+words whose bit j (of word j // 64) is the value of variable v in candidate j. A literal of every candidate
+is then one word gather (XOR-ed with all ones when negated), a clause is the OR of its literal words,
+and the satisfied count of each candidate is a per-lane popcount over the clause words (see lane_counts).
+Scoring 64 candidates costs about as much as scoring one with the ClauseMatrix kernels.
+
+pack_assignments packs any (B, num_vars) batch, pack_flips builds the batch of the neighbours of one
+assignment directly (its bits broadcast to every lane, plus the flipped bits of each candidate).
+"""
+
+import numpy as np
+
+LANES = 64
+ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+ADDER_LEVELS = 4      ## pairwise additions done bit-sliced before unpacking (lane_counts)
+ADDER_MIN_ROWS = 1024 ## below this many clauses unpacking right away is faster
+
+
+class BitslicedClauses:
+    def __init__(self, matrix):
+        """:param matrix: ClauseMatrix (see clause_matrix.py)"""
+        self.num_vars = matrix.num_vars
+        self.num_clauses = matrix.num_clauses
+        self.columns = [np.ascontiguousarray(matrix.indices[:, j]) for j in range(matrix.indices.shape[1])]
+        ## per column (num_clauses, 1) words: all ones where the literal is negated / is a real literal
+        self.negations = [np.where(matrix.negated[:, j], ALL_ONES, np.uint64(0))[:, None] for j in range(len(self.columns))]
+        if matrix.mask is None:
+            self.masks = None
+        else:
+            self.masks = [np.where(matrix.mask[:, j], ALL_ONES, np.uint64(0))[:, None] for j in range(len(self.columns))]
+
+    def satisfied_words(self, planes):
+        """:return: (num_clauses, W) uint64, bit j set where candidate j satisfies the clause"""
+        satisfied = np.zeros((self.num_clauses, planes.shape[1]), dtype=np.uint64)
+        literal = np.empty_like(satisfied)
+        for j, column in enumerate(self.columns):
+            np.take(planes, column, axis=0, out=literal)
+            literal ^= self.negations[j]
+            if self.masks is not None:
+                literal &= self.masks[j]
+            satisfied |= literal
+        return satisfied
+
+    def count_satisfied(self, planes, batch):
+        """:return: (batch,) int array, number of satisfied clauses of each packed candidate"""
+        return lane_counts(self.satisfied_words(planes))[:batch]
+
+
+def pack_assignments(assignments):
+    """(B, num_vars) array of 0/1 (or bool) -> (num_vars, ceil(B / 64)) uint64 planes"""
+    assignments = np.asarray(assignments).astype(bool, copy=False)
+    batch, num_vars = assignments.shape
+    words = -(-batch // LANES)
+    bits = np.zeros((words * LANES, num_vars), dtype=bool)
+    bits[:batch] = assignments
+    packed = np.packbits(bits, axis=0, bitorder="little") ## (words * 8, num_vars) bytes, lane order kept
+    return np.ascontiguousarray(packed.T).view("<u8")
+
+
+def pack_flips(assignment, flips):
+    """
+    Planes of the neighbours of one assignment, candidate j being the assignment with the variables flips[j] flipped.
+    :param assignment: (num_vars,) 0/1 values
+    :param flips: sequence of tuples of variable indexes
+    """
+    words = max(1, -(-len(flips) // LANES))
+    planes = np.zeros((len(assignment), words), dtype=np.uint64)
+    planes[np.asarray(assignment, dtype=bool)] = ALL_ONES
+    if len(flips):
+        candidates = np.repeat(np.arange(len(flips)), [len(flip) for flip in flips])
+        variables = np.fromiter((index for flip in flips for index in flip), dtype=np.intp, count=len(candidates))
+        lane_bits = np.left_shift(np.uint64(1), (candidates % LANES).astype(np.uint64))
+        np.bitwise_xor.at(planes, (variables, candidates // LANES), lane_bits)
+    return planes
+
+
+def lane_counts(rows):
+    """
+    Per-lane popcount: (R, W) uint64 -> (W * 64,) number of rows with each bit set.
+
+    With many rows, the first ADDER_LEVELS halvings add pairs of rows as bit-sliced binary numbers
+    (planes[r, b] holds bit b of every lane's partial count), which shrinks the data to unpack. The
+    remaining planes are unpacked into bytes and summed with the weight of their bit.
+    """
+    planes = rows[:, None, :]
+    levels = ADDER_LEVELS if rows.shape[0] >= ADDER_MIN_ROWS else 0
+    for _ in range(levels):
+        if planes.shape[0] % 2:
+            planes = np.concatenate([planes, np.zeros_like(planes[:1])])
+        first, second = planes[0::2], planes[1::2]
+        width = planes.shape[1]
+        summed = np.empty((first.shape[0], width + 1, planes.shape[2]), dtype=np.uint64)
+        carry = np.zeros((first.shape[0], planes.shape[2]), dtype=np.uint64)
+        for bit in range(width): ## ripple-carry adder on every pair of rows at once
+            half = first[:, bit] ^ second[:, bit]
+            summed[:, bit] = half ^ carry
+            carry = (first[:, bit] & second[:, bit]) | (carry & half)
+        summed[:, width] = carry
+        planes = summed
+    bits = np.unpackbits(planes.view(np.uint8), axis=2, bitorder="little") ## (rows, bits of the count, W * 64)
+    weighted = bits.sum(axis=0, dtype=np.int64)
+    return (weighted << np.arange(planes.shape[1], dtype=np.int64)[:, None]).sum(axis=0)
@@ -0,0 +1,143 @@
+"""
+Compiled clause matrix shared by the hillclimbers, SA and PSO.
+
+A CNF formula with m clauses of at most k literals is stored as:
+- indices: (m, k) int array, 0-based variable of each literal
+- negated: (m, k) bool array, True where the literal is negated (-x)
+- mask:    (m, k) bool array marking real literals when clauses have different lengths
+           (None when every clause has k literals, e.g. uf 3-SAT instances)
+
+A literal is true when bool(assignment[index]) != negated, a clause is satisfied when any of
+its literals is true. The same kernel scores one assignment (num_vars,) or a whole batch
+(batch, num_vars) with a single gather, so no algorithm has to walk the clauses literal by literal.
+
+Large batches (BITSLICE_MIN_BATCH rows or more) are scored by the bit-sliced kernel of bitsliced.py instead,
+64 assignments per machine word; both kernels return the same counts.
+
+ClauseMatrix also behaves like the list of clauses returned by read_cnf (len() and iteration),
+so it can be passed anywhere the algorithms expect `clauses`.
+"""
+
+import numpy as np
+
+from src.bitsliced import BitslicedClauses, pack_assignments
+
+BITSLICE_MIN_BATCH = 32 ## below this many rows the gather kernel is faster
+
+
+class ClauseMatrix:
+    def __init__(self, indices, negated, num_vars, mask=None):
+        self.indices = indices
+        self.negated = negated
+        self.mask = mask
+        self.num_vars = num_vars
+        self.num_clauses = indices.shape[0]
+        self._bitsliced = None
+
+    def bitsliced(self):
+        """:return: BitslicedClauses of this matrix, built on first use"""
+        if self._bitsliced is None:
+            self._bitsliced = BitslicedClauses(self)
+        return self._bitsliced
+
+    def __len__(self):
+        return self.num_clauses
+
+    def __iter__(self):
+        """Yields each clause as a list of DIMACS literals, like read_cnf does."""
+        for clause_index in range(self.num_clauses):
+            yield self.clause(clause_index)
+
+    def clause(self, clause_index):
+        literals = self.indices[clause_index] + 1
+        literals = np.where(self.negated[clause_index], -literals, literals)
+        if self.mask is not None:
+            literals = literals[self.mask[clause_index]]
+        return [int(value) for value in literals]
+
+
+def compile_clauses(clauses, num_vars=None):
+    """
+    Builds the ClauseMatrix of a list of clauses (as returned by read_cnf).
+
+    :param clauses: list of clauses, each clause a list of DIMACS literals (or an Instance)
+    :param num_vars: number of variables, inferred from the largest literal when None
+    :return: ClauseMatrix
+    """
+    if isinstance(clauses, ClauseMatrix):
+        return clauses
+    if hasattr(clauses, "clause_matrix"): ## Instance (see instance.py) keeps its own compiled matrix
+        return clauses.clause_matrix
+
+    num_clauses = len(clauses)
+    width = max((len(clause) for clause in clauses), default=0)
+    literals = np.zeros((num_clauses, width), dtype=np.int64)
+    mask = np.zeros((num_clauses, width), dtype=bool)
+    for clause_index, clause in enumerate(clauses):
+        literals[clause_index, :len(clause)] = clause
+        mask[clause_index, :len(clause)] = True
+
+    if num_vars is None:
+        num_vars = int(np.abs(literals).max(initial=0))
+
+    indices = np.where(mask, np.abs(literals) - 1, 0).astype(np.intp) ## padding points at variable 0, masked out below
+    negated = literals < 0
+    if mask.all():
+        mask = None
+    return ClauseMatrix(indices, negated, num_vars, mask)
+
+
+def literal_truth(matrix, assignments):
+    """
+    :param matrix: ClauseMatrix
+    :param assignments: (num_vars,) or (batch, num_vars) array of 0/1 (or bool) values
+    :return: (..., num_clauses, k) bool array, True where the literal is true
+    """
+    values = np.asarray(assignments).astype(bool, copy=False)
+    truth = values[..., matrix.indices] != matrix.negated
+    if matrix.mask is not None:
+        truth &= matrix.mask
+    return truth
+
+
+def clause_true_counts(matrix, assignments):
+    """Number of true literals of every clause, shape (..., num_clauses)."""
+    return literal_truth(matrix, assignments).sum(axis=-1)
+
+
+def count_satisfied(matrix, assignments):
+    """
+    Number of satisfied clauses of one assignment (int) or of every row of a 2-D batch (array).
+    """
+    if np.ndim(assignments) == 2 and len(assignments) >= BITSLICE_MIN_BATCH:
+        return matrix.bitsliced().count_satisfied(pack_assignments(assignments), len(assignments))
+    satisfied = literal_truth(matrix, assignments).any(axis=-1).sum(axis=-1)
+    if np.ndim(satisfied) == 0:
+        return int(satisfied)
+    return satisfied
+
+
+def neighbour_fitnesses(matrix, assignment):
+    """
+    Fitness of every 1-flip neighbour of a single assignment, in one pass over the clauses.
+
+    Flipping v satisfies the unsatisfied clauses containing v (make) and unsatisfies the clauses
+    whose only true literal belongs to v (break), so neighbour v scores fitness + make[v] - break[v].
+
+    :return: (num_vars,) int array, entry v is the fitness of the assignment with bit v flipped
+    """
+    truth = literal_truth(matrix, assignment)
+    counts = truth.sum(axis=-1)
+    fitness = np.count_nonzero(counts)
+
+    unsatisfied = counts == 0
+    if matrix.mask is None:
+        make_vars = matrix.indices[unsatisfied].ravel()
+    else:
+        make_vars = matrix.indices[unsatisfied][matrix.mask[unsatisfied]]
+    critical = counts == 1
+    break_vars = matrix.indices[critical][truth[critical]] ## the single true literal of each critical clause
+
+    make = np.bincount(make_vars, minlength=matrix.num_vars)
+    breaks = np.bincount(break_vars, minlength=matrix.num_vars)
+    return fitness + make - breaks
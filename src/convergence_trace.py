@@ -0,0 +1,134 @@
+"""
+Best-so-far convergence traces.
+
+TraceObserver (an observers.Observer) records (evaluation, fitness, wall time) points of the best fitness
+found so far, either
+- on every improvement of the best (grid=None), or
+- on a logarithmic grid of evaluations (grid="log", points_per_decade points between 10^i and 10^(i+1)),
+  each grid point holding the best fitness reached by then,
+plus a last point when the run finishes. Points live in array.array buffers, not in lists of tuples.
+
+save_trace writes one compact binary file per run (32 bytes of header + 16 bytes per point):
+- header, 4 int64: magic, version, number of points, 0
+- int64 evaluations, int32 fitness, float32 wall time (seconds since the start of the run)
+load_trace reads it back as numpy arrays.
+"""
+
+import hashlib
+import json
+import os
+import time
+from array import array
+
+import numpy as np
+
+from src.observers import Observer
+from src.results_catalog import instance_name
+
+MAGIC = 0x45434152544E4F43 ## arbitrary tag, rejects files that are not traces
+VERSION = 1
+HEADER_SIZE = 4
+POINTS_PER_DECADE = 10
+
+
+class TraceObserver(Observer):
+    def __init__(self, grid=None, points_per_decade=POINTS_PER_DECADE):
+        """
+        :param grid: None records every improvement of the best fitness, "log" records a logarithmic grid of evaluations
+        :param points_per_decade: grid points between two powers of ten when grid="log"
+        """
+        if grid not in (None, "log"):
+            raise ValueError(f"Unknown trace grid {grid!r}, expected None or 'log'")
+        self.grid = grid
+        self.points_per_decade = points_per_decade
+        self.evaluations = array("q")
+        self.fitness = array("i")
+        self.wall_time = array("f")
+        self.best_fitness = None
+        self.grid_index = 0
+        self.next_grid_point = 1
+        self.start_time = time.perf_counter()
+
+    def on_start(self, num_vars, num_clauses):
+        self.start_time = time.perf_counter()
+
+    def _append(self, evaluations, fitness, now):
+        self.evaluations.append(int(evaluations))
+        self.fitness.append(int(fitness))
+        self.wall_time.append(now - self.start_time)
+
+    def _fill_grid(self, evaluations, now):
+        """Grid points before `evaluations` get the best fitness reached before it."""
+        while self.next_grid_point < evaluations:
+            if self.best_fitness is not None:
+                self._append(self.next_grid_point, self.best_fitness, now)
+            self.grid_index += 1
+            self.next_grid_point = max(self.next_grid_point + 1, int(round(10 ** (self.grid_index / self.points_per_decade))))
+
+    def on_improvement(self, evaluations, fitness):
+        if self.best_fitness is not None and fitness <= self.best_fitness: ## e.g. a new climb of a multistart algorithm
+            return
+        now = time.perf_counter()
+        if self.grid is None:
+            self._append(evaluations, fitness, now)
+        else:
+            self._fill_grid(evaluations, now)
+        self.best_fitness = fitness
+
+    def on_finish(self, evaluations, fitness):
+        now = time.perf_counter()
+        if self.grid is not None:
+            self._fill_grid(evaluations, now)
+        if self.best_fitness is None or fitness > self.best_fitness:
+            self.best_fitness = fitness
+        if not self.evaluations or self.evaluations[-1] != evaluations:
+            self._append(evaluations, self.best_fitness, now)
+
+    def arrays(self):
+        """:return: (evaluations int64, fitness int32, wall time float32) numpy arrays"""
+        return (np.frombuffer(self.evaluations, dtype=np.int64).copy(), np.frombuffer(self.fitness, dtype=np.int32).copy(),
+                np.frombuffer(self.wall_time, dtype=np.float32).copy())
+
+    def save(self, path):
+        return save_trace(path, *self.arrays())
+
+
+def save_trace(path, evaluations, fitness, wall_time):
+    """Writes one trace file (atomically)."""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    header = np.array([MAGIC, VERSION, len(evaluations), 0], dtype="<i8")
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(header.tobytes())
+        f.write(np.ascontiguousarray(evaluations, dtype="<i8").tobytes())
+        f.write(np.ascontiguousarray(fitness, dtype="<i4").tobytes())
+        f.write(np.ascontiguousarray(wall_time, dtype="<f4").tobytes())
+    os.replace(temporary, path)
+    return path
+
+
+def load_trace(path):
+    """:return: (evaluations, fitness, wall_time) numpy arrays of a trace file"""
+    data = np.fromfile(path, dtype=np.uint8)
+    header = data[:HEADER_SIZE * 8].view("<i8")
+    if len(header) < HEADER_SIZE or header[0] != MAGIC or header[1] != VERSION:
+        raise ValueError(f"{path} is not a convergence trace file")
+    count = int(header[2])
+    position = HEADER_SIZE * 8
+    arrays = []
+    for dtype in ("<i8", "<i4", "<f4"):
+        size = np.dtype(dtype).itemsize * count
+        arrays.append(data[position:position + size].view(dtype))
+        position += size
+    return tuple(arrays)
+
+
+def trace_path(directory, task):
+    """
+    Trace file of an experiment_runner.Task, e.g. <directory>/NAHC/uf20-01_seed3_1a2b3c4d.trace
+    (the last part is a hash of the parameters, so parameter sets don't overwrite each other).
+    """
+    params = hashlib.sha1(json.dumps(task.params, sort_keys=True).encode()).hexdigest()[:8]
+    return os.path.join(directory, task.algorithm, f"{instance_name(task.cnf_path)}_seed{task.seed}_{params}.trace")
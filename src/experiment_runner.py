@@ -0,0 +1,177 @@
+"""
+Process-pool runner shared by the run_experiments.py scripts.
+
+A campaign is expanded into independent tasks (algorithm x instance x run, see expand_grid) that run on
+a configurable number of worker processes. Each task seeds `random` and `np.random` with its own seed right
+before calling the algorithm, exactly like the old sequential loops did (seed = run), so the results don't
+depend on the number of workers or on the order in which tasks finish. Rows are returned in task order.
+
+Each worker process loads every instance at most once (load_instance keeps a per-process cache), from the
+memory-mapped binary cache of the .cnf (see instance_cache.py).
+
+run_task_batches is the variant for algorithms that run several seeds in one call (e.g. multi-chain SA): tasks
+that only differ by their run/seed form one batch, and the batch function returns one row per task.
+"""
+
+import json
+import multiprocessing
+import random
+from collections import namedtuple
+
+import numpy as np
+
+from src.utils import read_cnf
+
+Task = namedtuple("Task", ["algorithm", "instance_id", "cnf_path", "run", "seed", "params"])
+
+_instances = {} ## cnf_path -> (clauses, num_clauses, num_vars), per process
+
+
+def load_instance(cnf_path):
+    """Loads cnf_path once per process and returns (clauses, num_clauses, num_vars)."""
+    if cnf_path not in _instances:
+        clauses, _, num_vars = read_cnf(cnf_path, as_instance=True, cache=True)
+        _instances[cnf_path] = (clauses, len(clauses), num_vars)
+    return _instances[cnf_path]
+
+
+def expand_grid(algorithms, cnf_files, independent_runs):
+    """
+    :param algorithms: dict algorithm name -> dict of parameters passed to the task function
+    :param cnf_files: dict instance_id -> cnf path
+    :param independent_runs: number of runs per (algorithm, instance), run i uses seed i
+    :return: list of Task, instance by instance, algorithm by algorithm, run by run
+    """
+    tasks = []
+    for instance_id, cnf_path in cnf_files.items():
+        for algorithm, params in algorithms.items():
+            for run in range(independent_runs):
+                tasks.append(Task(algorithm, instance_id, cnf_path, run, run, dict(params)))
+    return tasks
+
+
+def execute_task(run_task, task):
+    """
+    Seeds the generators with task.seed and runs one task.
+    :param run_task: function(task, clauses, num_clauses, num_vars) -> dict of algorithm specific columns
+    :return: result row (dict)
+    """
+    clauses, num_clauses, num_vars = load_instance(task.cnf_path)
+    random.seed(task.seed)
+    np.random.seed(task.seed)
+
+    row = task_row(task, num_clauses, num_vars)
+    row.update(run_task(task, clauses, num_clauses, num_vars))
+    return row
+
+
+def task_row(task, num_clauses, num_vars):
+    """:return: the columns every result row starts with"""
+    return {
+        "algorithm": task.algorithm,
+        "instance_id": task.instance_id,
+        "cnf_file": task.cnf_path,
+        "run": task.run,
+        "seed": task.seed,
+        "num_vars": num_vars,
+        "num_clauses": num_clauses,
+    }
+
+
+def _execute_indexed(arguments):
+    run_task, index, task = arguments
+    return index, execute_task(run_task, task)
+
+
+def run_tasks(tasks, run_task, workers=1, on_result=None):
+    """
+    Runs every task and returns their rows in task order.
+
+    :param tasks: list of Task (see expand_grid)
+    :param run_task: module level function(task, clauses, num_clauses, num_vars) -> dict (must be picklable)
+    :param workers: number of worker processes, 1 runs everything in the current process
+    :param on_result: optional callback(task, row), called in the main process as soon as a task finishes
+    :return: list of rows, rows[i] belongs to tasks[i]
+    """
+    if not tasks: ## e.g. a resumed campaign with every run in the store, no pool to start
+        return []
+    for cnf_path in {task.cnf_path for task in tasks}: ## parsed before forking, workers inherit the cache
+        load_instance(cnf_path)
+
+    rows = [None] * len(tasks)
+    arguments = [(run_task, index, task) for index, task in enumerate(tasks)]
+
+    if workers <= 1:
+        results = map(_execute_indexed, arguments)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(workers)
+        results = pool.imap_unordered(_execute_indexed, arguments)
+
+    try:
+        for index, row in results:
+            rows[index] = row
+            if on_result is not None:
+                on_result(tasks[index], row)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return rows
+
+
+def _execute_batch(arguments):
+    run_batch, indexed_tasks = arguments
+    tasks = [task for _, task in indexed_tasks]
+    clauses, num_clauses, num_vars = load_instance(tasks[0].cnf_path)
+    rows = []
+    for task, columns in zip(tasks, run_batch(tasks, clauses, num_clauses, num_vars)):
+        row = task_row(task, num_clauses, num_vars)
+        row.update(columns)
+        rows.append(row)
+    return [(index, row) for (index, _), row in zip(indexed_tasks, rows)]
+
+
+def run_task_batches(tasks, run_batch, workers=1, on_result=None):
+    """
+    Like run_tasks, but the tasks of the same algorithm, instance and parameters run in one call.
+
+    :param tasks: list of Task (see expand_grid)
+    :param run_batch: module level function(tasks, clauses, num_clauses, num_vars) -> list of dicts, one per task,
+    in the same order (must be picklable). It seeds its own generators from task.seed.
+    :param workers: number of worker processes (one batch per process at a time), 1 runs everything in the current process
+    :param on_result: optional callback(task, row), called in the main process for every row of a finished batch
+    :return: list of rows, rows[i] belongs to tasks[i]
+    """
+    if not tasks: ## e.g. a resumed campaign with every run in the store, no pool to start
+        return []
+    for cnf_path in {task.cnf_path for task in tasks}: ## parsed before forking, workers inherit the cache
+        load_instance(cnf_path)
+
+    batches = {}
+    for index, task in enumerate(tasks):
+        key = (task.algorithm, task.cnf_path, json.dumps(task.params, sort_keys=True))
+        batches.setdefault(key, []).append((index, task))
+    arguments = [(run_batch, indexed_tasks) for indexed_tasks in batches.values()]
+
+    rows = [None] * len(tasks)
+    if workers <= 1:
+        results = map(_execute_batch, arguments)
+        pool = None
+    else:
+        pool = multiprocessing.Pool(min(workers, len(arguments)))
+        results = pool.imap_unordered(_execute_batch, arguments)
+
+    try:
+        for batch_rows in results:
+            for index, row in batch_rows:
+                rows[index] = row
+                if on_result is not None:
+                    on_result(tasks[index], row)
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return rows
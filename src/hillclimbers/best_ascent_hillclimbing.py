@@ -0,0 +1,56 @@
+"""
+Best-Ascent Hillclimbing Algorithm (1-bit Hamming Distance)
+
+This algorithm attempts to solve a CNF SAT problem using local search.
+It implements the **Best-Ascent Hillclimbing** strategy:
+
+1. Starts from a random initial solution (0/1 assignments for each CNF variable).
+2. Scores the whole neighborhood at Hamming distance 1 (flipping one bit at a time) in one pass.
+3. Moves to the neighbor with the highest fitness (ties broken at random) if it improves
+   the fitness (number of satisfied clauses).
+4. Repeats until no improving neighbor exists (local optimum)
+   or the global optimum (all clauses satisfied) is reached.
+
+Key Points:
+- Fitness is the number of clauses satisfied by the current assignment.
+- Evaluations count the number of fitness computations performed, every step looks at all num_vars neighbours.
+- The neighbourhood fitness vector comes from the incremental scorer, so a step costs O(num_vars)
+  plus the clauses of the flipped variable.
+"""
+
+import random
+
+import numpy as np
+
+from utils import random_combination
+from src.incremental_scorer import IncrementalScorer
+
+def best_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, observer=None, termination=None):
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
+    current_solution = random_combination(num_vars) ## start with a random solution
+    scorer = IncrementalScorer(clauses, num_vars, current_solution) ## keeps make/break scores of the solution
+    fitness = scorer.fitness
+
+    evaluations = 1
+
+    while evaluations < max_evaluations and fitness < num_clauses:
+        if termination is not None and termination.should_stop(evaluations, fitness): ## time, target or patience
+            break
+        neighbourhood = scorer.neighbourhood_fitness() ## fitness of every neighbour at once
+        evaluations += num_vars
+
+        best_nb_fitness = neighbourhood.max()
+        if best_nb_fitness <= fitness: ## local optimum
+            break
+
+        best_indexes = np.flatnonzero(neighbourhood == best_nb_fitness)
+        fitness = scorer.flip(int(random.choice(best_indexes))) ## move to one of the best neighbours
+        if observer is not None:
+            observer.on_improvement(evaluations, fitness)
+
+    if observer is not None:
+        observer.on_finish(evaluations, fitness)
+    return current_solution, fitness, evaluations
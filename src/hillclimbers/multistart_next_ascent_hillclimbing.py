@@ -17,24 +17,34 @@ Key Points:
 
 import random
 
-from utils import random_combination, evaluate_fitness, generate_neighbours
+from utils import random_combination
+from src.incremental_scorer import IncrementalScorer
 
-def multistart_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations):
+def multistart_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, observer=None, termination=None):
     best_solution = None   # store the best found
     best_fitness = -1      # initialize to something smaller than possible
     evaluations = 0
+    scorer = IncrementalScorer(clauses, num_vars) ## occurrence lists are built once, reused by every restart
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
 
-    while evaluations < max_evaluations:
+    while evaluations < max_evaluations and not (termination is not None and termination.stopped):
+        if observer is not None and best_solution is not None:
+            observer.on_restart(evaluations, fitness)
         current_solution = random_combination(num_vars)
-        fitness = evaluate_fitness(clauses, current_solution)
+        fitness = scorer.reset(current_solution)
         evaluations += 1
 
         while True:
-            if evaluations >= max_evaluations:
+            if evaluations >= max_evaluations or (termination is not None and termination.stopped):
                 break
 
             if fitness == num_clauses:  # global optimum found
                 best_solution = (current_solution, fitness, evaluations)
+                if observer is not None:
+                    observer.on_finish(evaluations, fitness)
                 return best_solution, evaluations
 
             indexes = list(range(num_vars))  # indices of each bit
@@ -44,17 +54,18 @@ def multistart_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_eval
             for i in indexes:
                 if evaluations >= max_evaluations:
                     break
+                if termination is not None and termination.should_stop(evaluations, fitness): ## time, target or patience
+                    break
 
-                current_solution[i] = 1 - current_solution[i]  # flip bit directly
-                nb_fitness = evaluate_fitness(clauses, current_solution)
+                nb_fitness = fitness + scorer.delta(i)  # fitness of the flipped bit, without flipping
                 evaluations += 1
 
                 if nb_fitness > fitness:
-                    fitness = nb_fitness
+                    fitness = scorer.flip(i)  # commit the flip
+                    if observer is not None:
+                        observer.on_improvement(evaluations, fitness)
                     better_found = True
                     break
-                else:
-                    current_solution[i] = 1 - current_solution[i]  # undo flip
 
             if not better_found:
                 break  # local optimum
@@ -63,4 +74,6 @@ def multistart_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_eval
             best_solution = (current_solution, fitness, evaluations)
             best_fitness = fitness
 
+    if observer is not None:
+        observer.on_finish(evaluations, best_fitness)
     return best_solution, evaluations
\ No newline at end of file
@@ -16,49 +16,70 @@ Key Points:
 - Evaluations count the total number of fitness computations performed.
 - Stops early if the global optimum is found.
 - Combines multistart, variable neighborhood, and greedy hillclimbing to escape local optima.
+- k-flips are scored without flipping (IncrementalScorer.multi_delta), pruned=True restricts them to the
+  connected k-flips touching an unsatisfied clause (see utils.candidate_flips).
 """
 
 import itertools
 
-from utils import random_combination, evaluate_fitness, generate_neighbours
+from utils import random_combination, candidate_flips
+from src.incremental_scorer import IncrementalScorer
 
-def multistart_variable_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, max_k):
+def multistart_variable_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, max_k, observer=None, termination=None, pruned=False):
     evaluations = 0
 
     best_fitness = -1
     best_solution = None
-
-    while evaluations < max_evaluations:
+    scorer = IncrementalScorer(clauses, num_vars) ## occurrence lists are built once, reused by every restart
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
+
+    while evaluations < max_evaluations and not (termination is not None and termination.stopped):
+        if observer is not None and best_solution is not None:
+            observer.on_restart(evaluations, fitness)
         current_solution = random_combination(num_vars) ## start with a random solution
-        fitness = evaluate_fitness(clauses, current_solution) ## discover current solution fitness
+        fitness = scorer.reset(current_solution) ## discover current solution fitness
         evaluations += 1
 
         k = 1
+        if observer is not None:
+            observer.on_k_change(evaluations, k)
 
-        while k <= max_k and evaluations < max_evaluations:
+        while k <= max_k and evaluations < max_evaluations and not (termination is not None and termination.stopped):
             better_found = False
             indexes = list(range(num_vars))
+            if pruned: ## only connected k-flips touching an unsatisfied clause, in index order
+                neighbours = candidate_flips(scorer, k)
+            else:
+                neighbours = itertools.combinations(indexes, k) # generate neighbours at Hamming distance k ##
 
-            for bits_to_flip in itertools.combinations(indexes, k): # generate neighbours at Hamming distance k ##
+            for bits_to_flip in neighbours:
                 if evaluations >= max_evaluations: # early stop
                     break
+                if termination is not None and termination.should_stop(evaluations, fitness): ## time, target or patience
+                    break
 
-                neighbour = current_solution.copy() ## to avoid modifying current solution
-                for index in bits_to_flip: ## index is the value in the bits_to_flip
-                    neighbour[index] = 1 - neighbour[index] ## flip the bit
-
-                nb_fitness = evaluate_fitness(clauses, neighbour)
+                nb_fitness = fitness + scorer.multi_delta(bits_to_flip) ## scored from the counters, nothing is flipped
                 evaluations += 1
 
                 if nb_fitness > fitness:
+                    for index in bits_to_flip: ## commit the move
+                        scorer.flip(index)
                     fitness = nb_fitness
-                    current_solution = neighbour
                     better_found = True
+                    if observer is not None:
+                        observer.on_improvement(evaluations, fitness)
+                        if k != 1:
+                            observer.on_k_change(evaluations, 1)
                     k = 1
                     break
 
             if not better_found:
                 k += 1
+                if observer is not None and k <= max_k:
+                    observer.on_k_change(evaluations, k)
 
         if fitness > best_fitness:
             best_fitness = fitness
@@ -67,6 +88,10 @@ def multistart_variable_next_ascent_hillclimbing(clauses, num_clauses, num_vars,
         if fitness == num_clauses:
             best_solution = current_solution
             best_fitness = fitness
+            if observer is not None:
+                observer.on_finish(evaluations, best_fitness)
             return best_solution, best_fitness, evaluations
 
+    if observer is not None:
+        observer.on_finish(evaluations, best_fitness)
     return best_solution, best_fitness, evaluations
\ No newline at end of file
@@ -17,36 +17,46 @@ Key Points:
 - Neighbors are visited in random order to introduce stochasticity.
 """
 
+import numpy as np
+
 from multistart_next_ascent_hillclimbing import *
 from multistart_variable_neighbourhood_ascent import *
+from src.incremental_scorer import IncrementalScorer
 
-def next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations):
+def next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, observer=None, termination=None):
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
     initial_solution = random_combination(num_vars) ## start with a random solution
-    fitness = evaluate_fitness(clauses, initial_solution) ## discover initial solution fitness
+    scorer = IncrementalScorer(clauses, num_vars, initial_solution) ## keeps make/break scores of the solution
+    fitness = scorer.fitness ## discover initial solution fitness
 
-    tmp_solution = initial_solution
+    tmp_solution = initial_solution ## the scorer flips this list in place
 
     evaluations = 1
 
     while evaluations <= max_evaluations:
         if fitness == num_clauses: ## if the solution is a global optimum, break and return the solution
             break
+        if termination is not None and termination.should_stop(evaluations, fitness): ## time, target or patience
+            break
 
-        neighbours = generate_neighbours(tmp_solution) # generate the neighbourhood by flipping one bit in each solution
-        random.shuffle(neighbours) # since its next ascent, randomize search space
-        better_found = False # trigger to find local optimum
-
-        for neighbour in neighbours: # for each neighbour
-            nb_fitness = evaluate_fitness(clauses, neighbour) # discover its fitness (how many clauses are satisfied)
-            evaluations += 1 # for each neighbour accessed, evaluation goes up
-
-            if nb_fitness > fitness: ## if neighbour fitness is better than the current solution, switch to the neighbour
-                fitness = nb_fitness
-                tmp_solution = neighbour
-                better_found = True
-                break
+        indexes = list(range(num_vars)) # one neighbour per flipped bit
+        random.shuffle(indexes) # since its next ascent, randomize search space
+        neighbourhood = scorer.neighbourhood_fitness()[indexes] # fitness of every neighbour, in visiting order
+        improving = np.flatnonzero(neighbourhood > fitness) # neighbours better than the current solution
 
-        if not better_found:
+        if len(improving) == 0: # local optimum, every neighbour was evaluated
+            evaluations += num_vars
             break
 
-    return tmp_solution, fitness, evaluations
\ No newline at end of file
+        first = int(improving[0]) # the first improving neighbour in random order
+        evaluations += first + 1 # neighbours accessed up to and including it
+        fitness = scorer.flip(indexes[first])
+        if observer is not None:
+            observer.on_improvement(evaluations, fitness)
+
+    if observer is not None:
+        observer.on_finish(evaluations, fitness)
+    return tmp_solution, fitness, evaluations
@@ -1,14 +1,20 @@
+import functools
 import os
-import random
-import numpy as np
-import pandas as pd
-
-import utils
-from src import utils
+import sys
+
+from src.experiment_runner import expand_grid, run_tasks
+from src.results_store import ResultsStore
+from src.results_catalog import ResultsCatalog
+from src.observers import MetricsObserver, ObserverGroup
+from src.convergence_trace import TraceObserver, trace_path
+from src.termination import split_termination_params
+from src.racing import race
+from src.tuning import run_tuning
 from multistart_next_ascent_hillclimbing import multistart_next_ascent_hillclimbing
 from multistart_variable_neighbourhood_ascent import multistart_variable_next_ascent_hillclimbing
 from variable_neighbourhood_ascent import variable_neighbourhood_hillclimbing
 from next_ascent_hillclimbing import next_ascent_hillclimbing
+from walksat import walksat, probsat, NOISE, CB
 
 CNF_FILES = {
     "1": "../../cnf_files/uf20-01.cnf",
@@ -18,158 +24,185 @@ CNF_FILES = {
 
 INDEPENDENT_RUNS = 30
 RESULTS_FILE = "../results/hillclimbing_results.xlsx"
+RESULTS_STORE = "../results/hillclimbing_results.jsonl"  ## every finished run is appended here, the xlsx is exported from it
+CATALOG_FILE = "../results/catalog.sqlite"  ## SQLite catalog shared by every campaign
+CAMPAIGN = "hillclimbing"
+TRACES_DIR = "../results/traces/hillclimbing"  ## one best-so-far convergence trace per run, None disables them
 
 MAX_EVALUATIONS = 1_000_000
 MAX_K_VNH = 3  # k máximo para as versões de variable neighbourhood
 
+## extra stopping criteria of every run (see termination.py), e.g. {"max_wall_time": 60} for an equal-time budget
+TERMINATION = {}
+
+WORKERS = os.cpu_count()  ## worker processes, results don't depend on this value
+
+## statistical racing of the ALGORITHMS entries (see racing.py): None runs all INDEPENDENT_RUNS seeds of every entry,
+## e.g. {"first_round": 5, "round_size": 1, "alpha": 0.05, "reinvest": False} drops the significantly dominated ones
+RACING = None
+
+## hyperparameter tuning of one ALGORITHMS entry with Hyperband (see tuning.py), run `python run_experiments.py tune`;
+## every tuning run is cached in "cache", so an interrupted or repeated tuning only runs what is missing
+TUNING = {
+    "algorithm": "VNH",
+    "space": {
+        "max_k": [1, 2, 3, 4],
+        "pruned": [False, True],
+    },
+    "seeds": range(5),
+    "min_budget": MAX_EVALUATIONS // 81,
+    "max_budget": MAX_EVALUATIONS,
+    "cache": "../results/tuning/hillclimbing.jsonl",
+    "history": "../results/tuning/hillclimbing_history.xlsx",
+}
 
-def main():
-    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
-
-    results = []
-
-    for instance_id, cnf_path in CNF_FILES.items():
-        print(f"\nLoaded {cnf_path}")
-        clauses, num_clauses, num_vars = utils.read_cnf(cnf_path)
-        num_clauses = len(clauses)
-
-        ## Next-Ascent Hillclimbing (NAHC)
-        for run in range(INDEPENDENT_RUNS):
-            seed = run
-            random.seed(seed)
-            np.random.seed(seed)
-
-            print(f"[NAHC] File {instance_id}, run {run}, seed {seed}")
-
-            solution, best_fitness, evaluations_used = next_ascent_hillclimbing(
-                clauses=clauses,
-                num_clauses=num_clauses,
-                num_vars=num_vars,
-                max_evaluations=MAX_EVALUATIONS,
-            )
-
-            results.append(
-                {
-                    "algorithm": "NAHC",
-                    "instance_id": instance_id,
-                    "cnf_file": cnf_path,
-                    "run": run,
-                    "seed": seed,
-                    "num_vars": num_vars,
-                    "num_clauses": num_clauses,
-                    "max_evaluations": MAX_EVALUATIONS,
-                    "evaluations_used": evaluations_used,
-                    "best_fitness_satisfied": best_fitness,
-                }
-            )
-
-        ## Multistart NAHC (MS-NAHC)
-        for run in range(INDEPENDENT_RUNS):
-            seed = run
-            random.seed(seed)
-            np.random.seed(seed)
-
-            print(f"[MS-NAHC] File {instance_id}, run {run}, seed {seed}")
-
-            # multistart_next_ascent_hillclimbing devolve:
-            # best_solution = (current_solution, fitness, eval_at_best), evaluations
-            best_solution, evaluations_used = multistart_next_ascent_hillclimbing(
-                clauses=clauses,
-                num_clauses=num_clauses,
-                num_vars=num_vars,
-                max_evaluations=MAX_EVALUATIONS,
-            )
-
-            if best_solution is None:
-                # fallback defensivo, mas na prática não deve acontecer
-                best_fitness = -1
-            else:
-                _, best_fitness, _ = best_solution
-
-            results.append(
-                {
-                    "algorithm": "MS_NAHC",
-                    "instance_id": instance_id,
-                    "cnf_file": cnf_path,
-                    "run": run,
-                    "seed": seed,
-                    "num_vars": num_vars,
-                    "num_clauses": num_clauses,
-                    "max_evaluations": MAX_EVALUATIONS,
-                    "evaluations_used": evaluations_used,
-                    "best_fitness_satisfied": best_fitness,
-                }
-            )
 
-        ## Variable Neighbourhood Hillclimbing (VNH, k=1..3)
-        for run in range(INDEPENDENT_RUNS):
-            seed = run
-            random.seed(seed)
-            np.random.seed(seed)
+ALGORITHMS = {
+    "NAHC": {"max_evaluations": MAX_EVALUATIONS, **TERMINATION},
+    "MS_NAHC": {"max_evaluations": MAX_EVALUATIONS, **TERMINATION},
+    "VNH": {"max_evaluations": MAX_EVALUATIONS, "max_k": MAX_K_VNH, **TERMINATION},
+    "MS_VNH": {"max_evaluations": MAX_EVALUATIONS, "max_k": MAX_K_VNH, **TERMINATION},
+    "VNH_pruned": {"max_evaluations": MAX_EVALUATIONS, "max_k": MAX_K_VNH, "pruned": True, **TERMINATION},
+    "MS_VNH_pruned": {"max_evaluations": MAX_EVALUATIONS, "max_k": MAX_K_VNH, "pruned": True, **TERMINATION},
+    "WalkSAT": {"max_evaluations": MAX_EVALUATIONS, "noise": NOISE, **TERMINATION},
+    "probSAT": {"max_evaluations": MAX_EVALUATIONS, "cb": CB, **TERMINATION},
+}
 
-            print(f"[VNH] File {instance_id}, run {run}, seed {seed}")
 
-            solution, best_fitness, evaluations_used = variable_neighbourhood_hillclimbing(
+_DEFAULT = object() ## traces_dir not given: TRACES_DIR as it is when the task runs, not when the module was imported
+
+
+def run_task(task, clauses, num_clauses, num_vars, traces_dir=_DEFAULT):
+    if traces_dir is _DEFAULT:
+        traces_dir = TRACES_DIR
+    max_evaluations = task.params["max_evaluations"]
+    _, termination = split_termination_params(task.params) ## None unless TERMINATION sets a criterion
+    metrics = MetricsObserver() ## restarts, time per k, evaluations per second... become extra columns
+    trace = TraceObserver() if traces_dir is not None else None
+    observer = ObserverGroup(metrics, trace) if trace is not None else metrics
+
+    if task.algorithm == "NAHC": ## Next-Ascent Hillclimbing (NAHC)
+        solution, best_fitness, evaluations_used = next_ascent_hillclimbing(
+            clauses=clauses,
+            num_clauses=num_clauses,
+            num_vars=num_vars,
+            max_evaluations=max_evaluations,
+            observer=observer,
+            termination=termination,
+        )
+
+    elif task.algorithm == "MS_NAHC": ## Multistart NAHC (MS-NAHC)
+        # multistart_next_ascent_hillclimbing devolve:
+        # best_solution = (current_solution, fitness, eval_at_best), evaluations
+        best_solution, evaluations_used = multistart_next_ascent_hillclimbing(
+            clauses=clauses,
+            num_clauses=num_clauses,
+            num_vars=num_vars,
+            max_evaluations=max_evaluations,
+            observer=observer,
+            termination=termination,
+        )
+
+        if best_solution is None:
+            # fallback defensivo, mas na prática não deve acontecer
+            best_fitness = -1
+        else:
+            _, best_fitness, _ = best_solution
+
+    elif task.algorithm in ("VNH", "VNH_pruned"): ## Variable Neighbourhood Hillclimbing (VNH, k=1..max_k)
+        solution, best_fitness, evaluations_used = variable_neighbourhood_hillclimbing(
+            clauses=clauses,
+            num_clauses=num_clauses,
+            num_vars=num_vars,
+            max_evaluations=max_evaluations,
+            max_k=task.params["max_k"],
+            observer=observer,
+            termination=termination,
+            pruned=task.params.get("pruned", False),
+        )
+
+    elif task.algorithm == "WalkSAT": ## focused random walk, one unsatisfied clause per step
+        solution, best_fitness, evaluations_used = walksat(
+            clauses=clauses,
+            num_clauses=num_clauses,
+            num_vars=num_vars,
+            max_evaluations=max_evaluations,
+            noise=task.params["noise"],
+            observer=observer,
+            termination=termination,
+        )
+
+    elif task.algorithm == "probSAT": ## focused random walk, break-probability selection
+        solution, best_fitness, evaluations_used = probsat(
+            clauses=clauses,
+            num_clauses=num_clauses,
+            num_vars=num_vars,
+            max_evaluations=max_evaluations,
+            cb=task.params["cb"],
+            observer=observer,
+            termination=termination,
+        )
+
+    else: ## Multistart Variable Neighbourhood Hillclimbing (MS-VNH, MS_VNH_pruned)
+        best_solution, best_fitness, evaluations_used = (
+            multistart_variable_next_ascent_hillclimbing(
                 clauses=clauses,
                 num_clauses=num_clauses,
                 num_vars=num_vars,
-                max_evaluations=MAX_EVALUATIONS,
-            )
-
-            results.append(
-                {
-                    "algorithm": "VNH",
-                    "instance_id": instance_id,
-                    "cnf_file": cnf_path,
-                    "run": run,
-                    "seed": seed,
-                    "num_vars": num_vars,
-                    "num_clauses": num_clauses,
-                    "max_evaluations": MAX_EVALUATIONS,
-                    "evaluations_used": evaluations_used,
-                    "best_fitness_satisfied": best_fitness,
-                    "max_k": MAX_K_VNH,
-                }
+                max_evaluations=max_evaluations,
+                max_k=task.params["max_k"],
+                observer=observer,
+                termination=termination,
+                pruned=task.params.get("pruned", False),
             )
+        )
+
+    row = {
+        "max_evaluations": max_evaluations,
+        "evaluations_used": evaluations_used,
+        "best_fitness_satisfied": best_fitness,
+    }
+    if "max_k" in task.params:
+        row["max_k"] = task.params["max_k"]
+    row.update(metrics.metrics())
+    if termination is not None:
+        row["stop_reason"] = termination.reason
+    if trace is not None:
+        row["trace_file"] = trace.save(trace_path(traces_dir, task))
+    return row
 
-        ## Multistart Variable Neighbourhood Hillclimbing (MS-VNH)
-        for run in range(INDEPENDENT_RUNS):
-            seed = run
-            random.seed(seed)
-            np.random.seed(seed)
-
-            print(f"[MS-VNH] File {instance_id}, run {run}, seed {seed}")
-
-            best_solution, best_fitness, evaluations_used = (
-                multistart_variable_next_ascent_hillclimbing(
-                    clauses=clauses,
-                    num_clauses=num_clauses,
-                    num_vars=num_vars,
-                    max_evaluations=MAX_EVALUATIONS,
-                    max_k=MAX_K_VNH,
-                )
-            )
 
-            results.append(
-                {
-                    "algorithm": "MS_VNH",
-                    "instance_id": instance_id,
-                    "cnf_file": cnf_path,
-                    "run": run,
-                    "seed": seed,
-                    "num_vars": num_vars,
-                    "num_clauses": num_clauses,
-                    "max_evaluations": MAX_EVALUATIONS,
-                    "evaluations_used": evaluations_used,
-                    "best_fitness_satisfied": best_fitness,
-                    "max_k": MAX_K_VNH,
-                }
-            )
+def main():
+    os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
 
-    df = pd.DataFrame(results)
-    df.to_excel(RESULTS_FILE, index=False)
+    store = ResultsStore(RESULTS_STORE)
+    catalog = ResultsCatalog(CATALOG_FILE)
+    campaign_id = catalog.campaign(CAMPAIGN, family="hillclimbers")
+    tasks = expand_grid(ALGORITHMS, CNF_FILES, INDEPENDENT_RUNS)
+    pending = store.pending(tasks) ## resume: skip runs already in the store
+    execute_task = functools.partial(run_task, traces_dir=TRACES_DIR) ## passed explicitly, so it also reaches spawned workers
+    print(f"{len(tasks) - len(pending)} of {len(tasks)} runs already done")
+
+    def report(task, row):
+        store.append(task, row)
+        catalog.record_run(campaign_id, task, row)
+        print(f"[{task.algorithm}] File {task.instance_id}, run {task.run}, seed {task.seed}")
+
+    if RACING is None:
+        run_tasks(pending, execute_task, workers=WORKERS, on_result=report)
+    else:
+        race(tasks, lambda tasks_to_run: run_tasks(tasks_to_run, execute_task, workers=WORKERS, on_result=report),
+             completed_rows=store.rows(), **RACING,
+             on_eliminate=lambda instance_id, algorithm, runs: print(f"File {instance_id}: {algorithm} dropped after {runs} runs"))
+
+    store.export_excel(RESULTS_FILE, tasks, include_all=RACING is not None and RACING.get("reinvest", False)) ## reinvested seeds are not in tasks
+    catalog.close()
     print(f"\nSaved results to {RESULTS_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["tune"]:
+        ## no convergence traces for the tuning runs (an argument, so it also reaches spawned workers)
+        run_tuning(functools.partial(run_task, traces_dir=None), ALGORITHMS, CNF_FILES, TUNING, workers=WORKERS)
+    else:
+        main()
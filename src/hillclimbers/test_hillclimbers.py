@@ -7,6 +7,8 @@ from multistart_next_ascent_hillclimbing import multistart_next_ascent_hillclimb
 from multistart_variable_neighbourhood_ascent import multistart_variable_next_ascent_hillclimbing
 from variable_neighbourhood_ascent import variable_neighbourhood_hillclimbing
 from next_ascent_hillclimbing import next_ascent_hillclimbing
+from best_ascent_hillclimbing import best_ascent_hillclimbing
+from walksat import walksat, probsat
 
 CNF_FILES = {
     "1": "../../cnf_files/uf20-01.cnf",
@@ -30,6 +32,16 @@ def run_algorithm(choice, num_runs, clauses, num_clauses, num_vars):
             solution, fitness, evaluations  = variable_neighbourhood_hillclimbing(clauses, num_clauses, num_vars, max_evaluations)
         elif choice == "4":
             solution, fitness, evaluations = multistart_variable_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, max_k)
+        elif choice == "5":
+            solution, fitness, evaluations = best_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations)
+        elif choice == "6":
+            solution, fitness, evaluations = variable_neighbourhood_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, pruned=True)
+        elif choice == "7":
+            solution, fitness, evaluations = multistart_variable_next_ascent_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, max_k, pruned=True)
+        elif choice == "8":
+            solution, fitness, evaluations = walksat(clauses, num_clauses, num_vars, max_evaluations)
+        elif choice == "9":
+            solution, fitness, evaluations = probsat(clauses, num_clauses, num_vars, max_evaluations)
         else:
             print("Invalid choice.")
             sys.exit(1)
@@ -53,7 +65,7 @@ def main():
             continue
 
         cnf_path = CNF_FILES[cnf_choice]
-        clauses, num_clauses, num_vars = utils.read_cnf(cnf_path)
+        clauses, num_clauses, num_vars = utils.read_cnf(cnf_path, as_instance=True, cache=True) ## memory-mapped after the first load
         print(f"\nLoaded: {cnf_path} — vars={num_vars}, clauses={num_clauses}")
 
         print("\nSelect Algorithm:")
@@ -61,8 +73,13 @@ def main():
         print("2 - Multistart Next Ascent Hillclimbing")
         print("3 - Variable Neighbourhood Hillclimbing")
         print("4 - Multistart Variable Neighbourhood Hillclimbing")
-        algo_choice = input("Enter choice (1-4): ").strip()
-        if algo_choice not in ["1", "2", "3", "4"]:
+        print("5 - Best Ascent Hillclimbing")
+        print("6 - Pruned Variable Neighbourhood Hillclimbing")
+        print("7 - Pruned Multistart Variable Neighbourhood Hillclimbing")
+        print("8 - WalkSAT")
+        print("9 - probSAT")
+        algo_choice = input("Enter choice (1-9): ").strip()
+        if algo_choice not in ["1", "2", "3", "4", "5", "6", "7", "8", "9"]:
             print("Invalid algorithm choice.")
             continue
 
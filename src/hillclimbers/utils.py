@@ -1,34 +1,37 @@
 import random
 
+from src.bitsliced import pack_flips
+from src.clause_matrix import compile_clauses, count_satisfied, neighbour_fitnesses
+
 ## function to find all combinations of true/false assignments for variables
 def random_combination(num_vars):
     return [random.choice([0, 1]) for _ in range(num_vars)]
 
 # Function to find the fitness being the fitness the number of clauses satisfied by the combination
 def evaluate_fitness(clauses, combination):
-    fitness = 0
-
-    for clause in clauses:
+    matrix = compile_clauses(clauses, len(combination)) ## no-op when clauses is already a ClauseMatrix
+    return count_satisfied(matrix, combination)
 
-        clause_fitness = 0
-        for value in clause:
-            var_index = abs(value) - 1 ## normalise for clause list
-            bool_value = combination[var_index]
-            if value < 0: ## if literal value is below 0, the variable is negated
-                bool_value = not bool_value
-            if bool_value: ## if bool is true
-                clause_fitness = 1
-                break
-        fitness += clause_fitness
-    return fitness
+## fitness of every neighbour obtained by flipping a bit on each value of the combination, as one array
+## (entry i is the fitness with bit i flipped), computed in one pass without building the neighbours
+def evaluate_neighbourhood(clauses, combination):
+    matrix = compile_clauses(clauses, len(combination)) ## no-op when clauses is already a ClauseMatrix
+    return neighbour_fitnesses(matrix, combination)
 
-## generates the neighbour of the current solution by flipping a bit on each value of the combination
-def generate_neighbours(combination):
-    neighbours = []
-    for var_index in range (len(combination)): ## indexar cada true e false
-        tmp_combination = list(combination) ## tran
-        bool_value = (combination[var_index] + 1) % 2
-        tmp_combination[var_index] = bool_value
-        neighbours.append(tmp_combination)
+## fitness of the combination with each tuple of variables in flips flipped, as one array, scored 64 candidates per
+## machine word by the bit-sliced kernel (e.g. a whole k-flip neighbourhood from candidate_flips)
+def evaluate_flips(clauses, combination, flips):
+    matrix = compile_clauses(clauses, len(combination)) ## no-op when clauses is already a ClauseMatrix
+    return matrix.bitsliced().count_satisfied(pack_flips(combination, flips), len(flips))
 
-    return neighbours
\ No newline at end of file
+## k-flips worth scoring when the scorer's assignment has no improving (k-1)-flip: sets of k variables that are
+## connected through shared clauses and contain a variable of an unsatisfied clause (make > 0), as sorted tuples.
+## A k-flip without such a variable can't satisfy a new clause, and one that splits into groups sharing no clause
+## has the summed delta of its groups, so one group would already improve at a smaller k.
+def candidate_flips(scorer, k):
+    flips = {(var_index,) for var_index in range(scorer.num_vars) if scorer.make[var_index] > 0}
+    neighbours = scorer.neighbours()
+    for _ in range(k - 1): ## grow each set by one neighbour of its members
+        flips = {tuple(sorted(flip + (other,))) for flip in flips for var_index in flip
+                 for other in neighbours[var_index] if other not in flip}
+    return sorted(flips)
@@ -6,7 +6,7 @@ with **variable neighbourhoods**:
 
 1. Starts from a random initial solution (0/1 assignments for each CNF variable).
 2. Explores the neighborhood of the current solution by flipping `k` bits simultaneously,
-   where k starts at 1 and can increase up to a maximum (here k=3).
+   where k starts at 1 and can increase up to a maximum (max_k, 3 by default).
 3. If an improving neighbor is found, moves immediately to it and resets k to 1.
 4. If no improvement is found, increases k to explore a wider neighborhood.
 5. Stops when a global optimum is found (all clauses satisfied) or all neighborhoods
@@ -16,51 +16,77 @@ Key Points:
 - Fitness is the number of satisfied clauses in the CNF formula.
 - Evaluations count the number of fitness computations performed.
 - Uses combinatorial generation of neighbors at Hamming distance k.
+- Each k-flip is scored from the scorer's make/break counters (single-flip deltas corrected on shared clauses),
+  the assignment is only flipped when the move is taken.
+- pruned=True only scores k-flips that touch an unsatisfied clause and whose variables are linked by shared
+  clauses (see utils.candidate_flips), which is where every improving move at the current k lives.
 - Combines a greedy hillclimbing approach with a variable neighborhood strategy
   to escape small local optima.
 """
 
 import itertools
 
-from utils import random_combination, evaluate_fitness
+from utils import random_combination, candidate_flips
+from src.incremental_scorer import IncrementalScorer
 
 # implements variable next ascent hillclimbing using 1 bit hamming distance neighbourhood
 # next ascent visits neighbourhood randomly and moves to the first neighbour that improves fitness
-# enlargers neighbourhood up to k = 3 bits
-def variable_neighbourhood_hillclimbing(clauses, num_clauses, num_vars, max_evaluations):
+# enlargers neighbourhood up to k = max_k bits
+def variable_neighbourhood_hillclimbing(clauses, num_clauses, num_vars, max_evaluations, max_k=3, observer=None, termination=None, pruned=False):
 
     initial_solution = random_combination(num_vars) ## start with a random solution
-    fitness = evaluate_fitness(clauses, initial_solution) ## discover current solution fitness
+    scorer = IncrementalScorer(clauses, num_vars, initial_solution) ## keeps make/break scores of the solution
+    fitness = scorer.fitness ## discover current solution fitness
 
     current_solution = initial_solution
 
     evaluations = 1
 
     k = 1
-
-    while k <= 3 and evaluations < max_evaluations and fitness < num_clauses:
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+        observer.on_k_change(evaluations, k)
+    if termination is not None:
+        termination.start()
+
+    while k <= max_k and evaluations < max_evaluations and fitness < num_clauses:
+        if termination is not None and termination.stopped:
+            break
         if fitness == num_clauses: ## if the solution is a global optimum, break and return the solution
             break
 
         better_found = False
         indexes = list(range(num_vars)) ## gives the list of indexes
+        if pruned: ## only connected k-flips touching an unsatisfied clause, in index order
+            neighbours = candidate_flips(scorer, k)
+        else:
+            neighbours = itertools.combinations(indexes, k) # generate neighbours at hamming distance k
 
-        for bits_to_flip in itertools.combinations(indexes, k): # generate neighbours at hamming distance k
-            neighbour = current_solution.copy() ## to avoid modifying current solution
-            for index in bits_to_flip: ## index is the value in the bits_to_flip
-                neighbour[index] = 1 - neighbour[index] ## flip the bit
-
-            nb_fitness = evaluate_fitness(clauses, neighbour)
+        for bits_to_flip in neighbours:
+            if evaluations >= max_evaluations: # early stop, a k >= 3 neighbourhood can outgrow the whole budget
+                break
+            if termination is not None and termination.should_stop(evaluations, fitness): ## time, target or patience
+                break
+            nb_fitness = fitness + scorer.multi_delta(bits_to_flip) ## scored from the counters, nothing is flipped
             evaluations += 1
 
             if nb_fitness > fitness:
+                for index in bits_to_flip: ## commit the move
+                    scorer.flip(index)
                 fitness = nb_fitness
                 better_found = True
-                current_solution = neighbour
+                if observer is not None:
+                    observer.on_improvement(evaluations, fitness)
+                    if k != 1:
+                        observer.on_k_change(evaluations, 1)
                 k = 1
                 break
 
         if not better_found:
             k += 1
+            if observer is not None and k <= max_k:
+                observer.on_k_change(evaluations, k)
 
+    if observer is not None:
+        observer.on_finish(evaluations, fitness)
     return current_solution, fitness, evaluations
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+Focused local search: WalkSAT (SKC) and probSAT
+
+Instead of scanning the whole neighbourhood, each step only looks at one unsatisfied clause:
+
+1. Starts from a random initial solution (0/1 assignments for each CNF variable).
+2. Picks an unsatisfied clause uniformly at random (the scorer keeps them in a list updated in O(1)).
+3. Flips one of its variables, so the clause becomes satisfied, chosen from the break counts
+   (number of satisfied clauses the flip would unsatisfy):
+   - walksat:  a variable with break 0 if there is one ("freebie"), otherwise with probability `noise` a random
+               variable of the clause and else one with the lowest break (ties broken at random)
+   - probsat:  variable v with probability proportional to (eps + break(v)) ** -cb
+4. Repeats until every clause is satisfied or max_evaluations is reached, remembering the best solution seen.
+
+Key Points:
+- Fitness is the number of clauses satisfied by the current assignment, the walk is allowed to get worse.
+- Evaluations count one per flip (plus the initial solution), each flip is scored from the make/break counters.
+- Returns (best_solution, best_fitness, evaluations) like next_ascent_hillclimbing.
+"""
+
+import random
+
+from utils import random_combination
+from src.incremental_scorer import IncrementalScorer
+
+NOISE = 0.567 ## WalkSAT noise, good value for uniform random 3-SAT at the phase transition
+CB = 2.06     ## probSAT break exponent for 3-SAT
+EPS = 0.9     ## probSAT offset, keeps break 0 variables finite
+
+def walksat(clauses, num_clauses, num_vars, max_evaluations, noise=NOISE, observer=None, termination=None):
+    def pick(variables, break_count):
+        breaks = [break_count[index] for index in variables]
+        least = min(breaks)
+        if least > 0 and random.random() < noise: ## random walk move
+            return random.choice(variables)
+        return random.choice([index for index, value in zip(variables, breaks) if value == least]) ## greedy move
+
+    return focused_search(clauses, num_clauses, num_vars, max_evaluations, pick, observer, termination)
+
+def probsat(clauses, num_clauses, num_vars, max_evaluations, cb=CB, eps=EPS, observer=None, termination=None):
+    weights = {} ## break value -> (eps + break) ** -cb, breaks are small integers
+
+    def pick(variables, break_count):
+        scores = []
+        for index in variables:
+            value = break_count[index]
+            if value not in weights:
+                weights[value] = (eps + value) ** -cb
+            scores.append(weights[value])
+        return random.choices(variables, weights=scores)[0]
+
+    return focused_search(clauses, num_clauses, num_vars, max_evaluations, pick, observer, termination)
+
+def focused_search(clauses, num_clauses, num_vars, max_evaluations, pick, observer=None, termination=None):
+    """
+    Shared loop of walksat and probsat.
+    :param pick: function(variables of an unsatisfied clause, break counts) -> variable to flip
+    """
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
+
+    current_solution = random_combination(num_vars) ## start with a random solution
+    scorer = IncrementalScorer(clauses, num_vars, current_solution, track_unsatisfied=True) ## the scorer flips this list in place
+    fitness = scorer.fitness
+    best_fitness = fitness
+    best_solution = list(current_solution)
+
+    evaluations = 1
+
+    while evaluations < max_evaluations and best_fitness < num_clauses:
+        if termination is not None and termination.should_stop(evaluations, best_fitness): ## time, target or patience
+            break
+
+        clause_index = random.choice(scorer.unsatisfied) ## focus: only variables of a broken clause are candidates
+        fitness = scorer.flip(pick(scorer.clause_vars[clause_index], scorer.break_count))
+        evaluations += 1
+
+        if fitness > best_fitness:
+            best_fitness = fitness
+            best_solution = list(current_solution)
+            if observer is not None:
+                observer.on_improvement(evaluations, best_fitness)
+
+    if observer is not None:
+        observer.on_finish(evaluations, best_fitness)
+    return best_solution, best_fitness, evaluations
@@ -0,0 +1,269 @@
+"""
+Incremental make/break scoring for CNF SAT local search.
+
+Instead of rescanning every clause after each flip (evaluate_fitness), the scorer keeps:
+- true_count[c]: how many literals of clause c are true under the current assignment
+- true_sum[c]:    sum of the variables whose literal is true in clause c
+                  (when true_count[c] == 1 this is the single "critical" variable; repeated literals are merged
+                  and tautological clauses are left out of the counters, so every variable occurs once per clause)
+- make[v]:        number of unsatisfied clauses that flipping v would satisfy
+- break_count[v]: number of satisfied clauses that flipping v would unsatisfy
+
+The fitness delta of flipping v is make[v] - break_count[v], and committing a flip only
+touches the clauses where v occurs, so a move costs O(occurrences of v) instead of O(clauses).
+
+The delta of flipping several variables together (multi_delta) is the sum of their single-flip deltas
+corrected on the clauses that contain two or more of them, so k-flip neighbours are scored without flipping.
+
+With track_unsatisfied=True the scorer also keeps the list of unsatisfied clauses (`unsatisfied`, plus the
+position of each clause in it), updated in O(1) when a flip changes a clause's status, for focused searches
+such as WalkSAT that pick an unsatisfied clause every step.
+"""
+
+import numpy as np
+
+from src.instance import Instance
+
+
+class IncrementalScorer:
+    def __init__(self, clauses, num_vars, combination=None, track_unsatisfied=False):
+        """
+        :param clauses: list of clauses, each clause a list of DIMACS literals (e.g. [8, -12, 19]), or an Instance
+        :param num_vars: number of variables in the instance (int value)
+        :param combination: optional initial assignment (list of 0's and 1's)
+        :param track_unsatisfied: keep the list of unsatisfied clauses up to date (see module docstring)
+        """
+        self.track_unsatisfied = track_unsatisfied
+        self.unsatisfied = []
+        self.unsatisfied_position = None ## clause -> index in unsatisfied (-1 when satisfied)
+        self.num_vars = num_vars
+        self.num_clauses = len(clauses)
+
+        if isinstance(clauses, Instance): ## occurrence index already built, only convert it to lists
+            variables = (np.abs(clauses.literals) - 1).tolist()
+            signs = (clauses.literals > 0).tolist()
+            offsets = clauses.clause_offsets.tolist()
+            self.clause_vars = [variables[offsets[c]:offsets[c + 1]] for c in range(self.num_clauses)]
+            self.clause_signs = [signs[offsets[c]:offsets[c + 1]] for c in range(self.num_clauses)]
+        else:
+            self.clause_vars = [[abs(value) - 1 for value in clause] for clause in clauses] ## 0-based variable per literal
+            self.clause_signs = [[value > 0 for value in clause] for clause in clauses] ## True for x, False for -x
+
+        ## a clause repeating a variable (x | x, x | -x) would break the true_count / true_sum bookkeeping:
+        ## repeated literals are merged and tautologies are always satisfied, outside of every make/break count
+        self.tautological = [False] * self.num_clauses
+        repeated = [c for c, variables in enumerate(self.clause_vars) if len(set(variables)) != len(variables)]
+        for c in repeated:
+            self.clause_vars[c], self.clause_signs[c], self.tautological[c] = _merge_literals(self.clause_vars[c], self.clause_signs[c])
+
+        if isinstance(clauses, Instance) and not repeated:
+            self.positive_occurrences = _split(clauses.positive_clauses, clauses.positive_offsets)
+            self.negative_occurrences = _split(clauses.negative_clauses, clauses.negative_offsets)
+        else:
+            self.positive_occurrences = [[] for _ in range(num_vars)] ## clauses where the variable appears as x
+            self.negative_occurrences = [[] for _ in range(num_vars)] ## clauses where the variable appears as -x
+            for clause_index, (variables, signs) in enumerate(zip(self.clause_vars, self.clause_signs)):
+                for var_index, positive in zip(variables, signs):
+                    if positive:
+                        self.positive_occurrences[var_index].append(clause_index)
+                    else:
+                        self.negative_occurrences[var_index].append(clause_index)
+
+        self.combination = None
+        self.fitness = 0
+        self.true_count = [0] * self.num_clauses
+        self.true_sum = [0] * self.num_clauses
+        self.make = [0] * num_vars
+        self.break_count = [0] * num_vars
+        self._neighbours = None
+
+        if combination is not None:
+            self.reset(combination)
+
+    def reset(self, combination):
+        """
+        Loads a new assignment and rebuilds every counter from scratch (one full pass over the clauses).
+        The scorer works on the given list in place, flips are visible to the caller.
+        """
+        self.combination = combination
+        true_count = [0] * self.num_clauses
+        true_sum = [0] * self.num_clauses
+        make = [0] * self.num_vars
+        break_count = [0] * self.num_vars
+
+        for var_index in range(self.num_vars):
+            if combination[var_index]:
+                true_clauses = self.positive_occurrences[var_index]
+            else:
+                true_clauses = self.negative_occurrences[var_index]
+            for clause_index in true_clauses:
+                true_count[clause_index] += 1
+                true_sum[clause_index] += var_index
+
+        fitness = 0
+        tautological = self.tautological
+        for clause_index in range(self.num_clauses):
+            count = true_count[clause_index]
+            if tautological[clause_index]: ## satisfied by every assignment, no variable makes or breaks it
+                fitness += 1
+            elif count == 0: ## unsatisfied, flipping any of its variables makes it
+                for var_index in self.clause_vars[clause_index]:
+                    make[var_index] += 1
+            else:
+                fitness += 1
+                if count == 1: ## critical clause, flipping its only true variable breaks it
+                    break_count[true_sum[clause_index]] += 1
+
+        self.true_count = true_count
+        self.true_sum = true_sum
+        self.make = make
+        self.break_count = break_count
+        self.fitness = fitness
+
+        if self.track_unsatisfied:
+            self.unsatisfied = [clause_index for clause_index in range(self.num_clauses)
+                                if true_count[clause_index] == 0 and not tautological[clause_index]]
+            self.unsatisfied_position = [-1] * self.num_clauses
+            for position, clause_index in enumerate(self.unsatisfied):
+                self.unsatisfied_position[clause_index] = position
+        return fitness
+
+    def delta(self, var_index):
+        """Fitness change (satisfied clauses) obtained by flipping var_index, without flipping it."""
+        return self.make[var_index] - self.break_count[var_index]
+
+    def neighbours(self):
+        """List of sets, neighbours()[v] holds the variables sharing at least one clause with v (built on first use)."""
+        if self._neighbours is None:
+            neighbours = [set() for _ in range(self.num_vars)]
+            for variables in self.clause_vars:
+                for var_index in variables:
+                    neighbours[var_index].update(variables)
+            for var_index, others in enumerate(neighbours):
+                others.discard(var_index)
+            self._neighbours = neighbours
+        return self._neighbours
+
+    def multi_delta(self, variables):
+        """
+        Fitness change obtained by flipping every variable of `variables` (distinct indexes) together, without flipping.
+        Single-flip deltas are exact on the clauses holding one of the variables, so only the clauses shared by two
+        or more of them (a neighbour pair) are rescored.
+        """
+        make = self.make
+        break_count = self.break_count
+        delta = 0
+        for var_index in variables:
+            delta += make[var_index] - break_count[var_index]
+        if len(variables) == 1:
+            return delta
+
+        neighbours = self.neighbours()
+        shared = set()
+        for position, first in enumerate(variables):
+            for second in variables[position + 1:]:
+                if second in neighbours[first]:
+                    for clause_index in self.positive_occurrences[first]:
+                        if second in self.clause_vars[clause_index]:
+                            shared.add(clause_index)
+                    for clause_index in self.negative_occurrences[first]:
+                        if second in self.clause_vars[clause_index]:
+                            shared.add(clause_index)
+
+        combination = self.combination
+        for clause_index in shared:
+            count = self.true_count[clause_index]
+            new_count = count
+            independent = 0 ## what the single-flip deltas counted for this clause
+            for var_index, positive in zip(self.clause_vars[clause_index], self.clause_signs[clause_index]):
+                if var_index in variables:
+                    if (combination[var_index] == 1) == positive: ## true literal becomes false
+                        new_count -= 1
+                        independent -= count == 1
+                    else:                                         ## false literal becomes true
+                        new_count += 1
+                        independent += count == 0
+            delta += (new_count > 0) - (count > 0) - independent
+        return delta
+
+    def neighbourhood_fitness(self):
+        """Fitness of every 1-flip neighbour of the current assignment as one (num_vars,) array."""
+        return self.fitness + np.array(self.make) - np.array(self.break_count)
+
+    def flip(self, var_index):
+        """
+        Flips var_index in place and updates the counters of the clauses it occurs in.
+        :return: the new fitness
+        """
+        true_count = self.true_count
+        true_sum = self.true_sum
+        make = self.make
+        break_count = self.break_count
+        clause_vars = self.clause_vars
+
+        if self.combination[var_index]: ## 1 -> 0: negative literals become true, positive ones false
+            made_true = self.negative_occurrences[var_index]
+            made_false = self.positive_occurrences[var_index]
+        else:                            ## 0 -> 1: positive literals become true, negative ones false
+            made_true = self.positive_occurrences[var_index]
+            made_false = self.negative_occurrences[var_index]
+        self.combination[var_index] = 1 - self.combination[var_index]
+
+        for clause_index in made_true:
+            count = true_count[clause_index]
+            if count == 0: ## clause becomes satisfied with var_index as its critical variable
+                for other in clause_vars[clause_index]:
+                    make[other] -= 1
+                break_count[var_index] += 1
+                self.fitness += 1
+                if self.track_unsatisfied:
+                    self._remove_unsatisfied(clause_index)
+            elif count == 1: ## previous critical variable is no longer critical
+                break_count[true_sum[clause_index]] -= 1
+            true_count[clause_index] = count + 1
+            true_sum[clause_index] += var_index
+
+        for clause_index in made_false:
+            count = true_count[clause_index] - 1
+            true_count[clause_index] = count
+            true_sum[clause_index] -= var_index
+            if count == 0: ## clause becomes unsatisfied
+                for other in clause_vars[clause_index]:
+                    make[other] += 1
+                break_count[var_index] -= 1
+                self.fitness -= 1
+                if self.track_unsatisfied:
+                    self.unsatisfied_position[clause_index] = len(self.unsatisfied)
+                    self.unsatisfied.append(clause_index)
+            elif count == 1: ## the remaining true variable becomes critical
+                break_count[true_sum[clause_index]] += 1
+
+        return self.fitness
+
+    def _remove_unsatisfied(self, clause_index):
+        """O(1) removal: the last clause of the list takes the place of clause_index."""
+        position = self.unsatisfied_position[clause_index]
+        last = self.unsatisfied.pop()
+        if last != clause_index:
+            self.unsatisfied[position] = last
+            self.unsatisfied_position[last] = position
+        self.unsatisfied_position[clause_index] = -1
+
+
+def _merge_literals(variables, signs):
+    """
+    :return: (variables, signs, tautological) of a clause with each variable once, ([], [], True) when the clause
+    holds both x and -x
+    """
+    literals = {}
+    for var_index, positive in zip(variables, signs):
+        if literals.setdefault(var_index, positive) != positive:
+            return [], [], True
+    return list(literals), list(literals.values()), False
+
+
+def _split(values, offsets):
+    """CSR arrays -> one Python list per row (plain lists are the fastest to index in the flip loop)."""
+    values = values.tolist()
+    offsets = offsets.tolist()
+    return [values[offsets[row]:offsets[row + 1]] for row in range(len(offsets) - 1)]
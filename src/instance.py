@@ -0,0 +1,171 @@
+"""
+Immutable, array-backed CNF instance.
+
+read_cnf(filepath, as_instance=True) parses the file once into an Instance that holds:
+- literals:         flat int32 array of every DIMACS literal, clause after clause
+- clause_offsets:   (num_clauses + 1,) array, clause c is literals[clause_offsets[c]:clause_offsets[c + 1]]
+- positive_offsets / positive_clauses: CSR index of the clauses where each variable appears as x
+- negative_offsets / negative_clauses: CSR index of the clauses where each variable appears as -x
+
+so "which clauses contain variable i" is a slice instead of a full scan. Variables are 0-based
+in the occurrence index (variable i is DIMACS literal i + 1).
+
+An Instance also behaves like the list of clauses (len() and iteration yield DIMACS lists), so it
+can be passed as `clauses` to every algorithm. compile_clauses returns its ClauseMatrix and the
+IncrementalScorer builds its occurrence lists from the CSR index instead of rescanning.
+"""
+
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+
+from src.clause_matrix import ClauseMatrix
+
+
+@dataclass(frozen=True, eq=False)
+class Instance:
+    num_vars: int
+    num_clauses: int
+    literals: np.ndarray
+    clause_offsets: np.ndarray
+    positive_offsets: np.ndarray
+    positive_clauses: np.ndarray
+    negative_offsets: np.ndarray
+    negative_clauses: np.ndarray
+    filepath: str = None
+
+    def __len__(self):
+        return self.num_clauses
+
+    def __iter__(self):
+        """Yields each clause as a list of DIMACS literals, like read_cnf does."""
+        offsets = self.clause_offsets.tolist()
+        literals = self.literals.tolist()
+        for clause_index in range(self.num_clauses):
+            yield literals[offsets[clause_index]:offsets[clause_index + 1]]
+
+    def clause(self, clause_index):
+        """DIMACS literals of a clause (read-only array view)."""
+        return self.literals[self.clause_offsets[clause_index]:self.clause_offsets[clause_index + 1]]
+
+    def clause_variables(self, clause_index):
+        """0-based variables of a clause."""
+        return np.abs(self.clause(clause_index)) - 1
+
+    def positive_occurrences(self, var_index):
+        """Clauses where var_index appears as a positive literal (read-only array view)."""
+        return self.positive_clauses[self.positive_offsets[var_index]:self.positive_offsets[var_index + 1]]
+
+    def negative_occurrences(self, var_index):
+        """Clauses where var_index appears as a negated literal (read-only array view)."""
+        return self.negative_clauses[self.negative_offsets[var_index]:self.negative_offsets[var_index + 1]]
+
+    def occurrences(self, var_index):
+        """Every clause containing var_index, sorted."""
+        return np.union1d(self.positive_occurrences(var_index), self.negative_occurrences(var_index))
+
+    ## degree statistics
+    @property
+    def clause_lengths(self):
+        return np.diff(self.clause_offsets)
+
+    @property
+    def positive_degrees(self):
+        return np.diff(self.positive_offsets)
+
+    @property
+    def negative_degrees(self):
+        return np.diff(self.negative_offsets)
+
+    @property
+    def degrees(self):
+        return self.positive_degrees + self.negative_degrees
+
+    @property
+    def max_degree(self):
+        return int(self.degrees.max(initial=0))
+
+    @property
+    def mean_degree(self):
+        return float(self.degrees.mean()) if self.num_vars else 0.0
+
+    @property
+    def max_clause_length(self):
+        return int(self.clause_lengths.max(initial=0))
+
+    @cached_property
+    def clause_matrix(self):
+        """ClauseMatrix of the instance, built on first use and kept for the lifetime of the Instance."""
+        lengths = self.clause_lengths
+        width = self.max_clause_length
+        rows = np.repeat(np.arange(self.num_clauses), lengths)
+        columns = np.arange(len(self.literals)) - np.repeat(self.clause_offsets[:-1], lengths)
+
+        literals = np.zeros((self.num_clauses, width), dtype=np.int64)
+        literals[rows, columns] = self.literals
+        mask = None
+        if np.any(lengths != width):
+            mask = np.zeros((self.num_clauses, width), dtype=bool)
+            mask[rows, columns] = True
+
+        indices = np.where(literals != 0, np.abs(literals) - 1, 0).astype(np.intp)
+        return ClauseMatrix(indices, literals < 0, self.num_vars, mask)
+
+
+def _occurrence_index(variables, clause_ids, num_vars):
+    order = np.argsort(variables, kind="stable") ## keeps clauses sorted inside each variable
+    counts = np.bincount(variables, minlength=num_vars)
+    offsets = np.zeros(num_vars + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, clause_ids[order].astype(np.int32)
+
+
+def _read_only(array):
+    array.flags.writeable = False
+    return array
+
+
+def build_instance(literals, clause_offsets, num_vars, filepath=None):
+    """
+    Builds an Instance from flat arrays (CSR layout of the clauses).
+
+    :param literals: flat array of DIMACS literals
+    :param clause_offsets: (num_clauses + 1,) array of clause start positions in literals
+    :param num_vars: number of variables of the instance (int value)
+    :param filepath: optional path the instance was read from
+    :return: Instance
+    """
+    literals = np.asarray(literals, dtype=np.int32)
+    clause_offsets = np.asarray(clause_offsets, dtype=np.int64)
+    num_clauses = len(clause_offsets) - 1
+
+    clause_ids = np.repeat(np.arange(num_clauses, dtype=np.int64), np.diff(clause_offsets))
+    variables = np.abs(literals).astype(np.int64) - 1
+    positive = literals > 0
+
+    positive_offsets, positive_clauses = _occurrence_index(variables[positive], clause_ids[positive], num_vars)
+    negative_offsets, negative_clauses = _occurrence_index(variables[~positive], clause_ids[~positive], num_vars)
+
+    return Instance(
+        num_vars=num_vars,
+        num_clauses=num_clauses,
+        literals=_read_only(literals),
+        clause_offsets=_read_only(clause_offsets),
+        positive_offsets=_read_only(positive_offsets),
+        positive_clauses=_read_only(positive_clauses),
+        negative_offsets=_read_only(negative_offsets),
+        negative_clauses=_read_only(negative_clauses),
+        filepath=filepath,
+    )
+
+
+def instance_from_clauses(clauses, num_vars, filepath=None):
+    """Builds an Instance from the list of clauses returned by read_cnf."""
+    if isinstance(clauses, Instance):
+        return clauses
+    lengths = [len(clause) for clause in clauses]
+    clause_offsets = np.zeros(len(clauses) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=clause_offsets[1:])
+    literals = [value for clause in clauses for value in clause]
+    return build_instance(literals, clause_offsets, num_vars, filepath)
@@ -0,0 +1,109 @@
+"""
+Binary cache of parsed CNF instances.
+
+The first read_cnf(path, as_instance=True, cache=True) parses the DIMACS text and writes every array of the
+Instance (see instance.py) into one binary file; later loads memory-map that file instead of re-parsing,
+so big instances open almost instantly and worker processes share the same pages.
+
+The cache file lives in a __cnfcache__ directory next to the .cnf (or in cache_dir) and its name is keyed
+by the absolute path, size and modification time of the .cnf, so editing or replacing the file invalidates it.
+
+File layout (little endian):
+- header, 8 int64:  magic, version, num_vars, num_clauses, num_literals, num_positive, 0, 0
+- int64 arrays:     clause_offsets (num_clauses + 1), positive_offsets (num_vars + 1), negative_offsets (num_vars + 1)
+- int32 arrays:     literals (num_literals), positive_clauses (num_positive), negative_clauses (num_literals - num_positive)
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+from src.instance import Instance
+
+MAGIC = 0x464E434353544153 ## arbitrary tag, rejects files that are not instance caches
+VERSION = 1
+HEADER_SIZE = 8
+CACHE_DIR_NAME = "__cnfcache__"
+
+
+def cache_file(cnf_path, cache_dir=None):
+    """:return: path of the cache file of cnf_path for its current size and modification time"""
+    stat = os.stat(cnf_path)
+    absolute = os.path.abspath(cnf_path)
+    key = hashlib.sha1(f"{absolute}|{stat.st_size}|{stat.st_mtime_ns}".encode()).hexdigest()[:16]
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(absolute), CACHE_DIR_NAME)
+    return os.path.join(cache_dir, f"{os.path.basename(cnf_path)}.{key}.bin")
+
+
+def load_cached_instance(cnf_path, cache_dir=None):
+    """:return: the memory-mapped Instance of cnf_path, or None when there is no valid cache file"""
+    path = cache_file(cnf_path, cache_dir)
+    if not os.path.exists(path) or os.path.getsize(path) < HEADER_SIZE * 8: ## missing, or cut before the header is complete
+        return None
+
+    data = np.memmap(path, dtype=np.uint8, mode="r")
+    header = data[:HEADER_SIZE * 8].view("<i8")
+    if header[0] != MAGIC or header[1] != VERSION:
+        return None
+    num_vars, num_clauses, num_literals, num_positive = (int(value) for value in header[2:6])
+
+    position = HEADER_SIZE * 8
+    arrays = []
+    for dtype, length in (("<i8", num_clauses + 1), ("<i8", num_vars + 1), ("<i8", num_vars + 1),
+                          ("<i4", num_literals), ("<i4", num_positive), ("<i4", num_literals - num_positive)):
+        size = np.dtype(dtype).itemsize * length
+        if position + size > len(data): ## truncated file
+            return None
+        arrays.append(data[position:position + size].view(dtype))
+        position += size
+    clause_offsets, positive_offsets, negative_offsets, literals, positive_clauses, negative_clauses = arrays
+
+    return Instance(
+        num_vars=num_vars,
+        num_clauses=num_clauses,
+        literals=literals,
+        clause_offsets=clause_offsets,
+        positive_offsets=positive_offsets,
+        positive_clauses=positive_clauses,
+        negative_offsets=negative_offsets,
+        negative_clauses=negative_clauses,
+        filepath=cnf_path,
+    )
+
+
+def save_cached_instance(instance, cnf_path, cache_dir=None):
+    """
+    Writes the cache file of cnf_path (atomically) and removes stale cache files of the same .cnf.
+    Raises OSError when the cache can't be written (read_cnf then goes on without it).
+    """
+    path = cache_file(cnf_path, cache_dir)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    header = np.array([MAGIC, VERSION, instance.num_vars, instance.num_clauses, len(instance.literals),
+                       len(instance.positive_clauses), 0, 0], dtype="<i8")
+    temporary = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temporary, "wb") as f:
+            f.write(header.tobytes())
+            for array in (instance.clause_offsets, instance.positive_offsets, instance.negative_offsets):
+                f.write(np.ascontiguousarray(array, dtype="<i8").tobytes())
+            for array in (instance.literals, instance.positive_clauses, instance.negative_clauses):
+                f.write(np.ascontiguousarray(array, dtype="<i4").tobytes())
+        os.replace(temporary, path) ## readers never see a half written file
+    except OSError: ## e.g. disk full: don't leave the partial file behind
+        if os.path.exists(temporary):
+            os.remove(temporary)
+        raise
+
+    prefix = f"{os.path.basename(cnf_path)}."
+    for name in os.listdir(directory):
+        stale = os.path.join(directory, name)
+        if name.startswith(prefix) and name.endswith(".bin") and stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return path
@@ -0,0 +1,129 @@
+"""
+Seeded generator of uniform random k-SAT instances, in the uf (SATLIB) DIMACS format.
+
+Every clause has k distinct variables chosen uniformly at random, each negated with probability 1/2.
+num_clauses = round(ratio * num_vars), the default ratio 4.26 is the 3-SAT phase transition, where the
+uf20/uf100/uf250 instances come from.
+
+With planted=True a random assignment is drawn first and clauses it doesn't satisfy are redrawn, so the
+instance is guaranteed to be satisfiable (the assignment can be written to a separate file).
+
+Clauses are generated and written in blocks of `block_size`, memory doesn't grow with the instance size.
+
+Usage (from the repository root):
+    python -m src.instance_generator 1000 -o cnf_files/uf1000-01.cnf --seed 1 --planted
+"""
+
+import argparse
+import bz2
+import gzip
+import lzma
+
+import numpy as np
+
+DEFAULT_RATIO = 4.26
+BLOCK_SIZE = 1 << 16 ## clauses generated per block
+
+
+def open_output(filepath):
+    """Opens filepath for text writing, compressing .gz, .xz/.lzma and .bz2 files (like dimacs_parser.open_cnf)."""
+    if filepath.endswith(".gz"):
+        return gzip.open(filepath, "wt")
+    if filepath.endswith((".xz", ".lzma")):
+        return lzma.open(filepath, "wt")
+    if filepath.endswith(".bz2"):
+        return bz2.open(filepath, "wt")
+    return open(filepath, "w")
+
+
+def _distinct_variables(rng, rows, num_vars, k):
+    """(rows, k) array of 1-based variables, distinct within each row."""
+    variables = rng.integers(1, num_vars + 1, size=(rows, k))
+    while True:
+        ordered = np.sort(variables, axis=1)
+        repeated = np.flatnonzero((ordered[:, 1:] == ordered[:, :-1]).any(axis=1))
+        if len(repeated) == 0:
+            return variables
+        variables[repeated] = rng.integers(1, num_vars + 1, size=(len(repeated), k))
+
+
+def clause_blocks(num_vars, num_clauses, k, rng, assignment=None, block_size=BLOCK_SIZE):
+    """
+    Yields (rows, k) int arrays of literals until num_clauses clauses are generated.
+    :param assignment: optional bool array (num_vars + 1,), indexed by variable, every clause is satisfied by it
+    """
+    remaining = num_clauses
+    while remaining > 0:
+        rows = min(block_size, remaining)
+        variables = _distinct_variables(rng, rows, num_vars, k)
+        negated = rng.random((rows, k)) < 0.5
+        if assignment is not None:
+            while True: ## redraw the signs of the clauses the assignment falsifies
+                falsified = np.flatnonzero(~(assignment[variables] != negated).any(axis=1))
+                if len(falsified) == 0:
+                    break
+                negated[falsified] = rng.random((len(falsified), k)) < 0.5
+        yield np.where(negated, -variables, variables)
+        remaining -= rows
+
+
+def generate_ksat(filepath, num_vars, ratio=DEFAULT_RATIO, k=3, seed=None, planted=False, solution_path=None,
+                  block_size=BLOCK_SIZE):
+    """
+    Writes a uniform random k-SAT instance to filepath.
+
+    :param num_vars: number of variables
+    :param ratio: clause/variable ratio
+    :param k: literals per clause (k <= num_vars)
+    :param seed: seed of the generator, the same arguments and seed always give the same file
+    :param planted: if True, every clause is satisfied by a hidden random assignment
+    :param solution_path: if given (and planted), the assignment is written there as a "v" line
+    :return: (num_clauses, assignment), assignment is a list of 0/1 per variable or None when not planted
+    """
+    if k > num_vars:
+        raise ValueError(f"k={k} is larger than the number of variables ({num_vars})")
+    num_clauses = int(round(ratio * num_vars))
+    rng = np.random.default_rng(seed)
+    assignment = None
+    if planted:
+        assignment = np.zeros(num_vars + 1, dtype=bool)
+        assignment[1:] = rng.random(num_vars) < 0.5
+
+    with open_output(filepath) as f:
+        f.write(f"c uniform random {k}-SAT, ratio {ratio}, seed {seed}{', planted' if planted else ''}\n")
+        f.write("c\n")
+        f.write(f"c    clause length = {k} \n")
+        f.write("c\n")
+        f.write(f"p cnf {num_vars}  {num_clauses} \n")
+        for block in clause_blocks(num_vars, num_clauses, k, rng, assignment, block_size):
+            np.savetxt(f, np.column_stack([block, np.zeros(len(block), dtype=block.dtype)]), fmt="%d")
+        f.write("%\n0\n")
+
+    if assignment is None:
+        return num_clauses, None
+    if solution_path is not None:
+        literals = np.arange(1, num_vars + 1)
+        with open_output(solution_path) as f:
+            f.write("v ")
+            np.savetxt(f, np.where(assignment[1:], literals, -literals)[None], fmt="%d", newline=" ")
+            f.write("0\n")
+    return num_clauses, assignment[1:].astype(int).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Writes a seeded uniform random k-SAT instance (DIMACS).")
+    parser.add_argument("num_vars", type=int)
+    parser.add_argument("-o", "--output", required=True, help="output .cnf (.gz/.xz/.bz2 are compressed)")
+    parser.add_argument("--ratio", type=float, default=DEFAULT_RATIO, help="clause/variable ratio (default 4.26)")
+    parser.add_argument("-k", type=int, default=3, help="literals per clause (default 3)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--planted", action="store_true", help="plant a satisfying assignment")
+    parser.add_argument("--solution", help="file for the planted assignment")
+    args = parser.parse_args()
+
+    num_clauses, _ = generate_ksat(args.output, args.num_vars, args.ratio, args.k, args.seed, args.planted, args.solution)
+    print(f"Wrote {args.output}: {args.num_vars} variables, {num_clauses} clauses")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Per-run telemetry for the algorithms.
+
+Every algorithm takes an optional `observer` argument. When it is None (the default) the algorithms only
+pay an `if observer is not None` test at the points where events happen; otherwise they call its hooks:
+
+- on_start(num_vars, num_clauses)          once, before the first evaluation
+- on_improvement(evaluations, fitness)     the search moved to a better solution (hillclimbers: current
+                                           solution, SA: new best state, PSO: new global best)
+- on_restart(evaluations, fitness)         a multistart algorithm leaves a local optimum of `fitness`
+- on_k_change(evaluations, k)              a VNH variant switches to the neighbourhood of Hamming distance k
+- on_acceptance(evaluations, accepted, delta)  SA decided on a proposed move, delta = new energy - energy
+- on_temperature(evaluations, temperature) SA temperature, every TEMPERATURE_INTERVAL evaluations
+- on_finish(evaluations, fitness)          once, with the final best fitness
+
+Fitness is always the number of satisfied clauses (SA converts its energies), so events from every family
+are comparable. Observer does nothing on every hook, subclasses override the events they need.
+MetricsObserver aggregates the events into per-run columns for the runners, ObserverGroup forwards every event
+to several observers (e.g. metrics and a convergence trace, see convergence_trace.py).
+"""
+
+import time
+
+TEMPERATURE_INTERVAL = 1000 ## evaluations between two on_temperature events
+
+
+class Observer:
+    def on_start(self, num_vars, num_clauses):
+        pass
+
+    def on_improvement(self, evaluations, fitness):
+        pass
+
+    def on_restart(self, evaluations, fitness):
+        pass
+
+    def on_k_change(self, evaluations, k):
+        pass
+
+    def on_acceptance(self, evaluations, accepted, delta):
+        pass
+
+    def on_temperature(self, evaluations, temperature):
+        pass
+
+    def on_finish(self, evaluations, fitness):
+        pass
+
+
+class ObserverGroup(Observer):
+    def __init__(self, *observers):
+        self.observers = observers
+
+    def on_start(self, num_vars, num_clauses):
+        for observer in self.observers:
+            observer.on_start(num_vars, num_clauses)
+
+    def on_improvement(self, evaluations, fitness):
+        for observer in self.observers:
+            observer.on_improvement(evaluations, fitness)
+
+    def on_restart(self, evaluations, fitness):
+        for observer in self.observers:
+            observer.on_restart(evaluations, fitness)
+
+    def on_k_change(self, evaluations, k):
+        for observer in self.observers:
+            observer.on_k_change(evaluations, k)
+
+    def on_acceptance(self, evaluations, accepted, delta):
+        for observer in self.observers:
+            observer.on_acceptance(evaluations, accepted, delta)
+
+    def on_temperature(self, evaluations, temperature):
+        for observer in self.observers:
+            observer.on_temperature(evaluations, temperature)
+
+    def on_finish(self, evaluations, fitness):
+        for observer in self.observers:
+            observer.on_finish(evaluations, fitness)
+
+
+class MetricsObserver(Observer):
+    """
+    Aggregates the events of one run, metrics() returns them as a dict of result columns:
+    wall_time, evaluations_per_second, improvements, evaluations_to_best, time_to_best, restarts and,
+    when the algorithm reports them, time_k<k> (seconds spent at each k), acceptance_rate,
+    uphill_acceptance_rate and final_temperature.
+    """
+
+    def __init__(self):
+        self.start_time = time.perf_counter()
+        self.wall_time = None
+        self.evaluations = 0
+        self.best_fitness = None
+        self.improvements = 0
+        self.evaluations_to_best = 0
+        self.time_to_best = 0.0
+        self.restarts = 0
+        self.k = None
+        self.k_since = None
+        self.time_at_k = {}
+        self.moves = 0
+        self.accepted = 0
+        self.uphill_moves = 0
+        self.uphill_accepted = 0
+        self.temperature = None
+
+    def on_start(self, num_vars, num_clauses):
+        self.start_time = time.perf_counter()
+
+    def on_improvement(self, evaluations, fitness):
+        self.improvements += 1
+        if self.best_fitness is None or fitness > self.best_fitness:
+            self.best_fitness = fitness
+            self.evaluations_to_best = evaluations
+            self.time_to_best = time.perf_counter() - self.start_time
+
+    def on_restart(self, evaluations, fitness):
+        self.restarts += 1
+
+    def on_k_change(self, evaluations, k):
+        now = time.perf_counter()
+        self._close_k(now)
+        self.k = k
+        self.k_since = now
+
+    def _close_k(self, now):
+        if self.k is not None:
+            self.time_at_k[self.k] = self.time_at_k.get(self.k, 0.0) + now - self.k_since
+
+    def on_acceptance(self, evaluations, accepted, delta):
+        self.moves += 1
+        if delta > 0:
+            self.uphill_moves += 1
+        if accepted:
+            self.accepted += 1
+            self.uphill_accepted += delta > 0
+
+    def on_temperature(self, evaluations, temperature):
+        self.temperature = temperature
+
+    def on_finish(self, evaluations, fitness):
+        now = time.perf_counter()
+        self._close_k(now)
+        self.k = None
+        self.wall_time = now - self.start_time
+        self.evaluations = evaluations
+        if self.best_fitness is None or fitness > self.best_fitness: ## e.g. the initial solution was never improved
+            self.best_fitness = fitness
+            self.evaluations_to_best = evaluations if self.improvements else 0
+
+    def metrics(self):
+        wall_time = self.wall_time if self.wall_time is not None else time.perf_counter() - self.start_time
+        metrics = {
+            "wall_time": wall_time,
+            "evaluations_per_second": self.evaluations / wall_time if wall_time > 0 else None,
+            "improvements": self.improvements,
+            "evaluations_to_best": self.evaluations_to_best,
+            "time_to_best": self.time_to_best,
+            "restarts": self.restarts,
+        }
+        for k in sorted(self.time_at_k):
+            metrics[f"time_k{k}"] = self.time_at_k[k]
+        if self.moves:
+            metrics["acceptance_rate"] = self.accepted / self.moves
+            metrics["uphill_acceptance_rate"] = self.uphill_accepted / self.uphill_moves if self.uphill_moves else None
+        if self.temperature is not None:
+            metrics["final_temperature"] = self.temperature
+        return metrics
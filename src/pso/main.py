@@ -24,7 +24,7 @@ def main():
         return
 
     cnf_path = CNF_FILES[cnf_choice]
-    clauses, num_clauses, num_vars = utils.read_cnf(cnf_path)
+    clauses, num_clauses, num_vars = utils.read_cnf(cnf_path, as_instance=True, cache=True) ## memory-mapped after the first load
     print(f"\nLoaded: {cnf_path} — vars={num_vars}, clauses={num_clauses}")
 
     print("\nSelect algorithm:")
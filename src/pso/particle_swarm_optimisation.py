@@ -22,99 +22,158 @@ step 8: return to step 2
 
 import random
 from particle import *
-from utils import evaluate_particle_fitness
+from swarm import Swarm
+from topology import make_topology
+from src.clause_matrix import compile_clauses
 
-def particle_swarm_optimisation(clauses, num_clauses, num_vars, num_particles, max_evaluations):
-    swarm = [initialise_particle(clauses,num_vars) for _ in range(num_particles)] ## arr of particles, size = number of particles (arg), step 1 and 2
+def particle_swarm_optimisation(clauses, num_clauses, num_vars, num_particles, max_evaluations, synchronous=False, observer=None,
+                                patience=250_000, termination=None, coefficients=None):
+    """
+    :param synchronous: False (default) moves and evaluates one particle at a time, as the Particle version did,
+    True moves the whole swarm at once against the same global best and evaluates it as one batch
+    :param observer: optional observers.Observer, receives an improvement event on every new global best
+    :param patience: evaluations without a new global best before giving up
+    :param termination: optional termination.TerminationCriteria (wall/cpu time, target fitness, patience)
+    :param coefficients: optional dict of Swarm coefficients (w, c1, c2, c3, max_velocity), missing ones default to particle.py
+    """
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
+    clauses = compile_clauses(clauses, num_vars) ## compile once, evaluate_particle_fitness is then a vectorized gather
+    swarm = Swarm(clauses, num_vars, num_particles, **(coefficients or {})) ## positions/velocities matrices, size = number of particles (arg), step 1 and 2
 
-    global_best_fitness, global_best_position = find_global_best(swarm) ## initialise best_global fitness and position, step 3
+    global_best_fitness, global_best_position = swarm.global_best() ## initialise best_global fitness and position, step 3
 
-    evaluations = len(swarm) ## when constructing the swarm every particle had their fitness evaluated
-    patience = 250_000
+    evaluations = num_particles ## when constructing the swarm every particle had their fitness evaluated
     last_improvement = evaluations
 
     while (evaluations < max_evaluations
            and global_best_fitness < num_clauses
-           and (evaluations - last_improvement) < patience):
-        for particle in swarm:
+           and (evaluations - last_improvement) < patience
+           and not (termination is not None and termination.should_stop(evaluations, global_best_fitness))):
+        if synchronous:
+            count = min(num_particles, max_evaluations - evaluations)
+            fitness = swarm.update_all(global_best_position, count=count) ## steps 4, 5 and 6 for the whole swarm
+            best_index = int(np.argmax(fitness))
+            if fitness[best_index] > global_best_fitness:
+                global_best_fitness = int(fitness[best_index])
+                global_best_position[:] = swarm.positions[best_index]
+                last_improvement = evaluations + best_index
+                if observer is not None:
+                    observer.on_improvement(last_improvement, global_best_fitness)
+            evaluations += count
+            continue
+
+        for i in range(num_particles):
             if evaluations >= max_evaluations or (evaluations - last_improvement) >= patience:
                 break
+            if termination is not None and termination.should_stop(evaluations, global_best_fitness): ## time, target or patience
+                break
 
-            particle.update_velocity(global_best_position) ## step 4
-            particle.update_position()                     ## step 5
-
-            particle.fitness = evaluate_particle_fitness(clauses, particle.position)
+            fitness = swarm.update_particle(i, global_best_position) ## steps 4, 5 and 6
 
-            if particle.fitness > particle.best_fitness:   ## step 6
-                particle.update_best_state()
-            if particle.fitness > global_best_fitness:
-                global_best_fitness = particle.fitness   ## update global best fitness
-                global_best_position = particle.position.copy()
+            if fitness > global_best_fitness:
+                global_best_fitness = fitness   ## update global best fitness
+                global_best_position[:] = swarm.positions[i]
                 last_improvement = evaluations  # reset ao relógio da estagnação
-                print(last_improvement)
+                if observer is not None:
+                    observer.on_improvement(evaluations, global_best_fitness)
 
             evaluations += 1
 
+    if observer is not None:
+        observer.on_finish(evaluations, global_best_fitness)
     return global_best_fitness, global_best_position, evaluations
 
 
-def particle_swarm_optimisation_with_informants(clauses, num_clauses, num_vars, num_particles, num_informants, max_evaluations):
+def particle_swarm_optimisation_with_informants(clauses, num_clauses, num_vars, num_particles, num_informants, max_evaluations, synchronous=False,
+                                                topology=None, topology_period=10, observer=None,
+                                                patience=1_000_000, termination=None, coefficients=None):
     """ [cont.]
     step 5.1: find informants best fitness
-    """
-    swarm = [initialise_particle(clauses, num_vars) for _ in range(num_particles)]  ## arr of particles, size = number of particles (arg), step 1 and 2
-
-    global_best_fitness, global_best_position = find_global_best(swarm) ## initialise best_global fitness and position
 
-    evaluations = len(swarm) ## when constructing the swarm every particle had their fitness evaluated
-    patience = 1000000
+    :param synchronous: False (default) moves and evaluates one particle at a time, as the Particle version did,
+    True moves the whole swarm at once against the same global and informant bests and evaluates it as one batch
+    :param topology: None (default) samples new random informants for every particle on every step,
+    "random", "ring", "von_neumann" or "dynamic" use a precomputed topology with cached neighbourhood bests (see topology.py)
+    :param topology_period: iterations between re-randomisations of the "dynamic" topology
+    :param observer: optional observers.Observer, receives an improvement event on every new global best
+    :param patience: evaluations without a new global best before giving up
+    :param termination: optional termination.TerminationCriteria (wall/cpu time, target fitness, patience)
+    :param coefficients: optional dict of Swarm coefficients (w, c1, c2, c3, max_velocity), missing ones default to particle.py
+    """
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
+    clauses = compile_clauses(clauses, num_vars) ## compile once, evaluate_particle_fitness is then a vectorized gather
+    swarm = Swarm(clauses, num_vars, num_particles, **(coefficients or {})) ## positions/velocities matrices, size = number of particles (arg), step 1 and 2
+    if topology is not None:
+        swarm.topology = make_topology(topology, num_particles, num_informants, swarm.best_fitness, topology_period)
+
+    global_best_fitness, global_best_position = swarm.global_best() ## initialise best_global fitness and position
+
+    evaluations = num_particles ## when constructing the swarm every particle had their fitness evaluated
     last_improvement = evaluations
 
     while (evaluations < max_evaluations
         and global_best_fitness < num_clauses
-        and (evaluations - last_improvement) < patience):
-
-        for particle in swarm:
+        and (evaluations - last_improvement) < patience
+        and not (termination is not None and termination.should_stop(evaluations, global_best_fitness))):
+
+        if synchronous:
+            count = min(num_particles, max_evaluations - evaluations)
+            if swarm.topology is None:
+                informants = [find_informants_best_index(swarm, num_informants, i) for i in range(count)]
+            else:
+                informants = swarm.topology.best_index
+            fitness = swarm.update_all(global_best_position, swarm.best_positions[informants], count=count)
+            best_index = int(np.argmax(fitness))
+            if fitness[best_index] > global_best_fitness:
+                global_best_fitness = int(fitness[best_index])
+                global_best_position[:] = swarm.positions[best_index]
+                last_improvement = evaluations + best_index
+                if observer is not None:
+                    observer.on_improvement(last_improvement, global_best_fitness)
+            evaluations += count
+            if swarm.topology is not None:
+                swarm.topology.next_iteration()
+            continue
+
+        for i in range(num_particles):
             if evaluations >= max_evaluations or (evaluations - last_improvement) >= patience:
                 break
+            if termination is not None and termination.should_stop(evaluations, global_best_fitness): ## time, target or patience
+                break
 
-            informants_best_position = find_informants_best_position(swarm, num_informants, particle)
-            particle.update_velocity_with_informants(global_best_position, informants_best_position)  ## step 3
-            particle.update_position()  ## step 4
-
-            particle.fitness = evaluate_particle_fitness(clauses, particle.position)
+            if swarm.topology is None:
+                informants_best_position = swarm.best_positions[find_informants_best_index(swarm, num_informants, i)]
+            else:
+                informants_best_position = swarm.best_positions[swarm.topology.best_index[i]] ## cached, no search and no copy
+            fitness = swarm.update_particle(i, global_best_position, informants_best_position)  ## steps 3, 4 and 6
 
-            if particle.fitness > particle.best_fitness:  ## step 6
-                particle.update_best_state()
-            if particle.fitness > global_best_fitness:
-                global_best_fitness = particle.fitness  ## update global best fitness
-                global_best_position = particle.position.copy()
+            if fitness > global_best_fitness:
+                global_best_fitness = fitness  ## update global best fitness
+                global_best_position[:] = swarm.positions[i]
                 last_improvement = evaluations  # reset ao relógio da estagnação
-                print(last_improvement)
+                if observer is not None:
+                    observer.on_improvement(evaluations, global_best_fitness)
 
             evaluations+=1
 
+        if swarm.topology is not None:
+            swarm.topology.next_iteration()
+
+    if observer is not None:
+        observer.on_finish(evaluations, global_best_fitness)
     return global_best_fitness, global_best_position, evaluations
 
 
 
 """utils: """
-def initialise_particle(clauses, num_vars):
-    p = Particle(num_vars)
-    p.fitness = evaluate_particle_fitness(clauses, p.position)
-    p.update_best_state()
-    return p
-
-def find_informants_best_position(swarm, num_informants, particle):
-    informants = random.sample(swarm, num_informants - 1)
-    informants.append(particle)
-
-    best_informant = max(informants, key=lambda p: p.best_fitness)
-    return best_informant.best_position.copy()
-
-
-def find_global_best(swarm):
-    global_best_fitness = max(p.fitness for p in swarm)
-    best_index = np.argmax([p.fitness for p in swarm])
-    global_best_position = swarm[best_index].position.copy()
-    return global_best_fitness, global_best_position
\ No newline at end of file
+def find_informants_best_index(swarm, num_informants, i):
+    """Index of the best personal best among num_informants - 1 random particles and particle i."""
+    informants = random.sample(range(swarm.num_particles), num_informants - 1)
+    informants.append(i)
+    return max(informants, key=swarm.best_fitness.__getitem__)
@@ -1,10 +1,15 @@
+import functools
 import os
-import random
+import sys
 
-import numpy as np
-import pandas as pd
-import utils
-from src import utils
+from src.experiment_runner import expand_grid, run_tasks
+from src.results_store import ResultsStore
+from src.results_catalog import ResultsCatalog
+from src.observers import MetricsObserver, ObserverGroup
+from src.convergence_trace import TraceObserver, trace_path
+from src.termination import split_termination_params
+from src.racing import race
+from src.tuning import run_tuning
 
 from particle_swarm_optimisation import particle_swarm_optimisation_with_informants
 
@@ -18,65 +23,127 @@ CNF_FILES = {
 
 INDEPENDENT_RUNS = 30  ## number of independent runs
 RESULTS_FILE = "../results/pso_results.xlsx"
+RESULTS_STORE = "../results/pso_results.jsonl"  ## every finished run is appended here, the xlsx is exported from it
+CATALOG_FILE = "../results/catalog.sqlite"  ## SQLite catalog shared by every campaign
+CAMPAIGN = "pso"
+TRACES_DIR = "../results/traces/pso"  ## one best-so-far convergence trace per run, None disables them
 
 ## PSO parameters
 MAX_EVALUATIONS = 1_000_000
 
 ## PSO with informants parameters
 NUM_INFORMANTS = 6
+COEFFICIENTS = ("w", "c1", "c2", "c3", "max_velocity") ## Swarm coefficients a task may set, see particle.py
+
+## extra stopping criteria of every run (see termination.py), e.g. {"max_wall_time": 60} for an equal-time budget
+TERMINATION = {}
+
+WORKERS = os.cpu_count()  ## worker processes, results don't depend on this value
+
+## statistical racing of the ALGORITHMS entries (see racing.py): None runs all INDEPENDENT_RUNS seeds of every entry,
+## e.g. {"first_round": 5, "round_size": 1, "alpha": 0.05, "reinvest": False} drops the significantly dominated ones
+RACING = None
+
+## hyperparameter tuning of one ALGORITHMS entry with Hyperband (see tuning.py), run `python run_experiments.py tune`;
+## every tuning run is cached in "cache", so an interrupted or repeated tuning only runs what is missing
+TUNING = {
+    "algorithm": "PSO_informants",
+    "space": {
+        "w": ("uniform", 0.4, 0.9),
+        "c1": ("uniform", 0.5, 2.5),
+        "c2": ("uniform", 0.5, 2.5),
+        "c3": ("uniform", 0.5, 2.5),
+        "max_velocity": ("uniform", 2.0, 8.0),
+        "num_particles": [30, 75, 150, 350],
+        "num_informants": ("int", 2, 10),
+    },
+    "seeds": range(5),
+    "min_budget": MAX_EVALUATIONS // 81,
+    "max_budget": MAX_EVALUATIONS,
+    "cache": "../results/tuning/pso.jsonl",
+    "history": "../results/tuning/pso_history.xlsx",
+}
+
+
+ALGORITHMS = {
+    "PSO_informants": {"num_informants": NUM_INFORMANTS, "max_evaluations": MAX_EVALUATIONS, **TERMINATION},
+}
+
+
+_DEFAULT = object() ## traces_dir not given: TRACES_DIR as it is when the task runs, not when the module was imported
+
+
+def run_task(task, clauses, num_clauses, num_vars, traces_dir=_DEFAULT):
+    if traces_dir is _DEFAULT:
+        traces_dir = TRACES_DIR
+    num_particles = task.params.get("num_particles") or choose_swarm_size(num_vars)
+    coefficients = {name: task.params[name] for name in COEFFICIENTS if name in task.params} ## tuned values, else particle.py
+    _, termination = split_termination_params(task.params) ## None unless TERMINATION sets a criterion
+    metrics = MetricsObserver() ## improvements, evaluations to best, evaluations per second... become extra columns
+    trace = TraceObserver() if traces_dir is not None else None
+    observer = ObserverGroup(metrics, trace) if trace is not None else metrics
+
+    best_fitness_inf, best_position_inf, evals_inf = (
+        particle_swarm_optimisation_with_informants(
+            clauses=clauses,
+            num_clauses=num_clauses,
+            num_vars=num_vars,
+            num_particles=num_particles,
+            num_informants=task.params["num_informants"],
+            max_evaluations=task.params["max_evaluations"],
+            observer=observer,
+            termination=termination,
+            coefficients=coefficients,
+        )
+    )
+
+    row = {
+        **coefficients,
+        "num_particles": num_particles,
+        "num_informants": task.params["num_informants"],
+        "max_evaluations": task.params["max_evaluations"],
+        "evaluations_used": evals_inf,
+        "best_fitness_satisfied": best_fitness_inf,
+    }
+    row.update(metrics.metrics())
+    if termination is not None:
+        row["stop_reason"] = termination.reason
+    if trace is not None:
+        row["trace_file"] = trace.save(trace_path(traces_dir, task))
+    return row
 
 
 def main():
     os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
 
-    results = []
-
-    for instance_id, cnf_path in CNF_FILES.items():
-        print(f"\nLoaded {cnf_path}")
-        clauses, num_clauses, num_vars = utils.read_cnf(cnf_path)
-        num_clauses = len(clauses)
-
-        NUM_PARTICLES = choose_swarm_size(num_vars)
-
-        ## Then all PSO_informants runs
-        for run in range(INDEPENDENT_RUNS):
-            seed = run  ## same seeds 0..29 for fairness
-            random.seed(seed)
-            np.random.seed(seed)
-
-            print(f"\n[PSO_informants] File {instance_id}, run {run}, seed {seed}")
-
-            best_fitness_inf, best_position_inf, evals_inf = (
-                particle_swarm_optimisation_with_informants(
-                    clauses=clauses,
-                    num_clauses=num_clauses,
-                    num_vars=num_vars,
-                    num_particles=NUM_PARTICLES,
-                    num_informants=NUM_INFORMANTS,
-                    max_evaluations=MAX_EVALUATIONS,
-                )
-            )
-
-            results.append(
-                {
-                    "algorithm": "PSO_informants",
-                    "instance_id": instance_id,
-                    "cnf_file": cnf_path,
-                    "run": run,
-                    "seed": seed,
-                    "num_vars": num_vars,
-                    "num_clauses": num_clauses,
-                    "num_particles": NUM_PARTICLES,
-                    "num_informants": NUM_INFORMANTS,
-                    "max_evaluations": MAX_EVALUATIONS,
-                    "evaluations_used": evals_inf,
-                    "best_fitness_satisfied": best_fitness_inf,
-                }
-            )
-
-    df = pd.DataFrame(results)
-    df.to_excel(RESULTS_FILE, index=False)
+    store = ResultsStore(RESULTS_STORE)
+    catalog = ResultsCatalog(CATALOG_FILE)
+    campaign_id = catalog.campaign(CAMPAIGN, family="pso")
+    ## same seeds 0..29 for fairness
+    tasks = expand_grid(ALGORITHMS, CNF_FILES, INDEPENDENT_RUNS)
+    pending = store.pending(tasks) ## resume: skip runs already in the store
+    execute_task = functools.partial(run_task, traces_dir=TRACES_DIR) ## passed explicitly, so it also reaches spawned workers
+    print(f"{len(tasks) - len(pending)} of {len(tasks)} runs already done")
+
+    def report(task, row):
+        store.append(task, row)
+        catalog.record_run(campaign_id, task, row)
+        print(f"\n[{task.algorithm}] File {task.instance_id}, run {task.run}, seed {task.seed}")
+
+    if RACING is None:
+        run_tasks(pending, execute_task, workers=WORKERS, on_result=report)
+    else:
+        race(tasks, lambda tasks_to_run: run_tasks(tasks_to_run, execute_task, workers=WORKERS, on_result=report),
+             completed_rows=store.rows(), **RACING,
+             on_eliminate=lambda instance_id, algorithm, runs: print(f"File {instance_id}: {algorithm} dropped after {runs} runs"))
+
+    store.export_excel(RESULTS_FILE, tasks, include_all=RACING is not None and RACING.get("reinvest", False)) ## reinvested seeds are not in tasks
+    catalog.close()
     print(f"\nSaved results to {RESULTS_FILE}")
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["tune"]:
+        ## no convergence traces for the tuning runs (an argument, so it also reaches spawned workers)
+        run_tuning(functools.partial(run_task, traces_dir=None), ALGORITHMS, CNF_FILES, TUNING, workers=WORKERS)
+    else:
+        main()
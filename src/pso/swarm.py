@@ -0,0 +1,137 @@
+"""
+Struct-of-arrays swarm for PSO.
+
+Instead of a list of Particle objects, the whole swarm lives in (num_particles, num_vars) matrices:
+- positions, velocities: current state of every particle
+- best_positions:        personal best position of every particle
+- fitness, best_fitness: (num_particles,) current and personal best fitness
+
+Updates are done in place with preallocated buffers, with the same formulas as Particle
+(see particle.py), in two modes:
+- update_particle: asynchronous, one particle at a time, reproduces the Particle semantics exactly
+  (same floating point operations, same random numbers) so results stay comparable
+- update_all:      synchronous, every particle moves at once and the swarm is evaluated as one batch
+"""
+
+import numpy as np
+
+import particle
+from utils import evaluate_particle_fitness
+
+
+class Swarm:
+    def __init__(self, clauses, num_vars, num_particles, w=None, c1=None, c2=None, c3=None, max_velocity=None):
+        """
+        :param clauses: clauses of the instance (list, ClauseMatrix or Instance)
+        :param num_vars: number of max sat variables (int value)
+        :param num_particles: number of particles (int value)
+        :param w, c1, c2, c3, max_velocity: coefficients, default to the values in particle.py
+        """
+        self.clauses = clauses
+        self.num_vars = num_vars
+        self.num_particles = num_particles
+        self.w = particle.w if w is None else w
+        self.c1 = particle.c1 if c1 is None else c1
+        self.c2 = particle.c2 if c2 is None else c2
+        self.c3 = particle.c3 if c3 is None else c3
+        self.max_velocity = particle.max_velocity if max_velocity is None else max_velocity
+
+        self.positions = np.empty((num_particles, num_vars))
+        self.velocities = np.empty((num_particles, num_vars))
+        for i in range(num_particles): ## same draw order as building Particle objects one by one
+            self.positions[i] = np.random.rand(num_vars)
+            self.velocities[i] = np.random.uniform(-self.max_velocity, self.max_velocity, num_vars)
+
+        self.fitness = evaluate_particle_fitness(clauses, self.positions) ## whole swarm in one batch
+        self.best_fitness = self.fitness.copy()
+        self.best_positions = self.positions.copy()
+
+        self.topology = None                ## informant topology (see topology.py), told about personal best improvements
+
+        self._velocity = np.empty(num_vars) ## buffers of the asynchronous update
+        self._term = np.empty(num_vars)
+        self._velocities = None             ## buffers of the synchronous update, allocated on first use
+        self._terms = None
+
+    def global_best(self):
+        """:return: (fitness, position copy) of the best current particle"""
+        best_index = int(np.argmax(self.fitness))
+        return int(self.fitness[best_index]), self.positions[best_index].copy()
+
+    def update_particle(self, i, global_best_position, informant_best_position=None):
+        """
+        Moves particle i and evaluates it:
+        new_velocity = w*v + c1(x@ - xti) + c2(x! - xti) [+ c3(x* - xti)]
+        new_position = xi + vi
+        :return: the new fitness of particle i
+        """
+        position = self.positions[i]
+        velocity = self._velocity
+        term = self._term
+
+        np.multiply(self.w, self.velocities[i], out=velocity)              ## inertia term
+        np.subtract(self.best_positions[i], position, out=term)
+        np.multiply(self.c1, term, out=term)                               ## personal term
+        velocity += term
+        if informant_best_position is not None:
+            np.subtract(informant_best_position, position, out=term)
+            np.multiply(self.c3, term, out=term)                           ## social term
+            velocity += term
+        np.subtract(global_best_position, position, out=term)
+        np.multiply(self.c2, term, out=term)                               ## global term
+        velocity += term
+        np.clip(velocity, -self.max_velocity, self.max_velocity, out=self.velocities[i])
+
+        position += self.velocities[i]
+        np.clip(position, 0.0, 1.0, out=position)
+
+        fitness = evaluate_particle_fitness(self.clauses, position)
+        self.fitness[i] = fitness
+        if fitness > self.best_fitness[i]:
+            self.best_fitness[i] = fitness
+            self.best_positions[i] = position
+            if self.topology is not None:
+                self.topology.personal_best_improved(i)
+        return fitness
+
+    def update_all(self, global_best_position, informant_best_positions=None, count=None):
+        """
+        Synchronous update: moves the first `count` particles (default: all) at once against the same
+        global best and evaluates them as one batch.
+        :param informant_best_positions: optional (num_particles, num_vars) matrix, row i is the informant best of particle i
+        :return: (count,) array with the new fitness of the moved particles
+        """
+        if self._velocities is None:
+            self._velocities = np.empty_like(self.velocities)
+            self._terms = np.empty_like(self.velocities)
+        count = self.num_particles if count is None else count
+
+        positions = self.positions[:count]
+        velocities = self._velocities[:count]
+        terms = self._terms[:count]
+
+        np.multiply(self.w, self.velocities[:count], out=velocities)
+        np.subtract(self.best_positions[:count], positions, out=terms)
+        np.multiply(self.c1, terms, out=terms)
+        velocities += terms
+        if informant_best_positions is not None:
+            np.subtract(informant_best_positions[:count], positions, out=terms)
+            np.multiply(self.c3, terms, out=terms)
+            velocities += terms
+        np.subtract(global_best_position, positions, out=terms)
+        np.multiply(self.c2, terms, out=terms)
+        velocities += terms
+        np.clip(velocities, -self.max_velocity, self.max_velocity, out=self.velocities[:count])
+
+        positions += self.velocities[:count]
+        np.clip(positions, 0.0, 1.0, out=positions)
+
+        fitness = evaluate_particle_fitness(self.clauses, positions)
+        self.fitness[:count] = fitness
+        improved = fitness > self.best_fitness[:count]
+        self.best_fitness[:count][improved] = fitness[improved]
+        self.best_positions[:count][improved] = positions[improved]
+        if self.topology is not None:
+            for i in np.flatnonzero(improved):
+                self.topology.personal_best_improved(i)
+        return fitness
@@ -0,0 +1,114 @@
+"""
+Informant topologies for PSO with informants.
+
+A topology is an (num_particles, k) index array, row i lists the informants of particle i
+(column 0 is always i itself). Instead of sampling informants and searching their best on every step,
+the index of the best personal best inside each neighbourhood (best_index) is cached and kept up to date
+incrementally: personal bests only improve, so when particle j improves only the particles that have j as
+an informant (informed_by[j]) need to compare j against their current best.
+
+The informant best of particle i is then swarm.best_positions[topology.best_index[i]], a view, no copy.
+
+Available topologies (make_topology names):
+- "random":     num_informants - 1 random informants per particle, fixed for the whole run
+- "ring":       the (num_informants - 1) // 2 particles on each side of i (wrapping around)
+- "von_neumann": north, south, east and west neighbours on a 2-D grid of the swarm (wrapping around)
+- "dynamic":    random informants, re-randomised every `period` iterations
+"""
+
+import random
+
+import numpy as np
+
+
+class Topology:
+    def __init__(self, informants, best_fitness):
+        """
+        :param informants: (num_particles, k) int array, row i holds particle i and its informants
+        :param best_fitness: the swarm personal best fitness array (shared, read as it changes)
+        """
+        self.best_fitness = best_fitness
+        self.set_informants(informants)
+
+    def set_informants(self, informants):
+        """Replaces the neighbourhoods and recomputes every cached neighbourhood best."""
+        self.informants = np.asarray(informants, dtype=np.intp)
+        num_particles = len(self.informants)
+
+        best_column = np.argmax(self.best_fitness[self.informants], axis=1)
+        self.best_index = self.informants[np.arange(num_particles), best_column]
+
+        ## reverse index: informed_by[j] = particles that have j as an informant
+        pairs = np.unique(np.column_stack([self.informants.ravel(), np.repeat(np.arange(num_particles), self.informants.shape[1])]), axis=0)
+        splits = np.searchsorted(pairs[:, 0], np.arange(1, num_particles))
+        self.informed_by = np.split(pairs[:, 1], splits)
+
+    def personal_best_improved(self, j):
+        """Called after particle j improved its personal best."""
+        informed = self.informed_by[j]
+        improved = self.best_fitness[j] > self.best_fitness[self.best_index[informed]]
+        self.best_index[informed[improved]] = j
+
+    def next_iteration(self):
+        """Called once per sweep over the swarm, static topologies do nothing."""
+
+
+class DynamicRandomTopology(Topology):
+    def __init__(self, num_particles, num_informants, best_fitness, period):
+        self.num_particles = num_particles
+        self.num_informants = num_informants
+        self.period = period
+        self.iteration = 0
+        super().__init__(random_informants(num_particles, num_informants), best_fitness)
+
+    def next_iteration(self):
+        self.iteration += 1
+        if self.iteration % self.period == 0:
+            self.set_informants(random_informants(self.num_particles, self.num_informants))
+
+
+def random_informants(num_particles, num_informants):
+    """Particle i plus num_informants - 1 random particles, the same draw as find_informants_best_index."""
+    informants = np.empty((num_particles, num_informants), dtype=np.intp)
+    for i in range(num_particles):
+        informants[i, 0] = i
+        informants[i, 1:] = random.sample(range(num_particles), num_informants - 1)
+    return informants
+
+
+def ring_informants(num_particles, num_informants):
+    radius = max(1, (num_informants - 1) // 2)
+    offsets = np.concatenate([[0], np.arange(1, radius + 1), -np.arange(1, radius + 1)])
+    return (np.arange(num_particles)[:, None] + offsets) % num_particles
+
+
+def von_neumann_informants(num_particles):
+    rows = int(np.sqrt(num_particles))
+    while num_particles % rows: ## largest grid height that divides the swarm
+        rows -= 1
+    cols = num_particles // rows
+
+    particles = np.arange(num_particles)
+    row, col = particles // cols, particles % cols
+    north = ((row - 1) % rows) * cols + col
+    south = ((row + 1) % rows) * cols + col
+    west = row * cols + (col - 1) % cols
+    east = row * cols + (col + 1) % cols
+    return np.column_stack([particles, north, south, west, east])
+
+
+def make_topology(name, num_particles, num_informants, best_fitness, period=10):
+    """
+    :param name: "random", "ring", "von_neumann" or "dynamic"
+    :param period: iterations between re-randomisations of the "dynamic" topology
+    :return: Topology
+    """
+    if name == "random":
+        return Topology(random_informants(num_particles, num_informants), best_fitness)
+    if name == "ring":
+        return Topology(ring_informants(num_particles, num_informants), best_fitness)
+    if name == "von_neumann":
+        return Topology(von_neumann_informants(num_particles), best_fitness)
+    if name == "dynamic":
+        return DynamicRandomTopology(num_particles, num_informants, best_fitness, period)
+    raise ValueError(f"Unknown topology: {name}")
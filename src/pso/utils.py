@@ -1,21 +1,14 @@
-# Function to find the fitness being the fitness the number of clauses satisfied by the combination
-def evaluate_particle_fitness(clauses, combination):
-    fitness = 0
+import numpy as np
 
-    for clause in clauses:
+from src.clause_matrix import compile_clauses, count_satisfied
 
-        clause_fitness = 0
-        for value in clause:
-            var_index = abs(value) - 1 ## normalise for clause list
-            ## replace with: "combination[var_index]" if you want to use the continuous vector, this line just turns 0.3 in 0 and 0.7 in 1
-            is_true = 1 if combination[var_index] > 0.5 else 0
-            if value < 0: ## if literal value is below 0, the variable is negated
-                is_true = not is_true
-            if is_true: ## if bool is true
-                clause_fitness = 1
-                break
-        fitness += clause_fitness
-    return fitness
+# Function to find the fitness being the fitness the number of clauses satisfied by the combination
+# also accepts a (num_particles, num_vars) matrix of positions and returns one fitness per row
+def evaluate_particle_fitness(clauses, combination):
+    combination = np.asarray(combination)
+    matrix = compile_clauses(clauses, combination.shape[-1]) ## no-op when clauses is already a ClauseMatrix
+    ## "> 0.5" turns the continuous vector into bits, 0.3 in 0 and 0.7 in 1
+    return count_satisfied(matrix, combination > 0.5)
 
 def choose_swarm_size(num_vars: int) -> int:
     if num_vars <= 30:
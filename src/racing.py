@@ -0,0 +1,150 @@
+"""
+Statistical racing of algorithm configurations (F-race style).
+
+Instead of running every configuration (each ALGORITHMS entry of a runner) for all seeds, race() runs the seeds
+in rounds, instance by instance:
+
+1. every configuration still in the race runs the next seeds (first_round seeds, then round_size per round),
+   all configurations on the same seeds
+2. the configurations of each instance are tested with the tests of main.py (see analysis.py): Kruskal-Wallis
+   over the survivors (skipped with two survivors), and when it is significant, two-sided Mann-Whitney tests of
+   the best configuration (best mean of `metric`) against every other one, Holm-corrected (`correction`)
+3. configurations significantly worse than the best are dropped from that instance
+4. the race of an instance ends when one configuration is left or its runs are used up
+
+With reinvest=False every survivor stops at the runs of the campaign (the dropped runs are simply saved).
+With reinvest=True the runs saved by eliminations go to the survivors: the race continues past the campaign's
+runs (new seeds) until the instance has used as many runs as the full campaign would have.
+"""
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.analysis import GroupedResults, adjust_p_values, kruskal_wallis, pairwise_mann_whitney
+from src.experiment_runner import Task
+from src.results_store import task_key
+
+FIRST_ROUND = 5  ## seeds every configuration runs before the first test
+ROUND_SIZE = 1   ## seeds added per round afterwards
+ALPHA = 0.05
+
+
+def dominated_configurations(grouped, metric, maximize=True, alpha=ALPHA, correction="holm"):
+    """
+    :param grouped: analysis.GroupedResults of the configurations still racing
+    :return: dict instance -> list of configurations significantly worse than the best one of that instance
+    """
+    distinct, counts = grouped.counts(metric)
+    sizes = counts.sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        means = counts @ distinct / sizes
+    omnibus = kruskal_wallis(grouped, metric).set_index("instance")
+    pairs = pairwise_mann_whitney(grouped, metric, correction, alpha)
+
+    dominated = {}
+    for i, instance in enumerate(grouped.instances):
+        present = np.flatnonzero(sizes[i] > 0)
+        if len(present) < 2:
+            continue
+        if len(present) > 2 and not omnibus.loc[instance, "p_value"] < alpha:
+            continue
+        scores = means[i, present] if maximize else -means[i, present]
+        best = grouped.algorithms[present[np.argmax(scores)]]
+
+        tests = pairs[(pairs["instance"] == instance) & ((pairs["algorithm_a"] == best) | (pairs["algorithm_b"] == best))]
+        best_first = (tests["algorithm_a"] == best).to_numpy()
+        u_best = np.where(best_first, tests["U"], tests["n_a"] * tests["n_b"] - tests["U"]) ## U of the best configuration
+        half = tests["n_a"].to_numpy() * tests["n_b"].to_numpy() / 2
+        worse = u_best > half if maximize else u_best < half
+        adjusted = adjust_p_values(tests["p_value"].to_numpy(), correction)[0] ## family: best vs each other one
+        others = np.where(best_first, tests["algorithm_b"], tests["algorithm_a"])
+        dominated[instance] = [other for other, p, is_worse in zip(others, adjusted, worse) if is_worse and p < alpha]
+    return dominated
+
+
+def race(tasks, execute, metric="best_fitness_satisfied", maximize=True, first_round=FIRST_ROUND, round_size=ROUND_SIZE,
+         alpha=ALPHA, correction="holm", reinvest=False, completed_rows=None, on_eliminate=None):
+    """
+    :param tasks: campaign tasks (see experiment_runner.expand_grid), each algorithm is a configuration
+    :param execute: function(list of Task) -> list of result rows in the same order (e.g. a run_tasks wrapper)
+    :param metric: result column compared, higher is better unless maximize=False
+    :param completed_rows: rows already in the results store (results_store.ResultsStore.rows()), not run again
+    :param on_eliminate: optional callback(instance_id, algorithm, runs), called when a configuration is dropped
+    :return: (rows of every run the race used, dict instance_id -> dict algorithm -> number of runs when it was
+    dropped, None for the configurations that survived)
+    """
+    completed = {}
+    for row in completed_rows or []:
+        completed[task_key(row["algorithm"], row["instance_id"], row["seed"], json.loads(row["params"]))] = row
+
+    races = {} ## instance_id -> {algorithm: [tasks ordered by run]}
+    for task in tasks:
+        races.setdefault(task.instance_id, {}).setdefault(task.algorithm, []).append(task)
+    for configurations in races.values():
+        for runs in configurations.values():
+            runs.sort(key=lambda task: task.run)
+
+    alive = {instance_id: list(configurations) for instance_id, configurations in races.items()}
+    eliminated = {instance_id: {} for instance_id in races}
+    budget = {instance_id: sum(len(runs) for runs in configurations.values()) for instance_id, configurations in races.items()}
+    done = {instance_id: 0 for instance_id in races}  ## runs done by each survivor
+    used = {instance_id: 0 for instance_id in races}  ## runs done by every configuration
+    results = {}  ## (instance_id, algorithm) -> metric of every run so far
+    all_rows = []
+
+    def next_task(instance_id, algorithm, run):
+        runs = races[instance_id][algorithm]
+        if run < len(runs):
+            return runs[run]
+        last = runs[-1] ## reinvested run, past the campaign's runs
+        return Task(last.algorithm, last.instance_id, last.cnf_path, run, last.seed + run - last.run, last.params)
+
+    while True:
+        round_tasks = []
+        for instance_id, survivors in alive.items():
+            remaining = min(len(races[instance_id][algorithm]) for algorithm in survivors) - done[instance_id] ## campaign runs left
+            if len(survivors) == 1: ## the race is over, the winner completes the campaign's runs
+                size = remaining
+            else:
+                size = first_round if done[instance_id] == 0 else round_size
+                if reinvest:
+                    size = min(size, (budget[instance_id] - used[instance_id]) // len(survivors))
+                else:
+                    size = min(size, remaining)
+            if size <= 0:
+                continue
+            for algorithm in survivors:
+                for run in range(done[instance_id], done[instance_id] + size):
+                    round_tasks.append(next_task(instance_id, algorithm, run))
+            done[instance_id] += size
+            used[instance_id] += size * len(survivors)
+        if not round_tasks:
+            break
+
+        keys = [task_key(task.algorithm, task.instance_id, task.seed, task.params) for task in round_tasks]
+        missing = [task for task, key in zip(round_tasks, keys) if key not in completed]
+        if missing:
+            for task, row in zip(missing, execute(missing)):
+                completed[task_key(task.algorithm, task.instance_id, task.seed, task.params)] = row
+        for task, key in zip(round_tasks, keys):
+            row = completed[key]
+            results.setdefault((task.instance_id, task.algorithm), []).append(row[metric])
+            all_rows.append(row)
+
+        racing = [instance_id for instance_id, survivors in alive.items() if len(survivors) > 1]
+        frame = pd.DataFrame([(str(instance_id), algorithm, value) for instance_id in racing for algorithm in alive[instance_id]
+                              for value in results[(instance_id, algorithm)]], columns=["instance", "algorithm", metric])
+        if frame.empty:
+            continue
+        dominated = dominated_configurations(GroupedResults.from_dataframe(frame, [metric]), metric, maximize, alpha, correction)
+        for instance_id in racing:
+            for algorithm in dominated.get(str(instance_id), []):
+                alive[instance_id].remove(algorithm)
+                eliminated[instance_id][algorithm] = done[instance_id]
+                if on_eliminate is not None:
+                    on_eliminate(instance_id, algorithm, done[instance_id])
+
+    summary = {instance_id: {algorithm: eliminated[instance_id].get(algorithm) for algorithm in races[instance_id]} for instance_id in races}
+    return all_rows, summary
@@ -0,0 +1,204 @@
+"""
+Indexed SQLite catalog of experiment results across campaigns.
+
+One normalised schema for every algorithm family:
+- campaigns:      one row per campaign (e.g. "hillclimbing", "sa", "pso"), with family and creation metadata
+- instances:      one row per CNF file (name, num_vars, num_clauses)
+- parameter_sets: one row per distinct (algorithm, parameters) combination, parameters holds them one per row
+- runs:           one row per finished run (campaign, algorithm, instance, parameter set, run, seed, results)
+- run_metrics:    any other column a runner reports (e.g. num_particles), one row per (run, name)
+
+runs is indexed on algorithm, instance and seed, so comparing campaigns and parameter sets is one query
+(see runs()) instead of loading every workbook into pandas. The runners write to it as runs finish,
+next to the JSON lines store (results_store.py).
+"""
+
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from src.experiment_runner import Task
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS campaigns (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    family TEXT,
+    description TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS instances (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    num_vars INTEGER,
+    num_clauses INTEGER
+);
+CREATE TABLE IF NOT EXISTS parameter_sets (
+    id INTEGER PRIMARY KEY,
+    algorithm TEXT NOT NULL,
+    params_json TEXT NOT NULL,
+    UNIQUE (algorithm, params_json)
+);
+CREATE TABLE IF NOT EXISTS parameters (
+    parameter_set_id INTEGER NOT NULL REFERENCES parameter_sets (id),
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (parameter_set_id, name)
+);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    campaign_id INTEGER NOT NULL REFERENCES campaigns (id),
+    algorithm TEXT NOT NULL,
+    instance_id INTEGER NOT NULL REFERENCES instances (id),
+    instance_label TEXT,
+    parameter_set_id INTEGER NOT NULL REFERENCES parameter_sets (id),
+    run INTEGER NOT NULL,
+    seed INTEGER NOT NULL,
+    best_fitness_satisfied INTEGER,
+    evaluations_used INTEGER,
+    recorded_at TEXT NOT NULL,
+    UNIQUE (campaign_id, algorithm, instance_id, parameter_set_id, seed)
+);
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    name TEXT NOT NULL,
+    value,
+    PRIMARY KEY (run_id, name)
+);
+CREATE INDEX IF NOT EXISTS runs_algorithm ON runs (algorithm);
+CREATE INDEX IF NOT EXISTS runs_instance ON runs (instance_id);
+CREATE INDEX IF NOT EXISTS runs_seed ON runs (seed);
+CREATE INDEX IF NOT EXISTS runs_parameter_set ON runs (parameter_set_id);
+"""
+
+## row columns stored in the runs / instances tables, every other column goes to run_metrics
+_RUN_COLUMNS = {"algorithm", "instance_id", "cnf_file", "run", "seed", "num_vars", "num_clauses",
+                "best_fitness_satisfied", "evaluations_used"}
+
+
+def instance_name(cnf_path):
+    """uf20-01 for ../../cnf_files/uf20-01.cnf, the same instance has the same name whatever the relative path."""
+    return os.path.splitext(os.path.basename(cnf_path))[0]
+
+
+class ResultsCatalog:
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def campaign(self, name, family=None, description=None):
+        """:return: id of the campaign called name, created on first use"""
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR IGNORE INTO campaigns (name, family, description, created_at) VALUES (?, ?, ?, ?)",
+                (name, family, description, _now()))
+        return self.connection.execute("SELECT id FROM campaigns WHERE name = ?", (name,)).fetchone()[0]
+
+    def _instance(self, cnf_path, num_vars, num_clauses):
+        name = instance_name(cnf_path)
+        self.connection.execute("INSERT OR IGNORE INTO instances (name, num_vars, num_clauses) VALUES (?, ?, ?)",
+                                (name, num_vars, num_clauses))
+        return self.connection.execute("SELECT id FROM instances WHERE name = ?", (name,)).fetchone()[0]
+
+    def _parameter_set(self, algorithm, params):
+        params_json = json.dumps(params, sort_keys=True)
+        cursor = self.connection.execute("INSERT OR IGNORE INTO parameter_sets (algorithm, params_json) VALUES (?, ?)",
+                                         (algorithm, params_json))
+        parameter_set_id = self.connection.execute(
+            "SELECT id FROM parameter_sets WHERE algorithm = ? AND params_json = ?", (algorithm, params_json)).fetchone()[0]
+        if cursor.rowcount:
+            self.connection.executemany("INSERT INTO parameters (parameter_set_id, name, value) VALUES (?, ?, ?)",
+                                        [(parameter_set_id, name, _to_sql(value)) for name, value in sorted(params.items())])
+        return parameter_set_id
+
+    def record_run(self, campaign_id, task, row):
+        """
+        Stores one finished run, replacing a previous run with the same campaign, algorithm, instance, parameters and seed.
+        :param task: experiment_runner.Task of the run (its params identify the parameter set)
+        :param row: result row returned by experiment_runner.execute_task
+        """
+        with self.connection:
+            instance_id = self._instance(row["cnf_file"], row.get("num_vars"), row.get("num_clauses"))
+            parameter_set_id = self._parameter_set(row["algorithm"], task.params)
+            self.connection.execute(
+                "DELETE FROM run_metrics WHERE run_id IN (SELECT id FROM runs WHERE campaign_id = ? AND algorithm = ? "
+                "AND instance_id = ? AND parameter_set_id = ? AND seed = ?)",
+                (campaign_id, row["algorithm"], instance_id, parameter_set_id, row["seed"]))
+            cursor = self.connection.execute(
+                "INSERT OR REPLACE INTO runs (campaign_id, algorithm, instance_id, instance_label, parameter_set_id, run, seed, "
+                "best_fitness_satisfied, evaluations_used, recorded_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (campaign_id, row["algorithm"], instance_id, str(row["instance_id"]), parameter_set_id, row["run"], row["seed"],
+                 _to_sql(row.get("best_fitness_satisfied")), _to_sql(row.get("evaluations_used")), _now()))
+            metrics = [(cursor.lastrowid, name, _to_sql(value)) for name, value in row.items()
+                       if name not in _RUN_COLUMNS and not pd.isna(value)] ## empty cells of merged workbooks are skipped
+            self.connection.executemany("INSERT INTO run_metrics (run_id, name, value) VALUES (?, ?, ?)", metrics)
+
+    def query(self, sql, parameters=()):
+        """Runs any SELECT on the catalog and returns a DataFrame."""
+        return pd.read_sql_query(sql, self.connection, params=parameters)
+
+    def runs(self, algorithm=None, instance=None, campaign=None, columns=None):
+        """
+        One row per run with the normalised columns: campaign, algorithm, instance, params, run, seed,
+        num_vars, num_clauses, best_fitness_satisfied, evaluations_used.
+        Filters use the indexes, columns selects a subset of them.
+        """
+        selected = {
+            "campaign": "c.name", "algorithm": "r.algorithm", "instance": "i.name", "instance_id": "r.instance_label",
+            "params": "p.params_json", "run": "r.run", "seed": "r.seed", "num_vars": "i.num_vars",
+            "num_clauses": "i.num_clauses", "best_fitness_satisfied": "r.best_fitness_satisfied",
+            "evaluations_used": "r.evaluations_used",
+        }
+        if columns is not None:
+            selected = {name: selected[name] for name in columns}
+
+        conditions, parameters = [], []
+        for column, value in (("r.algorithm", algorithm), ("i.name", instance), ("c.name", campaign)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                parameters.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        sql = (f"SELECT {', '.join(f'{expression} AS {name}' for name, expression in selected.items())} "
+               "FROM runs r JOIN campaigns c ON c.id = r.campaign_id JOIN instances i ON i.id = r.instance_id "
+               f"JOIN parameter_sets p ON p.id = r.parameter_set_id {where} ORDER BY r.id")
+        return self.query(sql, parameters)
+
+    def import_excel(self, xlsx_path, campaign, family=None, algorithm=None):
+        """
+        Loads an old results workbook into the catalog. Every sheet is read, sheets without an algorithm column
+        (like the SA one) use `algorithm`, or the sheet name when it is None.
+        """
+        campaign_id = self.campaign(campaign, family, f"imported from {xlsx_path}")
+        for sheet, df in pd.read_excel(xlsx_path, sheet_name=None).items():
+            if "best_fitness_satisfied" not in df.columns:
+                continue
+            for row in df.to_dict("records"):
+                row.setdefault("algorithm", algorithm or sheet)
+                row.setdefault("cnf_file", f"instance-{row.get('instance_id')}")
+                row.setdefault("run", row.get("seed"))
+                params = {name: row[name] for name in ("max_evaluations", "max_k", "num_informants") if name in row and pd.notna(row[name])}
+                task = Task(row["algorithm"], row["instance_id"], row["cnf_file"], row["run"], row["seed"], params)
+                self.record_run(campaign_id, task, row)
+
+
+def _to_sql(value):
+    """numpy scalars -> Python scalars, sqlite3 only binds builtin types."""
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
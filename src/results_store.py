@@ -0,0 +1,88 @@
+"""
+Streaming, crash-safe results store (JSON lines).
+
+Every finished run is appended to the store as one JSON line and flushed to disk right away, so a crash
+or Ctrl-C only loses the runs that were still executing. On restart, pending() drops the tasks whose
+(algorithm, instance, seed, params) combination is already in the store, and the campaign resumes.
+
+The Excel workbook consumed by main.py is an export step built from the store (export_excel).
+"""
+
+import json
+import os
+
+import pandas as pd
+
+
+def task_key(algorithm, instance_id, seed, params):
+    """Identity of a run: same algorithm, instance, seed and parameters means same result."""
+    return str(algorithm), str(instance_id), int(seed), json.dumps(params, sort_keys=True)
+
+
+class ResultsStore:
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._drop_partial_line()
+
+    def _drop_partial_line(self):
+        """A crash in the middle of a write leaves a line without "\\n", cut it so appends stay valid JSON lines."""
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def rows(self):
+        """Every stored row (dicts), in the order they were written."""
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, "r", encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def completed_keys(self):
+        return {task_key(row["algorithm"], row["instance_id"], row["seed"], json.loads(row["params"])) for row in self.rows()}
+
+    def pending(self, tasks):
+        """Tasks (see experiment_runner.Task) that are not in the store yet."""
+        done = self.completed_keys()
+        return [task for task in tasks if task_key(task.algorithm, task.instance_id, task.seed, task.params) not in done]
+
+    def append(self, task, row):
+        """Writes one finished run and forces it to disk before returning."""
+        record = dict(row, params=json.dumps(task.params, sort_keys=True))
+        line = json.dumps(record, default=_to_builtin) + "\n"
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def to_dataframe(self, tasks=None, include_all=False):
+        """
+        :param tasks: optional list of tasks, only their rows are kept (runs of older parameters stay in the store
+        but not in the export), ordered like the tasks (campaign order) instead of completion order
+        :param include_all: keep the rows that are not in tasks too, after the tasks' rows (e.g. the extra seeds of
+        a reinvesting race, see racing.py)
+        """
+        rows = self.rows()
+        if tasks is not None:
+            order = {task_key(task.algorithm, task.instance_id, task.seed, task.params): i for i, task in enumerate(tasks)}
+            positions = [order.get(task_key(row["algorithm"], row["instance_id"], row["seed"], json.loads(row["params"])), len(order))
+                         for row in rows]
+            rows = [row for position, row in sorted(zip(positions, rows), key=lambda pair: pair[0])
+                    if include_all or position < len(order)]
+        return pd.DataFrame(rows).drop(columns=["params"], errors="ignore")
+
+    def export_excel(self, xlsx_path, tasks=None, include_all=False):
+        os.makedirs(os.path.dirname(xlsx_path) or ".", exist_ok=True)
+        self.to_dataframe(tasks, include_all).to_excel(xlsx_path, index=False)
+
+
+def _to_builtin(value):
+    """json fallback for numpy scalars returned by the algorithms."""
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
@@ -6,6 +6,7 @@ Main.py acts as the UI, to test the algorithm. The real experiments were done in
 import utils
 from src import utils
 from simulated_annealing import simulated_annealing
+from parallel_tempering import parallel_tempering, geometric_temperatures
 
 
 CNF_FILES = {
@@ -22,6 +23,13 @@ alfa = 0.9999930923
 bits_to_perturbate = 1
 energy_threshold = 0
 
+## Parameters for parallel tempering
+num_replicas = 8
+min_replica_T = 0.05
+max_replica_T = 1.5
+swap_interval = 1000
+seed = 0  ## seed of the initial states, replica segments and exchanges, same seed same run
+
 def main():
     print("Select CNF file:")
     print("1 - uf20-01.cnf")
@@ -34,16 +42,22 @@ def main():
         return
 
     cnf_path = CNF_FILES[cnf_choice]
-    clauses, num_clauses, num_vars = utils.read_cnf(cnf_path)
+    clauses, num_clauses, num_vars = utils.read_cnf(cnf_path, as_instance=True, cache=True) ## memory-mapped after the first load
     print(f"\nLoaded: {cnf_path} — vars={num_vars}, clauses={num_clauses}")
 
     print("\nSelect algorithm:")
     print("1 - SA")
-    x = int(input("Enter choice: (1): "))
+    print("2 - Parallel tempering SA")
+    x = int(input("Enter choice: (1-2): "))
     if x == 1:
         energy, state, evaluations = simulated_annealing(clauses, num_vars, max_evaluations, min_T, max_T, alfa, bits_to_perturbate, energy_threshold )
         print(f"\nBest Energy Found: {energy}")
         print(evaluations)
+    elif x == 2:
+        temperatures = geometric_temperatures(min_replica_T, max_replica_T, num_replicas)
+        energy, state, evaluations = parallel_tempering(clauses, num_vars, max_evaluations, temperatures, bits_to_perturbate, energy_threshold, swap_interval, seed=seed)
+        print(f"\nBest Energy Found: {energy}")
+        print(evaluations)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
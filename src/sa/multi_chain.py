@@ -0,0 +1,210 @@
+"""
+Multi-chain simulated annealing: C independent SA chains advanced in lockstep.
+
+The chains live in a (C, num_vars) state matrix and a (C, num_clauses) matrix of true literal counts, so every step
+is a handful of numpy operations over all chains instead of C scalar loops:
+
+1. proposals:  each chain draws the variables to flip (bits_to_perturbate per step) and one uniform number
+2. delta:      the clauses of a flipped variable are gathered from a padded occurrence table (see OccurrenceTable),
+               delta energy = clauses that become unsatisfied - clauses that become satisfied
+3. acceptance: Metropolis, exp(-delta / T) > uniform (tested as delta < T * -log(uniform)), for every chain at once
+4. accepted chains keep the flips (counts and states are updated in place), rejected multi-bit moves are undone
+
+All chains share the temperature schedule (T = max_temperature * alfa^step). Each chain keeps its own best energy
+and best state, and a chain retires (is dropped from the matrices) as soon as it reaches energy_threshold or its
+termination criteria fire, so the remaining steps only pay for the chains still running.
+
+Every chain draws from its own np.random.default_rng(seed), in blocks of RANDOM_BLOCK steps, so the result of a
+chain only depends on its seed and parameters, not on the other chains of the call. The random stream is not the
+one of simulated_annealing (which draws from the global np.random), so the same seed gives a different run.
+"""
+
+import numpy as np
+
+from src.clause_matrix import compile_clauses
+from src.observers import TEMPERATURE_INTERVAL
+
+RANDOM_BLOCK = 1024        ## steps of random numbers drawn per chain at once
+TERMINATION_INTERVAL = 100 ## steps between two checks of the per-chain termination criteria
+PADDING_COUNT = 1 << 20    ## true literal count of the padding clause, never reaches 0
+SIGNS = np.array([-1, 1], dtype=np.int32)
+
+
+class OccurrenceTable:
+    def __init__(self, clauses, num_vars):
+        """
+        Padded occurrence lists of every variable:
+        - clauses[v]: (D,) clause indexes containing v, padded with the dummy clause num_clauses
+        - change[v]:  (D,) change of the clause's true literal count when v is flipped from 1 to 0
+                      (minus that when flipped from 0 to 1), 0 on the padding
+        A variable appearing several times in a clause (x or -x, x or x) gets one entry with the summed change.
+        """
+        matrix = compile_clauses(clauses, num_vars)
+        num_clauses = matrix.num_clauses
+        clause_index = np.broadcast_to(np.arange(num_clauses)[:, None], matrix.indices.shape)
+        change = np.where(matrix.negated, 1, -1) ## a positive literal loses its truth going 1 -> 0, a negated one gains it
+        if matrix.mask is not None:
+            variables, clause_index, change = matrix.indices[matrix.mask], clause_index[matrix.mask], change[matrix.mask]
+        else:
+            variables, clause_index, change = matrix.indices.ravel(), clause_index.ravel(), change.ravel()
+
+        keys, inverse = np.unique(variables.astype(np.int64) * num_clauses + clause_index, return_inverse=True)
+        summed = np.bincount(inverse, weights=change).astype(np.int32)
+        key_variables = keys // num_clauses
+        occurrences = np.bincount(key_variables, minlength=num_vars)
+        width = max(1, int(occurrences.max(initial=0)))
+        slots = np.arange(len(keys)) - np.repeat(np.cumsum(occurrences) - occurrences, occurrences) ## position in its row
+
+        self.num_vars = num_vars
+        self.num_clauses = num_clauses
+        self.clauses = np.full((num_vars, width), num_clauses, dtype=np.intp)
+        self.change = np.zeros((num_vars, width), dtype=np.int32)
+        self.clauses[key_variables, slots] = keys % num_clauses
+        self.change[key_variables, slots] = summed
+        self.matrix = matrix
+
+
+def multi_chain_simulated_annealing(clauses, num_vars, seeds, max_evaluations, min_temperature, max_temperature, alfa,
+                                    bits_to_perturbate, energy_threshold, observers=None, terminations=None):
+    """
+    Runs one SA chain per seed, all in lockstep.
+
+    :param clauses: clauses of the instance (list, ClauseMatrix or Instance)
+    :param num_vars: Number of variables in clauses across all instance (int value)
+    :param seeds: one seed per chain (list of ints)
+    :param max_evaluations, min_temperature, max_temperature, alfa, bits_to_perturbate, energy_threshold: as in
+    simulated_annealing, applied to every chain
+    :param observers: optional list of observers.Observer, one per chain (or None entries). They receive start,
+    improvement, temperature and finish events; there are no per-move acceptance events, which would cost a Python
+    call per chain and step
+    :param terminations: optional list of termination.TerminationCriteria, one per chain (or None entries),
+    checked every TERMINATION_INTERVAL steps
+    :return: list of (best_energy, best_state, evaluations) per chain, in the order of seeds, like simulated_annealing
+    """
+    table = OccurrenceTable(clauses, num_vars)
+    num_clauses = table.num_clauses
+    num_chains = len(seeds)
+    observers = list(observers) if observers is not None else [None] * num_chains
+    terminations = list(terminations) if terminations is not None else [None] * num_chains
+
+    generators = [np.random.default_rng(seed) for seed in seeds]
+    states = np.array([generator.integers(0, 2, size=num_vars) for generator in generators], dtype=np.int8).reshape(num_chains, num_vars)
+
+    truth = (states[:, table.matrix.indices] == 1) != table.matrix.negated ## (C, num_clauses, k) literal truth
+    if table.matrix.mask is not None:
+        truth &= table.matrix.mask
+    counts = np.full((num_chains, num_clauses + 1), PADDING_COUNT, dtype=np.int32) ## last column is the padding clause
+    counts[:, :num_clauses] = truth.sum(axis=-1)
+    energies = np.count_nonzero(counts[:, :num_clauses] == 0, axis=1).astype(np.int64)
+
+    best_energies = energies.copy()
+    best_states = states.copy()
+    chain_evaluations = np.ones(num_chains, dtype=np.int64)
+    for chain in range(num_chains):
+        if observers[chain] is not None:
+            observers[chain].on_start(num_vars, num_clauses)
+        if terminations[chain] is not None:
+            terminations[chain].start()
+
+    def finish_chains(chains, evaluations):
+        chain_evaluations[chains] = evaluations
+        for chain in chains:
+            if observers[chain] is not None:
+                observers[chain].on_finish(evaluations, num_clauses - int(best_energies[chain]))
+
+    active = np.arange(num_chains) ## chain id of each row of the matrices
+    active_best = best_energies.copy() ## best energy of each row
+    rows = np.arange(num_chains)
+    count_offsets = (rows * (num_clauses + 1))[:, None] ## flat index of the first count / state of each row
+    state_offsets = rows * num_vars
+    temperature = max_temperature
+    evaluations = 1
+    step = RANDOM_BLOCK
+    check_retirement = True
+    stopped = np.zeros(num_chains, dtype=bool) ## rows whose termination criteria fired
+
+    while True:
+        if evaluations >= max_evaluations or temperature <= min_temperature:
+            break
+        if evaluations % TERMINATION_INTERVAL == 0 and any(terminations[chain] is not None for chain in active):
+            for row, chain in enumerate(active):
+                if terminations[chain] is not None and terminations[chain].should_stop(evaluations, num_clauses - active_best[row]):
+                    stopped[row] = True
+                    check_retirement = True
+        if check_retirement: ## retire finished chains, the others continue on smaller matrices
+            check_retirement = False
+            retiring = (active_best <= energy_threshold) | stopped
+            if retiring.any():
+                finish_chains(active[retiring], evaluations)
+                keep = ~retiring
+                active, active_best, states, counts, energies = active[keep], active_best[keep], states[keep], counts[keep], energies[keep]
+                stopped = stopped[keep]
+                if step < RANDOM_BLOCK:
+                    proposals, thresholds = proposals[:, keep], thresholds[:, keep]
+                rows = np.arange(len(active))
+                count_offsets = (rows * (num_clauses + 1))[:, None]
+                state_offsets = rows * num_vars
+                if not len(active):
+                    break
+
+        if step == RANDOM_BLOCK: ## next block of random numbers of every running chain, (steps, chains) layout
+            proposals = np.stack([generators[chain].integers(0, num_vars, size=(RANDOM_BLOCK, bits_to_perturbate)) for chain in active], axis=1)
+            ## exp(-delta / T) > u  <=>  delta < T * -log(u), so only -log(u) is kept
+            with np.errstate(divide="ignore"):
+                thresholds = -np.log(np.stack([generators[chain].random(RANDOM_BLOCK) for chain in active], axis=1))
+            step = 0
+
+        flat_counts = counts.ravel()
+        flat_states = states.ravel()
+        deltas = 0
+        moves = []
+        for bit in range(bits_to_perturbate): ## flips are applied one after the other, like perturbate
+            state_positions = state_offsets + proposals[step, :, bit]
+            signs = SIGNS[flat_states[state_positions]] ## +1 when the variable goes 1 -> 0, -1 when it goes 0 -> 1
+            positions = np.take(table.clauses, proposals[step, :, bit], axis=0) + count_offsets
+            changes = np.take(table.change, proposals[step, :, bit], axis=0) * signs[:, None]
+            before = flat_counts[positions]
+            after = before + changes
+            deltas = deltas + ((after == 0).view(np.int8) - (before == 0).view(np.int8)).sum(axis=1)
+            if bits_to_perturbate > 1: ## tentatively keep the flip, rejected chains undo it below
+                flat_counts[positions] = after
+                flat_states[state_positions] ^= 1
+                moves.append((state_positions, positions, changes))
+
+        ## Metropolis acceptance of every chain, improving moves are always accepted
+        accepted = deltas < temperature * thresholds[step]
+        if bits_to_perturbate == 1:
+            flat_counts[positions] = np.where(accepted[:, None], after, before)
+            flat_states[state_positions] ^= accepted.view(np.int8)
+        else:
+            rejected = ~accepted
+            for state_positions, positions, changes in reversed(moves):
+                flat_counts[positions] -= changes * rejected[:, None]
+                flat_states[state_positions] ^= rejected.view(np.int8)
+        energies += deltas * accepted
+
+        improved = energies < active_best
+        if improved.any():
+            improved = np.flatnonzero(improved)
+            chains = active[improved]
+            active_best[improved] = energies[improved]
+            best_energies[chains] = energies[improved]
+            best_states[chains] = states[improved]
+            check_retirement = True
+            for chain in chains:
+                if observers[chain] is not None:
+                    observers[chain].on_improvement(evaluations, num_clauses - best_energies[chain])
+
+        temperature *= alfa
+        evaluations += 1
+        step += 1
+        if evaluations % TEMPERATURE_INTERVAL == 0:
+            for chain in active:
+                if observers[chain] is not None:
+                    observers[chain].on_temperature(evaluations, temperature)
+
+    finish_chains(active, evaluations)
+    results = []
+    for chain in range(num_chains):
+        results.append((int(best_energies[chain]), best_states[chain].astype(int), int(chain_evaluations[chain])))
+    return results
@@ -0,0 +1,132 @@
+"""
+Parallel tempering (replica-exchange) simulated annealing.
+
+K replicas of the SA chain (run_chain in simulated_annealing.py) run at a fixed ladder of temperatures,
+one per process of a pool. Every `swap_interval` steps the replicas come back to the main process, which
+tries to exchange the states of adjacent temperatures with the Metropolis criterion:
+
+P(swap i <-> j) = min(1, exp((1/T_i - 1/T_j) * (E_i - E_j)))
+
+so good states travel down to the cold replicas while hot replicas keep exploring.
+
+Key points:
+- evaluations are counted across all replicas, max_evaluations is the total budget
+- stops as soon as any replica reaches energy_threshold
+- every replica segment is seeded from `seed`, so results don't depend on the number of processes
+"""
+
+import multiprocessing
+
+import numpy as np
+
+from src.incremental_scorer import IncrementalScorer
+from src.sa.simulated_annealing import run_chain
+
+_worker_scorer = None ## one scorer per worker process, built once by the pool initializer
+
+
+def _init_worker(clauses, num_vars):
+    global _worker_scorer
+    _worker_scorer = IncrementalScorer(clauses, num_vars)
+
+
+def _run_replica(task):
+    state, temperature, steps, bits_to_perturbate, energy_threshold, seed = task
+    ## run_chain draws from the global numpy generator, like simulated_annealing: seed it for the segment and give
+    ## the caller its generator back (with processes=1 the segment runs in the caller's process)
+    caller_state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        energy = _worker_scorer.num_clauses - _worker_scorer.reset(state.tolist())
+        best_energy, best_state, evaluations, energy, _ = run_chain(_worker_scorer, energy, temperature, steps, 0.0, 1.0,
+                                                                    bits_to_perturbate, energy_threshold)
+    finally:
+        np.random.set_state(caller_state)
+    return best_energy, best_state, evaluations, energy, np.array(_worker_scorer.combination)
+
+
+def geometric_temperatures(min_temperature, max_temperature, num_replicas):
+    """Temperature ladder with a constant ratio between neighbours, coldest first."""
+    return list(np.geomspace(min_temperature, max_temperature, num_replicas))
+
+
+def parallel_tempering(clauses, num_vars, max_evaluations, temperatures, bits_to_perturbate, energy_threshold,
+                       swap_interval=1000, processes=None, seed=None, observer=None):
+    """
+    :param clauses: clauses of the instance (list, ClauseMatrix or Instance)
+    :param num_vars: Number of variables in clauses across all instance (int value)
+    :param max_evaluations: Max objective function evaluations, summed over all replicas (int value)
+    :param temperatures: fixed temperature of each replica (list of floats, e.g. geometric_temperatures(0.05, 2, 8))
+    :param bits_to_perturbate: the number of bits to perturb (int value)
+    :param energy_threshold: Energy threshold, 0 being a global optima (int value)
+    :param swap_interval: steps each replica runs between two exchange attempts (int value)
+    :param processes: number of worker processes, defaults to one per replica (capped by the cpu count),
+    1 runs every replica in the current process
+    :param seed: seed of the initial states, of the replica segments and of the exchanges
+    :param observer: optional observers.Observer, receives an improvement event when an exchange round brings a new best
+    (the replicas run in other processes, so there are no per-move events)
+    :return: (best_energy, best_state, evaluations), like simulated_annealing
+    """
+    num_replicas = len(temperatures)
+    rng = np.random.default_rng(seed)
+    num_clauses = len(clauses)
+
+    states = [rng.integers(0, 2, size=num_vars) for _ in range(num_replicas)]
+    scorer = IncrementalScorer(clauses, num_vars)
+    energies = [num_clauses - scorer.reset(state.tolist()) for state in states]
+    evaluations = num_replicas
+
+    best_replica = int(np.argmin(energies))
+    best_energy = energies[best_replica]
+    best_state = states[best_replica].copy()
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+
+    if processes is None:
+        processes = min(num_replicas, multiprocessing.cpu_count())
+    pool = None
+    if processes > 1:
+        pool = multiprocessing.Pool(processes, initializer=_init_worker, initargs=(clauses, num_vars))
+    else:
+        _init_worker(clauses, num_vars)
+
+    try:
+        exchange_round = 0
+        while evaluations < max_evaluations and best_energy > energy_threshold:
+            steps = min(swap_interval, (max_evaluations - evaluations) // num_replicas)
+            if steps == 0:
+                break
+
+            tasks = [(states[r], temperatures[r], steps, bits_to_perturbate, energy_threshold, int(rng.integers(2**32)))
+                     for r in range(num_replicas)]
+            results = pool.map(_run_replica, tasks) if pool is not None else [_run_replica(task) for task in tasks]
+
+            for r, (replica_best_energy, replica_best_state, used, energy, state) in enumerate(results):
+                evaluations += used
+                energies[r] = energy
+                states[r] = state
+                if replica_best_energy < best_energy:
+                    best_energy = replica_best_energy
+                    best_state = replica_best_state
+                    if observer is not None:
+                        observer.on_improvement(evaluations, num_clauses - best_energy)
+
+            if best_energy <= energy_threshold: ## some replica found the target, stop every chain
+                break
+
+            ## exchange attempts between neighbours, alternating even and odd pairs
+            for i in range(exchange_round % 2, num_replicas - 1, 2):
+                j = i + 1
+                log_probability = (1 / temperatures[i] - 1 / temperatures[j]) * (energies[i] - energies[j])
+                if log_probability >= 0 or rng.random() < np.exp(log_probability):
+                    states[i], states[j] = states[j], states[i]
+                    energies[i], energies[j] = energies[j], energies[i]
+            exchange_round += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    if observer is not None:
+        observer.on_finish(evaluations, num_clauses - best_energy)
+    return best_energy, best_state, evaluations
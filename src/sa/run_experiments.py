@@ -1,11 +1,17 @@
+import functools
 import os
-import random
-from src import utils
-import numpy as np
-import pandas as pd
-import utils
+import sys
+from src.experiment_runner import expand_grid, run_task_batches, run_tasks
+from src.results_store import ResultsStore
+from src.results_catalog import ResultsCatalog
+from src.observers import MetricsObserver, ObserverGroup
+from src.convergence_trace import TraceObserver, trace_path
+from src.termination import split_termination_params
+from src.racing import race
+from src.tuning import run_tuning
 
 from simulated_annealing import simulated_annealing
+from multi_chain import multi_chain_simulated_annealing
 
 CNF_FILES = {
     "1": "../cnf_files/uf20-01.cnf",
@@ -15,6 +21,10 @@ CNF_FILES = {
 
 INDEPENDENT_RUNS = 30                 ## number of independent runs
 RESULTS_FILE = "../results/sa_results.xlsx"
+RESULTS_STORE = "../results/sa_results.jsonl"  ## every finished run is appended here, the xlsx is exported from it
+CATALOG_FILE = "../results/catalog.sqlite"  ## SQLite catalog shared by every campaign
+CAMPAIGN = "sa"
+TRACES_DIR = "../results/traces/sa"  ## one best-so-far convergence trace per run, None disables them
 
 ## Simulated Annealing Parameters (adjust as you wish)
 MAX_EVALUATIONS = 1_000_000  ## maximum amount of times evaluate_energy will be called
@@ -24,55 +34,158 @@ ALFA = 0.9999930923          ## cooling to achieve max of 1 million evaluations
 BITS_TO_PERTURBATE = 1       ## number of bits to flip (default : 1)
 ENERGY_THRESHOLD = 0         ## lowest possible amount of energy (clauses unsatisfied)  (default : 0)
 
+## extra stopping criteria of every run (see termination.py), e.g. {"max_wall_time": 60} for an equal-time budget
+TERMINATION = {}
+
+WORKERS = os.cpu_count()     ## worker processes, results don't depend on this value
+
+## statistical racing of the ALGORITHMS entries (see racing.py): None runs all INDEPENDENT_RUNS seeds of every entry,
+## e.g. {"first_round": 5, "round_size": 1, "alpha": 0.05, "reinvest": False} drops the significantly dominated ones
+RACING = None
+
+## hyperparameter tuning of one ALGORITHMS entry with Hyperband (see tuning.py), run `python run_experiments.py tune`;
+## every tuning run is cached in "cache", so an interrupted or repeated tuning only runs what is missing
+TUNING = {
+    "algorithm": "SA",
+    "space": {
+        "min_temperature": ("loguniform", 1e-8, 1e-3),
+        "max_temperature": ("loguniform", 0.1, 10.0),
+        "alfa": ("uniform", 0.9999, 0.99999999),
+        "bits_to_perturbate": [1, 2, 3],
+    },
+    "seeds": range(5),
+    "min_budget": MAX_EVALUATIONS // 81,
+    "max_budget": MAX_EVALUATIONS,
+    "cache": "../results/tuning/sa.jsonl",
+    "history": "../results/tuning/sa_history.xlsx",
+}
+
+
+ALGORITHMS = {
+    "SA": {
+        "max_evaluations": MAX_EVALUATIONS,
+        "min_temperature": MIN_TEMPERATURE,
+        "max_temperature": MAX_TEMPERATURE,
+        "alfa": ALFA,
+        "bits_to_perturbate": BITS_TO_PERTURBATE,
+        "energy_threshold": ENERGY_THRESHOLD,
+        **TERMINATION,
+    },
+}
+
+## algorithms running the INDEPENDENT_RUNS seeds of an instance as one batch of lockstep chains (see multi_chain.py),
+## their seeds give different runs than SA's, results don't depend on WORKERS either
+MULTI_CHAIN_ALGORITHMS = {
+    "SA_multichain": ALGORITHMS["SA"],
+}
+
+
+_DEFAULT = object() ## traces_dir not given: TRACES_DIR as it is when the task runs, not when the module was imported
+
+
+def run_task(task, clauses, num_clauses, num_vars, traces_dir=_DEFAULT):
+    if traces_dir is _DEFAULT:
+        traces_dir = TRACES_DIR
+    metrics = MetricsObserver() ## acceptance rates, final temperature, evaluations per second... become extra columns
+    trace = TraceObserver() if traces_dir is not None else None
+    observer = ObserverGroup(metrics, trace) if trace is not None else metrics
+    params, termination = split_termination_params(task.params) ## termination is None unless TERMINATION sets a criterion
+    best_energy, best_state, evaluations = simulated_annealing(
+        clauses=clauses,
+        num_vars=num_vars,
+        observer=observer,
+        termination=termination,
+        **params,
+    )
+
+    # energy = number of clauses not satisfied
+    best_fitness = num_clauses - best_energy  # number of clauses satisfied
+
+    row = {
+        "best_energy_unsatisfied": best_energy,
+        "best_fitness_satisfied": best_fitness,
+        "evaluations_used": evaluations,
+    }
+    row.update(metrics.metrics())
+    if termination is not None:
+        row["stop_reason"] = termination.reason
+    if trace is not None:
+        row["trace_file"] = trace.save(trace_path(traces_dir, task))
+    return row
+
+
+def run_batch(tasks, clauses, num_clauses, num_vars, traces_dir=_DEFAULT):
+    if traces_dir is _DEFAULT:
+        traces_dir = TRACES_DIR
+    metrics = [MetricsObserver() for _ in tasks] ## no acceptance rate columns, the chains have no per-move events
+    traces = [TraceObserver() if traces_dir is not None else None for _ in tasks]
+    observers = [ObserverGroup(metric, trace) if trace is not None else metric for metric, trace in zip(metrics, traces)]
+    params, _ = split_termination_params(tasks[0].params) ## the tasks of a batch share their params
+    terminations = [split_termination_params(task.params)[1] for task in tasks]
+    results = multi_chain_simulated_annealing(
+        clauses=clauses,
+        num_vars=num_vars,
+        seeds=[task.seed for task in tasks],
+        observers=observers,
+        terminations=terminations,
+        **params,
+    )
+
+    rows = []
+    for task, (best_energy, best_state, evaluations), metric, trace, termination in zip(tasks, results, metrics, traces, terminations):
+        row = {
+            "best_energy_unsatisfied": best_energy,
+            "best_fitness_satisfied": num_clauses - best_energy,
+            "evaluations_used": evaluations,
+        }
+        row.update(metric.metrics())
+        if termination is not None:
+            row["stop_reason"] = termination.reason
+        if trace is not None:
+            row["trace_file"] = trace.save(trace_path(traces_dir, task))
+        rows.append(row)
+    return rows
+
+
 def main():
     os.makedirs(os.path.dirname(RESULTS_FILE), exist_ok=True)
 
-    results = []
-
-    for instance_id, cnf_path in CNF_FILES.items():
-        print(f"\nLoaded {cnf_path}")
-        clauses, num_clauses, num_vars = utils.read_cnf(cnf_path)
-        num_clauses = len(clauses)
-
-        for run in range(INDEPENDENT_RUNS):
-            seed = run  # seeds 0..29
-            random.seed(seed)
-            np.random.seed(seed)
-
-            print(f"File {instance_id}, run {run}, seed {seed}")
-
-            best_energy, best_state, evaluations = simulated_annealing(
-                clauses=clauses,
-                num_vars=num_vars,
-                max_evaluations=MAX_EVALUATIONS,
-                min_temperature=MIN_TEMPERATURE,
-                max_temperature=MAX_TEMPERATURE,
-                alfa=ALFA,
-                bits_to_perturbate=BITS_TO_PERTURBATE,
-                energy_threshold=ENERGY_THRESHOLD,
-            )
-
-            # energy = number of clauses not satisfied
-            best_fitness = num_clauses - best_energy  # number of clauses satisfied
-
-            results.append(
-                {
-                    "instance_id": instance_id,
-                    "cnf_file": cnf_path,
-                    "run": run,
-                    "seed": seed,
-                    "num_vars": num_vars,
-                    "num_clauses": num_clauses,
-                    "best_energy_unsatisfied": best_energy,
-                    "best_fitness_satisfied": best_fitness,
-                    "evaluations_used": evaluations,
-                }
-            )
-
-    df = pd.DataFrame(results)
-    df.to_excel(RESULTS_FILE, index=False)
+    store = ResultsStore(RESULTS_STORE)
+    catalog = ResultsCatalog(CATALOG_FILE)
+    campaign_id = catalog.campaign(CAMPAIGN, family="sa")
+    tasks = expand_grid(ALGORITHMS, CNF_FILES, INDEPENDENT_RUNS)
+    tasks += expand_grid(MULTI_CHAIN_ALGORITHMS, CNF_FILES, INDEPENDENT_RUNS)
+    pending = store.pending(tasks) ## resume: skip runs already in the store
+    execute_task = functools.partial(run_task, traces_dir=TRACES_DIR) ## passed explicitly, so it also reaches spawned workers
+    execute_batch = functools.partial(run_batch, traces_dir=TRACES_DIR)
+    print(f"{len(tasks) - len(pending)} of {len(tasks)} runs already done")
+
+    def report(task, row):
+        store.append(task, row)
+        catalog.record_run(campaign_id, task, row)
+        print(f"File {task.instance_id}, run {task.run}, seed {task.seed}")
+
+    def execute(tasks_to_run):
+        single = [task for task in tasks_to_run if task.algorithm not in MULTI_CHAIN_ALGORITHMS]
+        batched = [task for task in tasks_to_run if task.algorithm in MULTI_CHAIN_ALGORITHMS]
+        rows = dict(zip(map(id, single), run_tasks(single, execute_task, workers=WORKERS, on_result=report)))
+        rows.update(zip(map(id, batched), run_task_batches(batched, execute_batch, workers=WORKERS, on_result=report)))
+        return [rows[id(task)] for task in tasks_to_run]
+
+    if RACING is None:
+        execute(pending)
+    else:
+        race(tasks, execute, completed_rows=store.rows(), **RACING,
+             on_eliminate=lambda instance_id, algorithm, runs: print(f"File {instance_id}: {algorithm} dropped after {runs} runs"))
+
+    store.export_excel(RESULTS_FILE, tasks, include_all=RACING is not None and RACING.get("reinvest", False)) ## reinvested seeds are not in tasks
+    catalog.close()
     print(f"\nSaved results to {RESULTS_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    if sys.argv[1:] == ["tune"]:
+        ## no convergence traces for the tuning runs (an argument, so it also reaches spawned workers)
+        run_tuning(functools.partial(run_task, traces_dir=None), ALGORITHMS, CNF_FILES, TUNING, workers=WORKERS)
+    else:
+        main()
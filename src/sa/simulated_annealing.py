@@ -1,9 +1,13 @@
 import numpy as np
 
+from src.clause_matrix import compile_clauses
+from src.incremental_scorer import IncrementalScorer
+from src.observers import TEMPERATURE_INTERVAL
 from src.sa.utils import evaluate_energy
 
 
-def simulated_annealing(clauses, num_vars, max_evaluations, min_temperature, max_temperature, alfa, bits_to_perturbate, energy_threshold):
+def simulated_annealing(clauses, num_vars, max_evaluations, min_temperature, max_temperature, alfa, bits_to_perturbate, energy_threshold,
+                        delta_evaluation=True, observer=None, termination=None):
     """
     :param clauses: Clauses are variations of the variables {x1, x2, ..., xn} with "and" and "or" operators.
     (Array of clauses, clauses[0] = (8 -12 19) -> x8 ^x12 x19)
@@ -14,9 +18,19 @@ def simulated_annealing(clauses, num_vars, max_evaluations, min_temperature, max
     :param alfa: Cooling factor, how much temperature cools after each state (float value)
     :param bits_to_perturbate: the number of bits to perturb (int value)
     :param energy_threshold: Energy threshold, 0 being a global optima (int value)
+    :param delta_evaluation: True (default) scores each move from the clauses of the flipped variables only and flips
+    in place (see delta_simulated_annealing), False copies and fully re-evaluates every perturbed state.
+    Both return the same results for the same seed.
+    :param observer: optional observers.Observer, receives improvement, acceptance and temperature events
+    :param termination: optional termination.TerminationCriteria (wall/cpu time, target fitness, patience)
     :return: Returns the best energy value found (int value), 0 being a global optima
      and the state in which the energy was found (array of 0's and 1's corresponding variable values)
     """
+    if delta_evaluation:
+        return delta_simulated_annealing(clauses, num_vars, max_evaluations, min_temperature, max_temperature, alfa, bits_to_perturbate, energy_threshold,
+                                         observer, termination)
+
+    clauses = compile_clauses(clauses, num_vars) ## compile once, evaluate_energy is then a vectorized gather
     temperature = max_temperature ## set the initial temperature as given in params
     state = np.random.randint(0,2, size=num_vars) ## initialise first random state
 
@@ -25,31 +39,127 @@ def simulated_annealing(clauses, num_vars, max_evaluations, min_temperature, max
     best_state = state.copy()
 
     evaluations = 1 ## objective function evaluations (evaluate_energy)
+    num_clauses = len(clauses)
+    if observer is not None:
+        observer.on_start(num_vars, num_clauses)
+    if termination is not None:
+        termination.start()
 
     while (evaluations < max_evaluations    ## while we don't reach max evaluations
         and best_energy > energy_threshold  ## or find the global optima
-        and temperature > min_temperature): ## or temperature is too low, do:
+        and temperature > min_temperature   ## or temperature is too low
+        and not (termination is not None and termination.should_stop(evaluations, num_clauses - best_energy))): ## or time, target or patience, do:
 
         new_state = perturbate(state, bits_to_perturbate) ## perturbate current state
         new_energy = evaluate_energy(clauses, new_state)
 
-        if new_energy < energy: ## if the new state's energy is lower (better) than current, instantly swap them.
+        ## if the new state's energy is lower (better) than current, instantly swap them, if it is worse calculate the
+        ## probability of accepting it and find out if we should accept it based on random probabilities
+        accepted = new_energy < energy or should_accept_move(energy, new_energy, temperature)
+        if observer is not None:
+            observer.on_acceptance(evaluations, accepted, new_energy - energy)
+        if accepted:
             energy = new_energy
             state = new_state
-        else:                   ## if new state energy is worse than current:
-            if should_accept_move(energy, new_energy, temperature): ## calculate the probability of accepting them and find out
-                energy = new_energy                                 ## if we should accept it based on random probabilities
-                state = new_state
 
         if new_energy < best_energy:    ## update global best (can't update global best on the first if because of an edge case
             best_energy = new_energy    ## where if we
             best_state = new_state.copy()
+            if observer is not None:
+                observer.on_improvement(evaluations, num_clauses - best_energy)
 
         temperature *= alfa ## lower temperature multiplying it by alfa value and increment evaluations
         evaluations += 1
+        if observer is not None and evaluations % TEMPERATURE_INTERVAL == 0:
+            observer.on_temperature(evaluations, temperature)
+
+    if observer is not None:
+        observer.on_finish(evaluations, num_clauses - best_energy)
+    return best_energy, best_state, evaluations
 
+def delta_simulated_annealing(clauses, num_vars, max_evaluations, min_temperature, max_temperature, alfa, bits_to_perturbate, energy_threshold,
+                              observer=None, termination=None):
+    """
+    Same algorithm (and same random numbers) as simulated_annealing, but the state is never copied:
+    the perturbation flips bits in place on an IncrementalScorer, whose make/break counters give the new energy
+    from the clauses of the flipped variables only. Rejected moves are undone, and best_state is only
+    copied when a new best energy appears. One evaluation is still counted per proposed state.
+    """
+    state = np.random.randint(0,2, size=num_vars) ## initialise first random state
+    scorer = IncrementalScorer(clauses, num_vars, state.tolist()) ## the scorer flips its own list in place
+    energy = len(clauses) - scorer.fitness
+    if observer is not None:
+        observer.on_start(num_vars, len(clauses))
+    if termination is not None:
+        termination.start()
+
+    best_energy, best_state, evaluations, _, _ = run_chain(scorer, energy, max_temperature, max_evaluations, min_temperature,
+                                                           alfa, bits_to_perturbate, energy_threshold, evaluations=1, observer=observer,
+                                                           termination=termination)
+    if observer is not None:
+        observer.on_finish(evaluations, len(clauses) - best_energy)
     return best_energy, best_state, evaluations
 
+def run_chain(scorer, energy, temperature, max_evaluations, min_temperature, alfa, bits_to_perturbate, energy_threshold, evaluations=0,
+              observer=None, termination=None):
+    """
+    Runs the annealing loop on the state held by the scorer, continuing from `evaluations` already used.
+    The scorer is left on the final (current) state of the chain.
+
+    :param scorer: IncrementalScorer loaded with the starting state
+    :param energy: energy of the starting state
+    :param temperature: starting temperature (alfa = 1 keeps it fixed)
+    :param observer: optional observers.Observer, receives improvement, acceptance and temperature events
+    (on_start / on_finish are left to the caller)
+    :param termination: optional termination.TerminationCriteria, already started by the caller
+    :return: (best_energy, best_state, evaluations, final energy, final temperature)
+    """
+    num_clauses = scorer.num_clauses
+    num_vars = scorer.num_vars
+    best_energy = energy
+    best_state = np.array(scorer.combination)
+
+    while (evaluations < max_evaluations
+        and best_energy > energy_threshold
+        and temperature > min_temperature
+        and not (termination is not None and termination.should_stop(evaluations, num_clauses - best_energy))):
+
+        if bits_to_perturbate == 1: ## single flip, read the delta without touching the state
+            index_to_perturbate = np.random.randint(0, num_vars)
+            new_energy = energy - scorer.delta(index_to_perturbate)
+            accepted = new_energy < energy or should_accept_move(energy, new_energy, temperature)
+            if observer is not None:
+                observer.on_acceptance(evaluations, accepted, new_energy - energy)
+            if accepted:
+                scorer.flip(index_to_perturbate)
+                energy = new_energy
+        else:
+            flipped = [np.random.randint(0, num_vars) for _ in range(bits_to_perturbate)] ## same draws as perturbate
+            for index_to_perturbate in flipped:
+                scorer.flip(index_to_perturbate)
+            new_energy = num_clauses - scorer.fitness
+            accepted = new_energy < energy or should_accept_move(energy, new_energy, temperature)
+            if observer is not None:
+                observer.on_acceptance(evaluations, accepted, new_energy - energy)
+            if accepted:
+                energy = new_energy
+            else:
+                for index_to_perturbate in reversed(flipped): ## rejected, undo the flips
+                    scorer.flip(index_to_perturbate)
+
+        if new_energy < best_energy: ## a new best is always accepted, so the scorer holds it right now
+            best_energy = new_energy
+            best_state = np.array(scorer.combination)
+            if observer is not None:
+                observer.on_improvement(evaluations, num_clauses - best_energy)
+
+        temperature *= alfa
+        evaluations += 1
+        if observer is not None and evaluations % TEMPERATURE_INTERVAL == 0:
+            observer.on_temperature(evaluations, temperature)
+
+    return best_energy, best_state, evaluations, energy, temperature
+
 def perturbate(state, bits_to_perturbate):
     """
     Flips n bits of the given state, n = bits_to_perturbate
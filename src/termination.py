@@ -0,0 +1,90 @@
+"""
+Termination criteria shared by every algorithm.
+
+The algorithms always stop on their own max_evaluations (and SA on min_temperature, PSO on its patience).
+A TerminationCriteria passed as `termination` adds any combination of:
+- max_evaluations:  evaluation budget
+- max_wall_time:    seconds of wall-clock time (time.perf_counter)
+- max_cpu_time:     seconds of CPU time of the process (time.process_time)
+- target_fitness:   stop once this many clauses are satisfied
+- patience:         stop after this many evaluations without improving the best fitness
+
+The algorithms call should_stop(evaluations, fitness) in their main loop. The evaluation, target and patience
+tests are integer comparisons, the clocks are only read every `check_interval` evaluations, so the check
+stays cheap in the hot loops. After stopping, `reason` names the criterion that fired.
+"""
+
+import time
+
+CHECK_INTERVAL = 1000 ## evaluations between two clock reads
+
+## keys of a task's params that configure a TerminationCriteria instead of the algorithm
+TERMINATION_PARAMS = ("max_wall_time", "max_cpu_time", "target_fitness", "patience")
+
+
+class TerminationCriteria:
+    def __init__(self, max_evaluations=None, max_wall_time=None, max_cpu_time=None, target_fitness=None, patience=None,
+                 check_interval=CHECK_INTERVAL):
+        self.max_evaluations = max_evaluations
+        self.max_wall_time = max_wall_time
+        self.max_cpu_time = max_cpu_time
+        self.target_fitness = target_fitness
+        self.patience = patience
+        self.check_interval = check_interval
+        self.start()
+
+    def start(self):
+        """Starts the clocks and forgets the previous run, the algorithms call it before their first evaluation."""
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+        self.next_check = self.check_interval
+        self.best_fitness = None
+        self.last_improvement = 0
+        self.reason = None
+        self.stopped = False
+
+    def should_stop(self, evaluations, fitness):
+        """
+        :param evaluations: evaluations used so far
+        :param fitness: current (or best) number of satisfied clauses
+        :return: True once any criterion is met (and from then on)
+        """
+        if self.stopped:
+            return True
+        if self.best_fitness is None or fitness > self.best_fitness:
+            self.best_fitness = fitness
+            self.last_improvement = evaluations
+
+        if self.target_fitness is not None and fitness >= self.target_fitness:
+            return self._stop("target_fitness")
+        if self.max_evaluations is not None and evaluations >= self.max_evaluations:
+            return self._stop("max_evaluations")
+        if self.patience is not None and evaluations - self.last_improvement >= self.patience:
+            return self._stop("patience")
+
+        if evaluations >= self.next_check: ## amortised clock reads
+            self.next_check = evaluations + self.check_interval
+            if self.max_wall_time is not None and time.perf_counter() - self.wall_start >= self.max_wall_time:
+                return self._stop("max_wall_time")
+            if self.max_cpu_time is not None and time.process_time() - self.cpu_start >= self.max_cpu_time:
+                return self._stop("max_cpu_time")
+        return False
+
+    def _stop(self, reason):
+        self.reason = reason
+        self.stopped = True
+        return True
+
+    def elapsed(self):
+        """:return: (wall seconds, cpu seconds) since start()"""
+        return time.perf_counter() - self.wall_start, time.process_time() - self.cpu_start
+
+
+def split_termination_params(params):
+    """
+    Separates the termination keys (TERMINATION_PARAMS) from the algorithm parameters of a task.
+    :return: (algorithm params dict, TerminationCriteria or None when there are no termination keys)
+    """
+    algorithm_params = {name: value for name, value in params.items() if name not in TERMINATION_PARAMS}
+    criteria = {name: params[name] for name in TERMINATION_PARAMS if params.get(name) is not None}
+    return algorithm_params, TerminationCriteria(**criteria) if criteria else None
@@ -0,0 +1,189 @@
+"""
+Hyperparameter tuning with successive halving and Hyperband.
+
+A search space maps parameter names to how they are sampled:
+- a list of values:           categorical choice, e.g. "bits_to_perturbate": [1, 2, 3]
+- ("uniform", low, high):     float in [low, high)
+- ("loguniform", low, high):  float whose logarithm is uniform, e.g. ("loguniform", 1e-7, 1e-2) for a temperature
+- ("int", low, high):         integer in [low, high]
+
+A configuration is scored on every (instance, seed) pair with max_evaluations as its budget, by the runner's own
+run_task (the tasks run on a process pool through experiment_runner.run_tasks). The score is the mean fraction of
+satisfied clauses over the pairs, ties broken by fewer evaluations used.
+
+- successive_halving: evaluates every configuration at min_budget, keeps the best 1/eta, multiplies the budget by eta,
+  and so on up to max_budget
+- hyperband: runs successive halving brackets from many configurations at a small budget to few configurations at
+  max_budget, so a bad min_budget can't hide the good configurations
+
+Every finished (configuration, instance, seed, budget) run is appended to a results store (results_store.py), which
+is also the cache: a run whose task is already in the store is never computed again, in this or a later session.
+"""
+
+import json
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.experiment_runner import Task, run_tasks
+from src.results_store import ResultsStore, task_key
+
+ETA = 3                    ## budget multiplier / survivor divisor between two rungs
+BUDGET_PARAM = "max_evaluations"
+
+
+def sample_configuration(space, rng):
+    """:return: dict parameter -> value (builtin types, so the configuration is a stable JSON key)"""
+    configuration = {}
+    for name, spec in space.items():
+        if isinstance(spec, list):
+            value = spec[int(rng.integers(len(spec)))]
+        elif spec[0] == "uniform":
+            value = float(rng.uniform(spec[1], spec[2]))
+        elif spec[0] == "loguniform":
+            value = float(math.exp(rng.uniform(math.log(spec[1]), math.log(spec[2]))))
+        elif spec[0] == "int":
+            value = int(rng.integers(spec[1], spec[2] + 1))
+        else:
+            raise ValueError(f"Unknown search space entry {name!r}: {spec!r}")
+        configuration[name] = value.item() if hasattr(value, "item") else value
+    return configuration
+
+
+class ConfigurationEvaluator:
+    def __init__(self, run_task, algorithm, base_params, cnf_files, seeds, cache_path, workers=1, on_result=None):
+        """
+        :param run_task: run_task of a runner (run_experiments.py), function(task, clauses, num_clauses, num_vars) -> row
+        :param algorithm: algorithm name of the tasks (e.g. "SA", "VNH", "PSO_informants")
+        :param base_params: fixed parameters of every task, the configuration and the budget are added on top
+        :param cnf_files: dict instance_id -> cnf path
+        :param seeds: seeds every configuration runs on every instance
+        :param cache_path: JSON lines results store used as the cache
+        """
+        self.run_task = run_task
+        self.algorithm = algorithm
+        self.base_params = dict(base_params)
+        self.cnf_files = cnf_files
+        self.seeds = list(seeds)
+        self.store = ResultsStore(cache_path)
+        self.workers = workers
+        self.on_result = on_result
+        self.runs = 0 ## runs computed (not read from the cache)
+
+    def tasks(self, configuration, budget):
+        params = {**self.base_params, **configuration, BUDGET_PARAM: int(budget)}
+        return [Task(self.algorithm, instance_id, cnf_path, seed, seed, params)
+                for instance_id, cnf_path in self.cnf_files.items() for seed in self.seeds]
+
+    def __call__(self, configurations, budget):
+        """
+        Runs every configuration at `budget` (one pool for all of their runs).
+        :return: list of (score, mean evaluations used), one per configuration
+        """
+        tasks = [self.tasks(configuration, budget) for configuration in configurations]
+        pending = self.store.pending([task for group in tasks for task in group])
+
+        def report(task, row):
+            self.store.append(task, row)
+            self.runs += 1
+            if self.on_result is not None:
+                self.on_result(task, row)
+
+        run_tasks(pending, self.run_task, workers=self.workers, on_result=report)
+
+        rows = {task_key(row["algorithm"], row["instance_id"], row["seed"], json.loads(row["params"])): row for row in self.store.rows()}
+        scores = []
+        for group in tasks:
+            group_rows = [rows[task_key(task.algorithm, task.instance_id, task.seed, task.params)] for task in group]
+            score = float(np.mean([row["best_fitness_satisfied"] / row["num_clauses"] for row in group_rows]))
+            scores.append((score, float(np.mean([row["evaluations_used"] for row in group_rows]))))
+        return scores
+
+
+def successive_halving(configurations, min_budget, max_budget, evaluate, eta=ETA, bracket=0, history=None):
+    """
+    :param configurations: list of configuration dicts
+    :param evaluate: function(configurations, budget) -> list of (score, mean evaluations), e.g. ConfigurationEvaluator
+    :param history: optional list, receives one dict per evaluated (rung, configuration)
+    :return: (best configuration, (score, mean evaluations)) at the last rung
+    """
+    rungs = max(0, int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9)))
+    survivors = list(configurations)
+    for rung in range(rungs + 1):
+        budget = max_budget if rung == rungs else int(round(min_budget * eta ** rung))
+        scores = evaluate(survivors, budget)
+        order = sorted(range(len(survivors)), key=lambda i: (-scores[i][0], scores[i][1]))
+        if history is not None:
+            for position, i in enumerate(order):
+                history.append({"bracket": bracket, "rung": rung, "budget": budget, "rank": position,
+                                "score": scores[i][0], "mean_evaluations": scores[i][1], **survivors[i]})
+        if rung == rungs:
+            return survivors[order[0]], scores[order[0]]
+        keep = max(1, len(survivors) // eta)
+        survivors = [survivors[i] for i in order[:keep]]
+
+
+def hyperband(space, min_budget, max_budget, evaluate, eta=ETA, seed=0, history=None):
+    """
+    Hyperband brackets s = s_max..0: bracket s starts ceil((s_max + 1) / (s + 1) * eta^s) random configurations
+    at max_budget / eta^s and runs successive halving up to max_budget.
+    :return: (best configuration, (score, mean evaluations)) over the brackets, compared at max_budget
+    """
+    rng = np.random.default_rng(seed)
+    s_max = max(0, int(math.floor(math.log(max_budget / min_budget, eta) + 1e-9)))
+    best = None
+    for s in range(s_max, -1, -1):
+        count = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+        configurations = [sample_configuration(space, rng) for _ in range(count)]
+        result = successive_halving(configurations, max_budget / eta ** s, max_budget, evaluate, eta, bracket=s_max - s, history=history)
+        if best is None or (-result[1][0], result[1][1]) < (-best[1][0], best[1][1]):
+            best = result
+    return best
+
+
+def tune(run_task, algorithm, base_params, space, cnf_files, seeds, cache_path, min_budget, max_budget, eta=ETA,
+         method="hyperband", num_configurations=27, seed=0, workers=1, on_result=None):
+    """
+    Tunes the parameters in `space` of one algorithm of a runner.
+
+    :param method: "hyperband" or "successive_halving" (num_configurations random configurations)
+    :return: (best configuration, best score, history DataFrame with one row per evaluated rung and configuration)
+    """
+    evaluate = ConfigurationEvaluator(run_task, algorithm, base_params, cnf_files, seeds, cache_path, workers, on_result)
+    history = []
+    if method == "hyperband":
+        best, (score, _) = hyperband(space, min_budget, max_budget, evaluate, eta, seed, history)
+    elif method == "successive_halving":
+        rng = np.random.default_rng(seed)
+        configurations = [sample_configuration(space, rng) for _ in range(num_configurations)]
+        best, (score, _) = successive_halving(configurations, min_budget, max_budget, evaluate, eta, history=history)
+    else:
+        raise ValueError(f"Unknown tuning method {method!r}, expected 'hyperband' or 'successive_halving'")
+    return best, score, pd.DataFrame(history)
+
+
+def run_tuning(run_task, algorithms, cnf_files, settings, workers=1):
+    """
+    Entry point of `python run_experiments.py tune`: tunes settings["algorithm"] (an ALGORITHMS entry, its fixed
+    parameters are the base) over the search space settings["space"] and saves the history to settings["history"].
+
+    :param settings: the runner's TUNING dict (algorithm, space, seeds, min_budget, max_budget, cache, history,
+    optional eta, method, num_configurations, seed)
+    """
+    algorithm = settings["algorithm"]
+    base_params = {name: value for name, value in algorithms[algorithm].items() if name != BUDGET_PARAM}
+
+    def report(task, row):
+        print(f"[{task.algorithm}] File {task.instance_id}, seed {task.seed}, budget {task.params[BUDGET_PARAM]}: "
+              f"{row['best_fitness_satisfied']}/{row['num_clauses']}")
+
+    best, score, history = tune(run_task, algorithm, base_params, settings["space"], cnf_files, settings["seeds"],
+                                settings["cache"], settings["min_budget"], settings["max_budget"],
+                                eta=settings.get("eta", ETA), method=settings.get("method", "hyperband"),
+                                num_configurations=settings.get("num_configurations", 27), seed=settings.get("seed", 0),
+                                workers=workers, on_result=report)
+    history.to_excel(settings["history"], index=False)
+    print(f"\nBest {algorithm} configuration (mean satisfied fraction {score:.4f}): {best}")
+    print(f"Saved tuning history to {settings['history']}")
+    return best
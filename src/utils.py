@@ -1,39 +1,38 @@
+from src.dimacs_parser import parse_dimacs
+from src.instance import build_instance
+from src.instance_cache import load_cached_instance, save_cached_instance
+
 # Default CNF file path (can be overridden)
 CNF_FILE_PATH = "../../cnf_files/uf20-01.cnf"
 
-# functions that reads the cnf file and stores variables and lists of its content
-def read_cnf(filepath=None):
+# functions that reads the cnf file (plain, .gz, .xz or .bz2) and stores variables and lists of its content
+# compiled=True returns the clauses as a ClauseMatrix (see clause_matrix.py) instead of lists
+# as_instance=True returns them as an immutable Instance with the occurrence index (see instance.py)
+# cache=True (with as_instance) memory-maps the binary cache of the file instead of parsing it (see instance_cache.py)
+def read_cnf(filepath=None, compiled=False, as_instance=False, cache=False, cache_dir=None):
     if filepath is None:
         filepath = CNF_FILE_PATH
-    clauses = []
-    num_clauses = 0
-    num_vars = 0
 
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-            if not line or line.startswith("c"):
-                continue
+    if as_instance and cache:
+        instance = load_cached_instance(filepath, cache_dir)
+        if instance is not None:
+            return instance, instance.num_clauses, instance.num_vars
 
-            if line.startswith("p"): # process header line (starts with p)
-                parts = line.split()
-                num_vars = int(parts[2])
-                num_clauses = int(parts[3])
-                continue
+    literals, clause_offsets, num_vars, num_clauses = parse_dimacs(filepath) ## flat arrays, see dimacs_parser.py
 
-            clause = []             # clause lines, finish with 0
-            for x in line.split():
-                if x == '0': ## if 0, go next line
-                    continue
+    if as_instance or compiled:
+        instance = build_instance(literals, clause_offsets, num_vars, filepath)
+        if as_instance:
+            if cache:
                 try:
-                    clause.append(int(x)) ## if not append the integer
-                except ValueError: ## if any char besides integers, skip line (bcs of % 0 in end of file .cnf)
-                    continue
-
-            if clause:
-                clauses.append(clause)
+                    save_cached_instance(instance, filepath, cache_dir)
+                except OSError: ## read-only dataset or cache_dir: run on the parsed instance, uncached
+                    pass
+            return instance, num_clauses, num_vars
+        return instance.clause_matrix, num_clauses, num_vars
 
-            if len(clauses) >= num_clauses: ## stop after all clauses are read
-                break
+    literals = literals.tolist()
+    offsets = clause_offsets.tolist()
+    clauses = [literals[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)] ## one list per clause
 
-    return clauses, num_clauses, num_vars
\ No newline at end of file
+    return clauses, num_clauses, num_vars